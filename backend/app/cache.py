@@ -0,0 +1,215 @@
+"""
+Response cache for per-user read endpoints.
+
+Entries are keyed on (user_id, endpoint, params) plus a per-user
+generation number. Writes bump the user's generation, so every cached
+response of that user becomes unreachable at once and ages out by
+TTL/LRU. Two backends are available: an in-process LRU (default) and
+any Redis-protocol client (redis.asyncio or a compatible fake).
+"""
+import json
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+from pydantic import TypeAdapter
+from app.config import settings
+
+T = TypeVar("T")
+
+
+class CacheStats:
+    """Counters exported to size the cache"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hit_ratio,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+        }
+
+
+class MemoryBackend:
+    """In-process LRU with a per-entry TTL"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int, stats: CacheStats):
+        self.max_entries = max_entries
+        self.stats = stats
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        # Generation counters live outside the LRU: losing one would
+        # resurrect entries written before the last invalidation
+        self._counters: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisBackend:
+    """
+    Backend over an async Redis-protocol client. Expiry and eviction are
+    done by the server, so evictions show up in its INFO stats rather
+    than in CacheStats.
+    """
+
+    name = "redis"
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self.client.set(key, value, ex=ttl)
+
+    async def get_counter(self, key: str) -> int:
+        return int(await self.client.get(key) or 0)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+@lru_cache(maxsize=None)
+def _adapter(response_type: Any) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+
+class ResponseCache:
+    """Per-user response cache with generation-based invalidation"""
+
+    def __init__(self, backend: Any, ttl: int, stats: CacheStats, namespace: str = "resp"):
+        self.backend = backend
+        self.ttl = ttl
+        self.stats = stats
+        self.namespace = namespace
+        # Hits and misses per endpoint, on top of the totals in stats
+        self.endpoint_stats: Dict[str, CacheStats] = {}
+
+    def _generation_key(self, user_id: int) -> str:
+        return f"{self.namespace}:gen:{user_id}"
+
+    async def get_or_load(
+        self,
+        user_id: int,
+        endpoint: str,
+        params: Dict[str, Any],
+        loader: Callable[[], Awaitable[T]],
+        response_type: Any
+    ) -> T:
+        """
+        Return the cached response for (user_id, endpoint, params), or run
+        the loader and cache its result. Backend failures fall through to
+        the loader so the cache can never take an endpoint down.
+        """
+        adapter = _adapter(response_type)
+        try:
+            # Read the generation before loading: a write that commits
+            # meanwhile bumps it, so a stale result is stored unreachably
+            generation = await self.backend.get_counter(self._generation_key(user_id))
+            key = f"{self.namespace}:{user_id}:{generation}:{endpoint}:{json.dumps(params, sort_keys=True, default=str)}"
+            cached = await self.backend.get(key)
+        except Exception:
+            self.stats.errors += 1
+            return await loader()
+
+        endpoint_stats = self.endpoint_stats.setdefault(endpoint, CacheStats())
+        if cached is not None:
+            self.stats.hits += 1
+            endpoint_stats.hits += 1
+            return adapter.validate_json(cached)
+
+        self.stats.misses += 1
+        endpoint_stats.misses += 1
+        value = await loader()
+        try:
+            await self.backend.set(key, adapter.dump_json(value), self.ttl)
+        except Exception:
+            self.stats.errors += 1
+        return value
+
+    async def invalidate_user(self, user_id: int) -> None:
+        """Drop every cached response of a user"""
+        try:
+            await self.backend.incr(self._generation_key(user_id))
+            self.stats.invalidations += 1
+        except Exception:
+            self.stats.errors += 1
+
+    def describe(self) -> Dict[str, Any]:
+        """Backend, configuration and counters for monitoring"""
+        return {
+            "backend": self.backend.name,
+            "ttl_seconds": self.ttl,
+            "max_entries": getattr(self.backend, "max_entries", None),
+            "entries": self.backend.size(),
+            **self.stats.as_dict(),
+            "endpoints": {
+                endpoint: {"hits": stats.hits, "misses": stats.misses, "hit_ratio": stats.hit_ratio}
+                for endpoint, stats in sorted(self.endpoint_stats.items())
+            },
+        }
+
+    def describe_endpoint(self, endpoint: str) -> Dict[str, Any]:
+        """Hit and miss counters of one endpoint"""
+        stats = self.endpoint_stats.get(endpoint, CacheStats())
+        return {"endpoint": endpoint, "hits": stats.hits, "misses": stats.misses, "hit_ratio": stats.hit_ratio}
+
+
+def create_response_cache() -> ResponseCache:
+    """Build the cache selected by CACHE_BACKEND"""
+    stats = CacheStats()
+    if settings.CACHE_BACKEND == "redis":
+        import redis.asyncio as redis
+
+        backend = RedisBackend(redis.from_url(settings.REDIS_URL))
+    else:
+        backend = MemoryBackend(settings.CACHE_MAX_ENTRIES, stats)
+    return ResponseCache(backend, settings.CACHE_TTL_SECONDS, stats)
+
+
+response_cache = create_response_cache()
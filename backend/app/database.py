@@ -1,33 +1,177 @@
 """
 Database connection and session management
 """
-from sqlalchemy import create_engine
+import time
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
-# Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
+
+def to_async_url(url: str) -> str:
+    """Point a postgresql:// URL at the asyncpg driver"""
+    scheme, _, rest = url.partition("://")
+    return f"postgresql+asyncpg://{rest}" if scheme in ("postgresql", "postgres", "postgresql+psycopg2") else url
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection"""
+    
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.wait_observers: List[Callable[[float], None]] = []
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            for observe in self.wait_observers:
+                observe(waited)
+
+
+def make_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        to_async_url(url),
+        poolclass=TimedQueuePool,
+        pool_pre_ping=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT
+    )
+
+
+def make_session_factory(bind: AsyncEngine) -> async_sessionmaker:
+    return async_sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+
+QueryListener = Callable[[str, str], None]
+
+
+class SessionRouter:
+    """
+    Hands out sessions on the primary or the read replica.
+    
+    Writes always go to the primary. Reads go to the replica unless the
+    user wrote within the last READ_YOUR_WRITES_SECONDS (0 disables the
+    window), so a client never reads back data older than its own last
+    write. The window is tracked per process.
+    
+    Every statement is counted against the engine role that ran it, and
+    listeners registered with add_query_listener are called with
+    (role, statement). With no replica configured both roles share the
+    primary engine and all statements are counted as "primary".
+    """
+    
+    def __init__(self, primary: AsyncEngine, replica: Optional[AsyncEngine] = None, read_your_writes_seconds: int = 0):
+        self.primary = primary
+        self.replica = replica or primary
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.primary_sessions = make_session_factory(self.primary)
+        self.replica_sessions = make_session_factory(self.replica) if replica is not None else self.primary_sessions
+        self.queries: Dict[str, int] = {"primary": 0, "replica": 0}
+        self.pinned_reads = 0
+        self._listeners: List[QueryListener] = []
+        self._recent_writes: Dict[int, float] = {}
+        self._watch(self.primary, "primary")
+        if replica is not None:
+            self._watch(replica, "replica")
+    
+    def _watch(self, engine: AsyncEngine, role: str) -> None:
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            self.queries[role] += 1
+            for listener in self._listeners:
+                listener(role, statement)
+    
+    def add_query_listener(self, listener: QueryListener) -> None:
+        self._listeners.append(listener)
+    
+    def remove_query_listener(self, listener: QueryListener) -> None:
+        self._listeners.remove(listener)
+    
+    def writer(self) -> AsyncSession:
+        """A session on the primary"""
+        return self.primary_sessions()
+    
+    def reader(self, user_id: Optional[int] = None) -> AsyncSession:
+        """A session on the replica, or on the primary inside user_id's write window"""
+        if user_id is not None and self.wrote_recently(user_id):
+            self.pinned_reads += 1
+            return self.primary_sessions()
+        return self.replica_sessions()
+    
+    def record_write(self, user_id: int) -> None:
+        """Open user_id's read-your-writes window; call after committing"""
+        if self.read_your_writes_seconds > 0 and self.replica is not self.primary:
+            now = time.monotonic()
+            self._prune_writes(now)
+            # Re-inserted at the end, so windows stay in expiry order
+            self._recent_writes.pop(user_id, None)
+            self._recent_writes[user_id] = now + self.read_your_writes_seconds
+    
+    def _prune_writes(self, now: float) -> None:
+        """Drop expired windows, oldest first, up to the first open one"""
+        while self._recent_writes:
+            user_id, until = next(iter(self._recent_writes.items()))
+            if until > now:
+                return
+            del self._recent_writes[user_id]
+    
+    def wrote_recently(self, user_id: int) -> bool:
+        until = self._recent_writes.get(user_id)
+        if until is None:
+            return False
+        if until <= time.monotonic():
+            del self._recent_writes[user_id]
+            return False
+        return True
+    
+    def stats(self) -> Dict[str, Any]:
+        self._prune_writes(time.monotonic())
+        return {
+            "replica_configured": self.replica is not self.primary,
+            "read_your_writes_seconds": self.read_your_writes_seconds,
+            "queries": dict(self.queries),
+            "pinned_reads": self.pinned_reads,
+            "users_in_write_window": len(self._recent_writes),
+        }
+
+
+# Create async database engines
+engine = make_engine(settings.DATABASE_URL)
+replica_engine = make_engine(settings.DATABASE_REPLICA_URL) if settings.DATABASE_REPLICA_URL else None
+
+session_router = SessionRouter(engine, replica_engine, settings.READ_YOUR_WRITES_SECONDS)
 
 # Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = session_router.primary_sessions
 
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
+async def get_async_db():
     """
-    Dependency to get database session.
+    Dependency to get an async database session.
     Yields a session and ensures it's closed after use.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_read_db():
+    """
+    Dependency to get a read-only session on the replica.
+    Use get_user_read_db for user-scoped routes that should see their own writes.
+    """
+    async with session_router.reader() as db:
         yield db
-    finally:
-        db.close()
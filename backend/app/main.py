@@ -3,8 +3,15 @@ Personal Finance BI System - Backend API
 FastAPI application entry point
 """
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.database import engine, replica_engine
+from app.services.bi_refresh_service import refresh_scheduler
+from app.services.wallet_ledger_service import compaction_scheduler
+from app.utils.metrics import CONTENT_TYPE, MetricsMiddleware, render_metrics
+from app.utils.query_stats import QueryStatsMiddleware, instrument_engine, instrument_serialization
+from app.utils.security import password_hasher
 from app.routers import (
     auth_router,
     categories_router,
@@ -41,8 +48,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Server-Timing"],
 )
 
+# Per-request statement counts, DB time and slow-query log
+if settings.QUERY_STATS_ENABLED:
+    instrument_engine(engine)
+    if replica_engine is not None:
+        instrument_engine(replica_engine)
+    instrument_serialization()
+    app.add_middleware(QueryStatsMiddleware)
+
+# Latency per route template and in-flight requests for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router)
 app.include_router(categories_router)
@@ -68,3 +87,39 @@ async def root():
 async def health_check():
     """Health check endpoint for Docker"""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.on_event("startup")
+async def start_bi_refresh():
+    """Start refreshing stale materialized BI views in the background"""
+    refresh_scheduler.start()
+
+
+@app.on_event("startup")
+async def start_wallet_compaction():
+    """Start folding wallet balance deltas in the background"""
+    compaction_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_password_hasher():
+    """Stop the bcrypt pool"""
+    password_hasher.shutdown()
+
+
+@app.on_event("shutdown")
+async def stop_bi_refresh():
+    """Stop the BI refresh task"""
+    await refresh_scheduler.stop()
+
+
+@app.on_event("shutdown")
+async def stop_wallet_compaction():
+    """Stop the wallet compaction task"""
+    await compaction_scheduler.stop()
@@ -3,9 +3,9 @@ SQLAlchemy models for the Personal Finance BI System
 """
 from app.models.user import User
 from app.models.category import Category
-from app.models.wallet import Wallet
+from app.models.wallet import Wallet, WalletBalanceDelta
 from app.models.transaction import Transaction
 from app.models.budget import Budget
 from app.models.bill import Bill
 
-__all__ = ["User", "Category", "Wallet", "Transaction", "Budget", "Bill"]
+__all__ = ["User", "Category", "Wallet", "WalletBalanceDelta", "Transaction", "Budget", "Bill"]
@@ -1,7 +1,7 @@
 """
 Transaction model
 """
-from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, Computed, Integer, String, Date, DateTime, ForeignKey, Numeric
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -20,7 +20,11 @@ class Transaction(Base):
     amount = Column(Numeric(15, 2), nullable=False)
     description = Column(String(500), nullable=True)
     transaction_date = Column(Date, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    # Generated by the database from transaction_date
+    year = Column(Integer, Computed("EXTRACT(YEAR FROM transaction_date)::INTEGER", persisted=True))
+    month = Column(Integer, Computed("EXTRACT(MONTH FROM transaction_date)::INTEGER", persisted=True))
+    period_start = Column(Date, Computed("DATE_TRUNC('month', transaction_date::TIMESTAMP)::DATE", persisted=True))
     
     # Relationships
     user = relationship("User", back_populates="transactions")
@@ -1,12 +1,23 @@
 """
 Wallet model
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Numeric
-from sqlalchemy.orm import relationship
+from sqlalchemy import BigInteger, Column, Integer, String, Boolean, DateTime, ForeignKey, Numeric, select
+from sqlalchemy.orm import column_property, relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
 
+class WalletBalanceDelta(Base):
+    """Balance change appended by the transaction triggers, not yet folded into its wallet"""
+    
+    __tablename__ = "wallet_balance_deltas"
+    
+    id = Column(BigInteger, primary_key=True)
+    wallet_id = Column(Integer, ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False)
+    delta = Column(Numeric(15, 2), nullable=False)
+    created_at = Column(DateTime, server_default=func.now())
+
+
 class Wallet(Base):
     """Wallet model for managing money accounts"""
     
@@ -15,11 +26,21 @@ class Wallet(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     name = Column(String(100), nullable=False)
+    # Compacted balance; transactions since the last compaction are in wallet_balance_deltas
     balance = Column(Numeric(15, 2), default=0)
+    # Balance before any transaction, for reconciliation; set from balance on insert when omitted
+    opening_balance = Column(Numeric(15, 2), nullable=False)
     currency = Column(String(3), default="VND")
     icon = Column(String(50), default="wallet")
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Balance including pending deltas, loaded in the same statement as the wallet
+    current_balance = column_property(
+        balance + select(func.coalesce(func.sum(WalletBalanceDelta.delta), 0))
+        .where(WalletBalanceDelta.wallet_id == id)
+        .correlate_except(WalletBalanceDelta)
+        .scalar_subquery()
+    )
     
     # Relationships
     user = relationship("User", back_populates="wallets")
@@ -3,14 +3,19 @@ Automation API endpoints for n8n workflows
 These endpoints provide data for automated notifications and alerts
 """
 from fastapi import APIRouter, Depends, Query, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 from typing import List, Optional
 from datetime import datetime, date
 import calendar
 
-from app.database import get_db
+from app.cache import response_cache
+from app.database import get_async_db, get_read_db, session_router
 from app.config import settings
+from app.services.budget_service import evaluate_budgets
+from app.services.bi_refresh_service import refresh_views, view_freshness
+from app.services.rollup_service import check_rollup
+from app.services.wallet_reconciliation_service import drifted_users, latest_drift, reconcile_wallets
 
 router = APIRouter(
     prefix="/api/automation",
@@ -29,7 +34,7 @@ def verify_service_key(service_key: str = Query(..., alias="service_key")):
 async def get_upcoming_bills(
     month: str = Query(..., description="Month in YYYY-MM format"),
     service_key: str = Depends(verify_service_key),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get upcoming bills for a specific month.
@@ -71,7 +76,7 @@ async def get_upcoming_bills(
             ORDER BY b.user_id, b.due_day
         """)
         
-        result = db.execute(query)
+        result = await db.execute(query)
         rows = result.fetchall()
         
         bills = []
@@ -111,7 +116,7 @@ async def get_budget_overruns(
     year: Optional[int] = Query(None, description="Year (default: current year)"),
     month: Optional[int] = Query(None, ge=1, le=12, description="Month 1-12 (default: current month)"),
     service_key: str = Depends(verify_service_key),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """
     Get budget overruns for alerts.
@@ -131,31 +136,7 @@ async def get_budget_overruns(
     
     period = f"{target_year}-{target_month:02d}"
     
-    query = text("""
-        SELECT 
-            bva.user_id,
-            u.email AS user_email,
-            u.full_name AS user_name,
-            bva.year,
-            bva.month,
-            bva.category_id,
-            bva.category_name,
-            bva.category_color,
-            bva.budget_amount,
-            bva.actual_spent,
-            bva.actual_spent - bva.budget_amount AS overrun_amount,
-            bva.usage_percentage,
-            bva.status
-        FROM v_budget_vs_actual bva
-        JOIN users u ON bva.user_id = u.id
-        WHERE bva.year = :year 
-          AND bva.month = :month
-          AND bva.actual_spent > bva.budget_amount
-        ORDER BY bva.user_id, bva.actual_spent - bva.budget_amount DESC
-    """)
-    
-    result = db.execute(query, {"year": target_year, "month": target_month})
-    rows = result.fetchall()
+    rows = await evaluate_budgets(db, target_year, target_month, exceeded_only=True)
     
     overruns = []
     for row in rows:
@@ -170,10 +151,13 @@ async def get_budget_overruns(
             "category_name": row.category_name,
             "budget_amount": float(row.budget_amount),
             "actual_spent": float(row.actual_spent),
-            "overrun_amount": float(row.overrun_amount),
+            "overrun_amount": float(row.actual_spent - row.budget_amount),
             "usage_percentage": float(row.usage_percentage) if row.usage_percentage else 0
         })
     
+    # Largest overrun first within each user
+    overruns.sort(key=lambda o: (o["user_id"], -o["overrun_amount"]))
+    
     return {
         "period": period,
         "total_overruns": len(overruns),
@@ -181,6 +165,134 @@ async def get_budget_overruns(
     }
 
 
+@router.get("/rollup/check")
+async def check_transaction_rollup(
+    service_key: str = Depends(verify_service_key),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Compare the monthly rollup with a full recompute from transactions.
+    
+    Returns:
+        Mismatched (user, month, category, type) groups; empty when consistent
+    """
+    mismatches = await check_rollup(db)
+    
+    return {
+        "consistent": not mismatches,
+        "total_mismatches": len(mismatches),
+        "mismatches": mismatches
+    }
+
+
+@router.post("/wallets/reconcile")
+async def reconcile_wallet_balances(
+    repair: bool = Query(False, description="Append each drift to the wallet balance ledger"),
+    service_key: str = Depends(verify_service_key),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Recompute every wallet's balance from its opening balance and
+    transactions, e.g. from a nightly n8n schedule.
+    
+    Returns:
+        The run: wallets checked and drifted wallets, with the largest drifts
+    """
+    run = await reconcile_wallets(db, repair)
+    if repair:
+        # Repaired balances change cached dashboards of their owners
+        for user_id in await drifted_users(db, run["id"]):
+            await response_cache.invalidate_user(user_id)
+    
+    return {
+        "run": run,
+        "drift": await latest_drift(db)
+    }
+
+
+@router.get("/wallets/drift")
+async def get_wallet_drift(
+    limit: int = Query(100, ge=1, le=1000),
+    service_key: str = Depends(verify_service_key),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Wallets found drifted by the latest finished reconciliation run.
+    
+    Returns:
+        Stored and expected balance and drift per wallet, largest first
+    """
+    drift = await latest_drift(db, limit)
+    
+    return {
+        "total_drifted": len(drift),
+        "drift": drift
+    }
+
+
+@router.get("/bi/freshness")
+async def get_bi_freshness(
+    service_key: str = Depends(verify_service_key),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Last refresh of each materialized BI view.
+    
+    Staleness is computed from the primary's table statistics, so this
+    reads from the primary.
+    
+    Returns:
+        Current view source and, per view, refreshed_at, refresh_ms and stale
+    """
+    return {
+        "source": settings.BI_VIEW_SOURCE,
+        "views": await view_freshness(db)
+    }
+
+
+@router.post("/bi/refresh")
+async def refresh_bi_views(
+    force: bool = Query(False, description="Refresh even views whose sources are unchanged"),
+    service_key: str = Depends(verify_service_key),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Refresh stale materialized BI views now, e.g. from an n8n workflow
+    right after a bulk import.
+    
+    Returns:
+        View name -> whether it was refreshed
+    """
+    return {"refreshed": await refresh_views(db, force)}
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    service_key: str = Depends(verify_service_key)
+):
+    """
+    Response cache counters for sizing the cache.
+    
+    Returns:
+        Backend, TTL, capacity, current entries and hit/miss/eviction counts
+    """
+    return response_cache.describe()
+
+
+@router.get("/db/stats")
+async def get_db_routing_stats(
+    service_key: str = Depends(verify_service_key)
+):
+    """
+    Primary / replica routing counters.
+    
+    Returns:
+        Whether a replica is configured, statements run per engine and
+        reads pinned to the primary by the read-your-writes window
+    """
+    return session_router.stats()
+
+
 @router.get("/health")
 async def automation_health():
     """Health check endpoint for automation service"""
@@ -5,14 +5,17 @@ from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import text
-from app.database import get_db
-from app.models.user import User
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select
+from app.cache import response_cache
+from app.database import get_async_db, session_router
 from app.models.category import Category
 from app.models.budget import Budget
+from app.schemas.user import UserPrincipal
 from app.schemas.budget import BudgetCreate, BudgetUpdate, BudgetResponse, BudgetStatus
-from app.utils.security import get_current_user
+from app.services.budget_service import evaluate_budgets
+from app.utils.security import get_current_user, get_user_read_db
 
 router = APIRouter(prefix="/api/budgets", tags=["Budgets"])
 
@@ -33,82 +36,42 @@ def budget_to_response(budget: Budget) -> BudgetResponse:
     )
 
 
+async def get_budget_response(db: AsyncSession, budget_id: int, user_id: int) -> Optional[BudgetResponse]:
+    """Fetch a single budget of a user with its category as a response"""
+    budget = (await db.execute(
+        select(Budget)
+        .options(joinedload(Budget.category))
+        .where(Budget.id == budget_id, Budget.user_id == user_id)
+        .execution_options(populate_existing=True)
+    )).scalars().first()
+    return budget_to_response(budget) if budget else None
+
+
 @router.get("/", response_model=List[BudgetResponse])
 async def get_budgets(
     month: Optional[int] = None,
     year: Optional[int] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
 ):
     """Get budgets for current user"""
     
-    query = db.query(Budget).filter(Budget.user_id == current_user.id)
+    query = select(Budget).options(joinedload(Budget.category)).where(
+        Budget.user_id == current_user.id
+    )
     
     if month:
-        query = query.filter(Budget.month == month)
+        query = query.where(Budget.month == month)
     if year:
-        query = query.filter(Budget.year == year)
+        query = query.where(Budget.year == year)
     
-    budgets = query.all()
+    budgets = (await db.execute(query)).scalars().all()
     return [budget_to_response(b) for b in budgets]
 
 
-@router.get("/status", response_model=List[BudgetStatus])
-async def get_budget_status(
-    month: int = Query(default=datetime.now().month),
-    year: int = Query(default=datetime.now().year),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get budget status with actual spending"""
-    
-    query = text("""
-        SELECT 
-            b.id,
-            b.category_id,
-            c.name AS category_name,
-            c.icon AS category_icon,
-            c.color AS category_color,
-            b.amount AS budget_amount,
-            COALESCE(actual.spent, 0) AS actual_spent,
-            b.amount - COALESCE(actual.spent, 0) AS remaining,
-            ROUND(COALESCE(actual.spent, 0) * 100.0 / NULLIF(b.amount, 0), 2) AS usage_percentage,
-            CASE 
-                WHEN COALESCE(actual.spent, 0) >= b.amount THEN 'exceeded'
-                WHEN COALESCE(actual.spent, 0) >= b.amount * 0.8 THEN 'warning'
-                ELSE 'safe'
-            END AS status,
-            b.month,
-            b.year
-        FROM budgets b
-        JOIN categories c ON b.category_id = c.id
-        LEFT JOIN (
-            SELECT 
-                user_id,
-                category_id,
-                EXTRACT(YEAR FROM transaction_date)::INTEGER AS year,
-                EXTRACT(MONTH FROM transaction_date)::INTEGER AS month,
-                SUM(amount) AS spent
-            FROM transactions
-            WHERE type = 'expense'
-            GROUP BY user_id, category_id, 
-                EXTRACT(YEAR FROM transaction_date),
-                EXTRACT(MONTH FROM transaction_date)
-        ) actual ON b.user_id = actual.user_id 
-            AND b.category_id = actual.category_id 
-            AND b.year = actual.year 
-            AND b.month = actual.month
-        WHERE b.user_id = :user_id
-          AND b.year = :year
-          AND b.month = :month
-        ORDER BY usage_percentage DESC NULLS LAST
-    """)
-    
-    result = db.execute(query, {
-        "user_id": current_user.id,
-        "year": year,
-        "month": month
-    })
+async def fetch_budget_status(db: AsyncSession, user_id: int, year: int, month: int) -> List[BudgetStatus]:
+    """Budgets of a month with actual spending from the monthly rollup"""
+    result = await evaluate_budgets(db, year, month, user_id=user_id)
     
     budget_statuses = []
     for row in result:
@@ -130,20 +93,40 @@ async def get_budget_status(
     return budget_statuses
 
 
+async def cached_budget_status(db: AsyncSession, user_id: int, year: int, month: int) -> List[BudgetStatus]:
+    return await response_cache.get_or_load(
+        user_id, "budgets.status", {"year": year, "month": month},
+        lambda: fetch_budget_status(db, user_id, year, month), List[BudgetStatus]
+    )
+
+
+@router.get("/status", response_model=List[BudgetStatus])
+async def get_budget_status(
+    month: Optional[int] = Query(default=None, ge=1, le=12, description="Month 1-12 (default: current month)"),
+    year: Optional[int] = Query(default=None, description="Year (default: current year)"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
+):
+    """Get budget status with actual spending"""
+    now = datetime.now()
+    year, month = year or now.year, month or now.month
+    return await cached_budget_status(db, current_user.id, year, month)
+
+
 @router.post("/", response_model=BudgetResponse, status_code=status.HTTP_201_CREATED)
 async def create_budget(
     budget_data: BudgetCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new budget"""
     
     # Verify category exists and is expense type
-    category = db.query(Category).filter(
+    category = (await db.execute(select(Category).where(
         Category.id == budget_data.category_id,
         Category.type == "expense",
         Category.is_active == True
-    ).first()
+    ))).scalars().first()
     
     if not category:
         raise HTTPException(
@@ -152,12 +135,12 @@ async def create_budget(
         )
     
     # Check if budget already exists
-    existing = db.query(Budget).filter(
+    existing = (await db.execute(select(Budget).where(
         Budget.user_id == current_user.id,
         Budget.category_id == budget_data.category_id,
         Budget.month == budget_data.month,
         Budget.year == budget_data.year
-    ).first()
+    ))).scalars().first()
     
     if existing:
         raise HTTPException(
@@ -174,25 +157,26 @@ async def create_budget(
     )
     
     db.add(new_budget)
-    db.commit()
-    db.refresh(new_budget)
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
     
-    return budget_to_response(new_budget)
+    return await get_budget_response(db, new_budget.id, current_user.id)
 
 
 @router.put("/{budget_id}", response_model=BudgetResponse)
 async def update_budget(
     budget_id: int,
     budget_data: BudgetUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a budget"""
     
-    budget = db.query(Budget).filter(
+    budget = (await db.execute(select(Budget).where(
         Budget.id == budget_id,
         Budget.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not budget:
         raise HTTPException(
@@ -203,24 +187,25 @@ async def update_budget(
     if budget_data.amount is not None:
         budget.amount = budget_data.amount
     
-    db.commit()
-    db.refresh(budget)
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
     
-    return budget_to_response(budget)
+    return await get_budget_response(db, budget_id, current_user.id)
 
 
 @router.delete("/{budget_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_budget(
     budget_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a budget"""
     
-    budget = db.query(Budget).filter(
+    budget = (await db.execute(select(Budget).where(
         Budget.id == budget_id,
         Budget.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not budget:
         raise HTTPException(
@@ -228,7 +213,9 @@ async def delete_budget(
             detail="Budget not found"
         )
     
-    db.delete(budget)
-    db.commit()
+    await db.delete(budget)
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
     
     return None
@@ -3,13 +3,14 @@ Category routes
 """
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
-from app.database import get_db
-from app.models.user import User
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, or_
+from app.cache import response_cache
+from app.database import get_async_db, session_router
 from app.models.category import Category
+from app.schemas.user import UserPrincipal
 from app.schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
-from app.utils.security import get_current_user
+from app.utils.security import get_current_user, get_user_read_db
 
 router = APIRouter(prefix="/api/categories", tags=["Categories"])
 
@@ -17,12 +18,12 @@ router = APIRouter(prefix="/api/categories", tags=["Categories"])
 @router.get("/", response_model=List[CategoryResponse])
 async def get_categories(
     type: str = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
 ):
     """Get all categories (system defaults + user's custom categories)"""
     
-    query = db.query(Category).filter(
+    query = select(Category).where(
         or_(
             Category.user_id == None,  # System defaults
             Category.user_id == current_user.id  # User's custom
@@ -31,26 +32,26 @@ async def get_categories(
     )
     
     if type:
-        query = query.filter(Category.type == type)
+        query = query.where(Category.type == type)
     
-    categories = query.order_by(Category.name).all()
+    categories = (await db.execute(query.order_by(Category.name))).scalars().all()
     return categories
 
 
 @router.post("/", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
 async def create_category(
     category_data: CategoryCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a custom category"""
     
     # Check if category with same name exists for this user
-    existing = db.query(Category).filter(
+    existing = (await db.execute(select(Category).where(
         Category.user_id == current_user.id,
         Category.name == category_data.name,
         Category.type == category_data.type
-    ).first()
+    ))).scalars().first()
     
     if existing:
         raise HTTPException(
@@ -67,8 +68,10 @@ async def create_category(
     )
     
     db.add(new_category)
-    db.commit()
-    db.refresh(new_category)
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+    await db.refresh(new_category)
     
     return new_category
 
@@ -77,15 +80,15 @@ async def create_category(
 async def update_category(
     category_id: int,
     category_data: CategoryUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a custom category (only user's own categories)"""
     
-    category = db.query(Category).filter(
+    category = (await db.execute(select(Category).where(
         Category.id == category_id,
         Category.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not category:
         raise HTTPException(
@@ -103,8 +106,10 @@ async def update_category(
     if category_data.is_active is not None:
         category.is_active = category_data.is_active
     
-    db.commit()
-    db.refresh(category)
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+    await db.refresh(category)
     
     return category
 
@@ -112,15 +117,15 @@ async def update_category(
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_category(
     category_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a custom category (soft delete)"""
     
-    category = db.query(Category).filter(
+    category = (await db.execute(select(Category).where(
         Category.id == category_id,
         Category.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not category:
         raise HTTPException(
@@ -129,6 +134,8 @@ async def delete_category(
         )
     
     category.is_active = False
-    db.commit()
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
     
     return None
@@ -3,16 +3,19 @@ Chatbot API Router
 Endpoints for Dify Cloud integration
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Optional
 
-from app.database import get_db
+from app.database import session_router
 from app.config import settings
-from app.services.chatbot_service import ChatbotService, ALLOWED_VIEWS
+from app.cache import response_cache
+from app.services.bi_refresh_service import MATERIALIZED_VIEWS, bi_view, data_as_of
+from app.services.chatbot_service import ChatbotService, ALLOWED_VIEWS, ANSWER_CACHE_ENDPOINT
 from app.schemas.chatbot import (
     ChatbotQueryRequest,
     ChatbotQueryResponse,
+    ChatbotBatchQueryRequest,
+    ChatbotBatchQueryResponse,
     ChatbotHealthResponse,
     QueryResultResponse
 )
@@ -53,8 +56,7 @@ async def chatbot_health():
 @router.post("/query", response_model=ChatbotQueryResponse)
 async def chatbot_query(
     request: ChatbotQueryRequest,
-    service_key: str = Depends(verify_dify_service_key),
-    db: Session = Depends(get_db)
+    service_key: str = Depends(verify_dify_service_key)
 ):
     """
     Main chatbot query endpoint.
@@ -91,12 +93,13 @@ async def chatbot_query(
     - "Recent transactions"
     """
     try:
-        service = ChatbotService(db)
-        result = service.process_query(
-            user_id=request.user_id,
-            question=request.question,
-            timezone=request.timezone
-        )
+        async with session_router.reader(request.user_id) as db:
+            service = ChatbotService(db)
+            result = await service.process_query(
+                user_id=request.user_id,
+                question=request.question,
+                timezone=request.timezone
+            )
         
         return ChatbotQueryResponse(
             answer=result["answer"],
@@ -112,12 +115,37 @@ async def chatbot_query(
         )
 
 
+@router.post("/query/batch", response_model=ChatbotBatchQueryResponse)
+async def chatbot_query_batch(
+    request: ChatbotBatchQueryRequest,
+    service_key: str = Depends(verify_dify_service_key)
+):
+    """
+    Answer several questions of one user in a single call.
+    
+    Useful when a Dify agent needs expense, budget and balance in one turn.
+    Questions that resolve to the same intent and period are answered
+    once; the remaining answers are computed concurrently and returned in
+    the order the questions were asked.
+    """
+    try:
+        service = ChatbotService()
+        answers = await service.process_batch(request.user_id, request.questions)
+        
+        return ChatbotBatchQueryResponse(answers=answers)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing batch query: {str(e)}"
+        )
+
+
 @router.post("/query/result", response_model=QueryResultResponse)
 async def chatbot_query_result(
     request: ChatbotQueryRequest,
-    query_type: str = Query(..., description="Type of query: expense, income, category, budget, wallet, transactions"),
-    service_key: str = Depends(verify_dify_service_key),
-    db: Session = Depends(get_db)
+    query_type: str = Query(..., description="Type of query: expense, income, category, budget, wallet, transactions, kpi"),
+    service_key: str = Depends(verify_dify_service_key)
 ):
     """
     Returns structured query results (rows) for Dify to format.
@@ -132,40 +160,53 @@ async def chatbot_query_result(
     - `budget`: Budget vs actual status
     - `wallet`: Wallet balances
     - `transactions`: Recent transactions
+    - `kpi`: Month-to-date KPIs; `metadata.data_as_of` is set when
+      served from the materialized view
     """
     try:
-        service = ChatbotService(db)
-        time_context = service.extract_time_context(request.question)
-        year = time_context["year"]
-        month = time_context["month"]
+        async with session_router.reader(request.user_id) as db:
+            service = ChatbotService(db)
+            time_context = service.extract_time_context(request.question)
+            year = time_context["year"]
+            month = time_context["month"]
         
-        rows = []
-        metadata = {"user_id": request.user_id, "year": year, "month": month}
+            rows = []
+            metadata = {"user_id": request.user_id, "year": year, "month": month}
         
-        if query_type == "expense" or query_type == "income":
-            data = service.query_income_vs_expense(request.user_id, year, month)
-            rows = [data]
+            if query_type == "expense" or query_type == "income":
+                data = await service.query_income_vs_expense(request.user_id, year, month)
+                rows = [data]
             
-        elif query_type == "category":
-            rows = service.query_category_breakdown(request.user_id, year, month)
+            elif query_type == "category":
+                rows = await service.query_category_breakdown(request.user_id, year, month)
             
-        elif query_type == "budget":
-            rows = service.query_budget_status(request.user_id, year, month)
+            elif query_type == "budget":
+                rows = await service.query_budget_status(request.user_id, year, month)
             
-        elif query_type == "wallet":
-            rows = service.query_wallet_balance(request.user_id)
-            metadata = {"user_id": request.user_id}
+            elif query_type == "wallet":
+                rows = await service.query_wallet_balance(request.user_id)
+                metadata = {"user_id": request.user_id}
             
-        elif query_type == "transactions":
-            rows = service.query_recent_transactions(request.user_id, limit=20)
-            metadata = {"user_id": request.user_id, "limit": 20}
+            elif query_type == "transactions":
+                rows = await service.query_recent_transactions(request.user_id, limit=20)
+                metadata = {"user_id": request.user_id, "limit": 20}
             
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unknown query_type: {query_type}. Supported: expense, income, category, budget, wallet, transactions"
-            )
+            elif query_type == "kpi":
+                data = await service.query_kpi_summary(request.user_id)
+                rows = [data] if data else []
+                metadata = {
+                    "user_id": request.user_id,
+                    "source": bi_view("v_kpi_summary"),
+                    "data_as_of": await data_as_of(db, "v_kpi_summary")
+                }
+            
+            else:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown query_type: {query_type}. Supported: expense, income, category, budget, wallet, transactions, kpi"
+                )
         
+
         return QueryResultResponse(
             query_type=query_type,
             rows=rows,
@@ -182,6 +223,21 @@ async def chatbot_query_result(
         )
 
 
+@router.get("/cache/stats")
+async def get_answer_cache_stats(
+    service_key: str = Depends(verify_dify_service_key)
+):
+    """
+    Hit ratio of the chatbot answer cache.
+    
+    Answers are cached per (user_id, intent, period), so paraphrased and
+    retried questions are served without re-querying the BI views. A
+    user's entries are dropped when their transactions, budgets, wallets
+    or categories change.
+    """
+    return response_cache.describe_endpoint(ANSWER_CACHE_ENDPOINT)
+
+
 @router.get("/views")
 async def get_available_views():
     """
@@ -191,6 +247,7 @@ async def get_available_views():
     return {
         "allowed_views": ALLOWED_VIEWS,
         "total": len(ALLOWED_VIEWS),
+        "analytics_views": {view: bi_view(view) for view in MATERIALIZED_VIEWS},
         "note": "Chatbot can only query these predefined views for security"
     }
 
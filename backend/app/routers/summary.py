@@ -1,17 +1,22 @@
 """
 Summary and analytics routes for dashboard
 """
-from typing import List, Optional
-from datetime import datetime, date
+from typing import List, Literal, Optional
+from datetime import datetime, date, timedelta
 from decimal import Decimal
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text, func
 from pydantic import BaseModel
-from app.database import get_db
-from app.models.user import User
+from app.cache import response_cache
+from app.config import settings
 from app.models.transaction import Transaction
-from app.utils.security import get_current_user
+from app.schemas.user import UserPrincipal
+from app.schemas.budget import BudgetStatus
+from app.schemas.wallet import WalletResponse
+from app.routers.budgets import cached_budget_status
+from app.routers.wallets import fetch_wallets
+from app.utils.security import get_current_user, get_user_read_db
 
 router = APIRouter(prefix="/api/summary", tags=["Summary"])
 
@@ -48,40 +53,72 @@ class DashboardSummary(BaseModel):
     transaction_count_this_month: int
 
 
-@router.get("/dashboard", response_model=DashboardSummary)
-async def get_dashboard_summary(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get dashboard summary for current month"""
-    
+class TimeseriesPoint(BaseModel):
+    """Totals of one group and type in one bucket"""
+    bucket: date
+    group_id: Optional[int] = None
+    group_name: str
+    type: str
+    total_amount: Decimal
+    transaction_count: int
+
+
+class TimeseriesSummary(BaseModel):
+    """Gap-filled series: every group with data in the range has a point in every bucket"""
+    start: date
+    end: date
+    granularity: str
+    group_by: str
+    source: str
+    points: List[TimeseriesPoint]
+
+
+class SummaryBundle(BaseModel):
+    """Several dashboard sections in one response; only requested sections are set"""
+    dashboard: Optional[DashboardSummary] = None
+    monthly: Optional[List[MonthlySummary]] = None
+    categories: Optional[List[CategorySummary]] = None
+    budgets: Optional[List[BudgetStatus]] = None
+    wallets: Optional[List[WalletResponse]] = None
+
+
+BUNDLE_SECTIONS = ("dashboard", "monthly", "categories", "budgets", "wallets")
+
+
+async def fetch_dashboard_summary(db: AsyncSession, user_id: int) -> DashboardSummary:
+    """Wallet total and current month figures of a user"""
     today = datetime.now()
     
-    # Get total wallet balance
+    # Get total wallet balance, including deltas not yet compacted
     balance_query = text("""
-        SELECT COALESCE(SUM(balance), 0) as total_balance
-        FROM wallets
-        WHERE user_id = :user_id AND is_active = TRUE
+        SELECT COALESCE(SUM(w.balance + COALESCE(pending.delta, 0)), 0) as total_balance
+        FROM wallets w
+        LEFT JOIN LATERAL (
+            SELECT SUM(d.delta) AS delta
+            FROM wallet_balance_deltas d
+            WHERE d.wallet_id = w.id
+        ) pending ON TRUE
+        WHERE w.user_id = :user_id AND w.is_active = TRUE
     """)
-    balance_result = db.execute(balance_query, {"user_id": current_user.id}).fetchone()
+    balance_result = (await db.execute(balance_query, {"user_id": user_id})).fetchone()
     total_balance = Decimal(str(balance_result.total_balance or 0))
     
     # Get this month's summary
     summary_query = text("""
         SELECT 
-            COALESCE(SUM(CASE WHEN type = 'income' THEN amount END), 0) as total_income,
-            COALESCE(SUM(CASE WHEN type = 'expense' THEN amount END), 0) as total_expense,
-            COUNT(*) as transaction_count
-        FROM transactions
+            COALESCE(SUM(CASE WHEN type = 'income' THEN total_amount END), 0) as total_income,
+            COALESCE(SUM(CASE WHEN type = 'expense' THEN total_amount END), 0) as total_expense,
+            COALESCE(SUM(transaction_count), 0)::BIGINT as transaction_count
+        FROM transaction_monthly_rollup
         WHERE user_id = :user_id
-          AND EXTRACT(YEAR FROM transaction_date) = :year
-          AND EXTRACT(MONTH FROM transaction_date) = :month
+          AND year = :year
+          AND month = :month
     """)
-    summary_result = db.execute(summary_query, {
-        "user_id": current_user.id,
+    summary_result = (await db.execute(summary_query, {
+        "user_id": user_id,
         "year": today.year,
         "month": today.month
-    }).fetchone()
+    })).fetchone()
     
     total_income = Decimal(str(summary_result.total_income or 0))
     total_expense = Decimal(str(summary_result.total_expense or 0))
@@ -98,28 +135,24 @@ async def get_dashboard_summary(
     )
 
 
-@router.get("/monthly", response_model=List[MonthlySummary])
-async def get_monthly_summary(
-    months: int = Query(default=6, le=12),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get monthly summary for the last N months"""
+async def fetch_monthly_summary(db: AsyncSession, user_id: int, months: int) -> List[MonthlySummary]:
+    """Per-month totals of a user for the last N months, newest first"""
+    # First month of the window, counted back from the current month
+    today = date.today()
+    first = today.year * 12 + today.month - 1 - (months - 1)
     
     query = text("""
         WITH monthly_data AS (
             SELECT 
-                EXTRACT(YEAR FROM transaction_date)::INTEGER AS year,
-                EXTRACT(MONTH FROM transaction_date)::INTEGER AS month,
-                COALESCE(SUM(CASE WHEN type = 'income' THEN amount END), 0) AS total_income,
-                COALESCE(SUM(CASE WHEN type = 'expense' THEN amount END), 0) AS total_expense,
-                COUNT(*) AS transaction_count
-            FROM transactions
+                year,
+                month,
+                COALESCE(SUM(CASE WHEN type = 'income' THEN total_amount END), 0) AS total_income,
+                COALESCE(SUM(CASE WHEN type = 'expense' THEN total_amount END), 0) AS total_expense,
+                SUM(transaction_count)::BIGINT AS transaction_count
+            FROM transaction_monthly_rollup
             WHERE user_id = :user_id
-              AND transaction_date >= DATE_TRUNC('month', CURRENT_DATE) - INTERVAL ':months months'
-            GROUP BY 
-                EXTRACT(YEAR FROM transaction_date),
-                EXTRACT(MONTH FROM transaction_date)
+              AND (year, month) >= (:from_year, :from_month)
+            GROUP BY year, month
         )
         SELECT 
             year,
@@ -135,9 +168,13 @@ async def get_monthly_summary(
             transaction_count
         FROM monthly_data
         ORDER BY year DESC, month DESC
-    """.replace(":months", str(months - 1)))
+    """)
     
-    result = db.execute(query, {"user_id": current_user.id})
+    result = await db.execute(query, {
+        "user_id": user_id,
+        "from_year": first // 12,
+        "from_month": first % 12 + 1
+    })
     
     summaries = []
     for row in result:
@@ -154,43 +191,37 @@ async def get_monthly_summary(
     return summaries
 
 
-@router.get("/categories", response_model=List[CategorySummary])
-async def get_category_summary(
-    type: str = Query(default="expense"),
-    month: int = Query(default=datetime.now().month),
-    year: int = Query(default=datetime.now().year),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Get spending/income by category for a specific month"""
-    
+async def fetch_category_summary(
+    db: AsyncSession, user_id: int, type: str, year: int, month: int
+) -> List[CategorySummary]:
+    """Totals per category of one type for a month"""
     query = text("""
         SELECT 
             c.id AS category_id,
             c.name AS category_name,
             c.icon AS category_icon,
             c.color AS category_color,
-            COALESCE(SUM(t.amount), 0) AS total_amount,
-            COUNT(t.id) AS transaction_count,
+            COALESCE(SUM(r.total_amount), 0) AS total_amount,
+            COALESCE(SUM(r.transaction_count), 0)::BIGINT AS transaction_count,
             ROUND(
-                COALESCE(SUM(t.amount), 0) * 100.0 / 
-                NULLIF(SUM(SUM(t.amount)) OVER (), 0)
+                COALESCE(SUM(r.total_amount), 0) * 100.0 / 
+                NULLIF(SUM(SUM(r.total_amount)) OVER (), 0)
             , 2) AS percentage
         FROM categories c
-        LEFT JOIN transactions t ON c.id = t.category_id
-            AND t.user_id = :user_id
-            AND EXTRACT(YEAR FROM t.transaction_date) = :year
-            AND EXTRACT(MONTH FROM t.transaction_date) = :month
+        LEFT JOIN transaction_monthly_rollup r ON c.id = r.category_id
+            AND r.user_id = :user_id
+            AND r.year = :year
+            AND r.month = :month
         WHERE c.type = :type
           AND c.is_active = TRUE
           AND (c.user_id IS NULL OR c.user_id = :user_id)
         GROUP BY c.id, c.name, c.icon, c.color
-        HAVING COALESCE(SUM(t.amount), 0) > 0
+        HAVING COALESCE(SUM(r.total_amount), 0) > 0
         ORDER BY total_amount DESC
     """)
     
-    result = db.execute(query, {
-        "user_id": current_user.id,
+    result = await db.execute(query, {
+        "user_id": user_id,
         "type": type,
         "year": year,
         "month": month
@@ -209,3 +240,308 @@ async def get_category_summary(
         ))
     
     return summaries
+
+
+Granularity = Literal["day", "week", "month", "quarter"]
+GroupBy = Literal["category", "wallet", "type"]
+
+# Bucket width for generate_series; DATE_TRUNC takes the granularity itself
+TIMESERIES_STEPS = {"day": "1 day", "week": "1 week", "month": "1 month", "quarter": "3 months"}
+
+# group_by -> (grouping column, join naming the group, name expression)
+TIMESERIES_GROUPS = {
+    "category": ("category_id", "LEFT JOIN categories n ON n.id = s.group_id", "n.name"),
+    "wallet": ("wallet_id", "LEFT JOIN wallets n ON n.id = s.group_id", "n.name"),
+    "type": ("NULL::INTEGER", "", "s.type"),
+}
+
+# Per-bucket totals. The rollup holds whole months per category and type
+TIMESERIES_SOURCES = {
+    "transactions": """
+        SELECT
+            DATE_TRUNC(:granularity, transaction_date::TIMESTAMP)::DATE AS bucket,
+            {group_column} AS group_id,
+            type,
+            SUM(amount) AS total_amount,
+            COUNT(*) AS transaction_count
+        FROM transactions
+        WHERE user_id = :user_id
+          AND transaction_date BETWEEN CAST(:start AS DATE) AND CAST(:end AS DATE)
+        GROUP BY 1, 2, 3
+    """,
+    "rollup": """
+        SELECT
+            DATE_TRUNC(:granularity, MAKE_DATE(year, month, 1)::TIMESTAMP)::DATE AS bucket,
+            {group_column} AS group_id,
+            type,
+            SUM(total_amount) AS total_amount,
+            SUM(transaction_count)::BIGINT AS transaction_count
+        FROM transaction_monthly_rollup
+        WHERE user_id = :user_id
+          AND (year, month) >= (:start_year, :start_month)
+          AND (year, month) <= (:end_year, :end_month)
+        GROUP BY 1, 2, 3
+    """,
+}
+
+TIMESERIES_QUERY = """
+    WITH buckets AS (
+        SELECT generate_series(
+            DATE_TRUNC(:granularity, CAST(:start AS DATE)::TIMESTAMP),
+            CAST(:end AS DATE)::TIMESTAMP,
+            CAST(:step AS INTERVAL)
+        )::DATE AS bucket
+    ), totals AS ({source}
+    ), series AS (
+        SELECT DISTINCT group_id, type FROM totals
+    )
+    SELECT
+        b.bucket,
+        s.group_id,
+        {group_name} AS group_name,
+        s.type,
+        COALESCE(t.total_amount, 0) AS total_amount,
+        COALESCE(t.transaction_count, 0)::BIGINT AS transaction_count
+    FROM series s
+    {group_join}
+    CROSS JOIN buckets b
+    LEFT JOIN totals t ON t.bucket = b.bucket
+        AND t.type = s.type
+        AND t.group_id IS NOT DISTINCT FROM s.group_id
+    ORDER BY b.bucket, s.type, group_name
+    LIMIT :limit
+"""
+
+
+def bucket_index(day: date, granularity: str) -> int:
+    """Ordinal of the bucket containing day; consecutive buckets differ by one"""
+    if granularity == "day":
+        return day.toordinal()
+    if granularity == "week":
+        # date(1, 1, 1) is a Monday, like DATE_TRUNC('week')
+        return (day.toordinal() - 1) // 7
+    if granularity == "month":
+        return day.year * 12 + day.month - 1
+    return day.year * 4 + (day.month - 1) // 3
+
+
+def timeseries_source(start: date, end: date, granularity: str, group_by: str) -> str:
+    """The rollup when it holds exactly the requested rows, otherwise transactions"""
+    whole_months = start.day == 1 and (end + timedelta(days=1)).day == 1
+    if granularity in ("month", "quarter") and group_by != "wallet" and whole_months:
+        return "rollup"
+    return "transactions"
+
+
+async def fetch_timeseries(
+    db: AsyncSession, user_id: int, start: date, end: date, granularity: str, group_by: str
+) -> TimeseriesSummary:
+    """
+    Totals per bucket, group and type between start and end (inclusive).
+    The SQL text depends only on the source and group_by, and every value
+    is a bound parameter, so each variant is one prepared statement.
+    """
+    max_points = settings.TIMESERIES_MAX_POINTS
+    buckets = bucket_index(end, granularity) - bucket_index(start, granularity) + 1
+    if buckets > max_points:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"{buckets} {granularity} buckets exceed the limit of {max_points} points; "
+                   f"narrow the range or use a coarser granularity"
+        )
+    
+    source = timeseries_source(start, end, granularity, group_by)
+    group_column, group_join, group_name = TIMESERIES_GROUPS[group_by]
+    query = text(TIMESERIES_QUERY.format(
+        source=TIMESERIES_SOURCES[source].format(group_column=group_column),
+        group_join=group_join,
+        group_name=group_name
+    ))
+    
+    result = await db.execute(query, {
+        "user_id": user_id,
+        "granularity": granularity,
+        "step": TIMESERIES_STEPS[granularity],
+        "start": start,
+        "end": end,
+        "start_year": start.year,
+        "start_month": start.month,
+        "end_year": end.year,
+        "end_month": end.month,
+        "limit": max_points + 1
+    })
+    rows = result.fetchall()
+    if len(rows) > max_points:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"More than {max_points} points ({buckets} buckets per {group_by}); "
+                   f"narrow the range, use a coarser granularity or group by type"
+        )
+    
+    return TimeseriesSummary(
+        start=start,
+        end=end,
+        granularity=granularity,
+        group_by=group_by,
+        source=source,
+        points=[
+            TimeseriesPoint(
+                bucket=row.bucket,
+                group_id=row.group_id,
+                group_name=row.group_name or "",
+                type=row.type,
+                total_amount=Decimal(str(row.total_amount)),
+                transaction_count=row.transaction_count
+            )
+            for row in rows
+        ]
+    )
+
+
+async def cached_dashboard_summary(db: AsyncSession, user_id: int) -> DashboardSummary:
+    return await response_cache.get_or_load(
+        user_id, "summary.dashboard", {"period": date.today().strftime("%Y-%m")},
+        lambda: fetch_dashboard_summary(db, user_id), DashboardSummary
+    )
+
+
+async def cached_monthly_summary(db: AsyncSession, user_id: int, months: int) -> List[MonthlySummary]:
+    return await response_cache.get_or_load(
+        user_id, "summary.monthly", {"period": date.today().strftime("%Y-%m"), "months": months},
+        lambda: fetch_monthly_summary(db, user_id, months), List[MonthlySummary]
+    )
+
+
+async def cached_category_summary(
+    db: AsyncSession, user_id: int, type: str, year: int, month: int
+) -> List[CategorySummary]:
+    return await response_cache.get_or_load(
+        user_id, "summary.categories", {"type": type, "year": year, "month": month},
+        lambda: fetch_category_summary(db, user_id, type, year, month), List[CategorySummary]
+    )
+
+
+async def cached_timeseries(
+    db: AsyncSession, user_id: int, start: date, end: date, granularity: str, group_by: str
+) -> TimeseriesSummary:
+    return await response_cache.get_or_load(
+        user_id, "summary.timeseries",
+        {"start": start.isoformat(), "end": end.isoformat(), "granularity": granularity, "group_by": group_by},
+        lambda: fetch_timeseries(db, user_id, start, end, granularity, group_by), TimeseriesSummary
+    )
+
+
+@router.get("/dashboard", response_model=DashboardSummary)
+async def get_dashboard_summary(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
+):
+    """Get dashboard summary for current month"""
+    return await cached_dashboard_summary(db, current_user.id)
+
+
+@router.get("/monthly", response_model=List[MonthlySummary])
+async def get_monthly_summary(
+    months: int = Query(default=6, le=12),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
+):
+    """Get monthly summary for the last N months"""
+    return await cached_monthly_summary(db, current_user.id, months)
+
+
+@router.get("/timeseries", response_model=TimeseriesSummary)
+async def get_timeseries(
+    start: Optional[date] = Query(default=None, description="First day (default: first day of the month 11 months ago)"),
+    end: Optional[date] = Query(default=None, description="Last day, inclusive (default: last day of this month)"),
+    granularity: Granularity = Query(default="month"),
+    group_by: GroupBy = Query(default="type"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
+):
+    """
+    Get income and expense totals per day, week (from Monday), month or
+    quarter over any date range, split by category, wallet or type.
+    
+    Buckets without transactions are returned with zero totals. Whole-month
+    ranges by category or type at month or quarter granularity are read
+    from the monthly rollup. At most TIMESERIES_MAX_POINTS points are
+    returned; larger requests are rejected with 400.
+    """
+    today = date.today()
+    if end is None:
+        end = (today.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+    if start is None:
+        first = today.year * 12 + today.month - 1 - 11
+        start = date(first // 12, first % 12 + 1, 1)
+    if start > end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start must not be after end"
+        )
+    
+    return await cached_timeseries(db, current_user.id, start, end, granularity, group_by)
+
+
+@router.get("/categories", response_model=List[CategorySummary])
+async def get_category_summary(
+    type: str = Query(default="expense"),
+    month: Optional[int] = Query(default=None, ge=1, le=12, description="Month 1-12 (default: current month)"),
+    year: Optional[int] = Query(default=None, description="Year (default: current year)"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
+):
+    """Get spending/income by category for a specific month"""
+    now = datetime.now()
+    year, month = year or now.year, month or now.month
+    return await cached_category_summary(db, current_user.id, type, year, month)
+
+
+@router.get("/bundle", response_model=SummaryBundle, response_model_exclude_unset=True)
+async def get_summary_bundle(
+    sections: str = Query(
+        default=",".join(BUNDLE_SECTIONS),
+        description="Comma-separated sections: dashboard, monthly, categories, budgets, wallets"
+    ),
+    months: int = Query(default=6, le=12),
+    type: str = Query(default="expense"),
+    month: Optional[int] = Query(default=None, ge=1, le=12, description="Month 1-12 (default: current month)"),
+    year: Optional[int] = Query(default=None, description="Year (default: current year)"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
+):
+    """
+    Get several dashboard sections in one request.
+    
+    The caller is authenticated once and every section runs on the same
+    connection, one after another. Each section has the same shape as its
+    standalone endpoint; `months` applies to monthly, `type` to categories
+    and `month`/`year` to categories and budgets.
+    """
+    
+    requested = [s.strip() for s in sections.split(",") if s.strip()]
+    unknown = [s for s in requested if s not in BUNDLE_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sections: {', '.join(unknown)}. Supported: {', '.join(BUNDLE_SECTIONS)}"
+        )
+    
+    now = datetime.now()
+    year, month = year or now.year, month or now.month
+    
+    user_id = current_user.id
+    bundle = SummaryBundle()
+    
+    if "dashboard" in requested:
+        bundle.dashboard = await cached_dashboard_summary(db, user_id)
+    if "monthly" in requested:
+        bundle.monthly = await cached_monthly_summary(db, user_id, months)
+    if "categories" in requested:
+        bundle.categories = await cached_category_summary(db, user_id, type, year, month)
+    if "budgets" in requested:
+        bundle.budgets = await cached_budget_status(db, user_id, year, month)
+    if "wallets" in requested:
+        bundle.wallets = [WalletResponse.model_validate(w) for w in await fetch_wallets(db, user_id)]
+    
+    return bundle
@@ -1,43 +1,102 @@
 """
 Transaction routes
 """
-from typing import List, Optional
+import tempfile
+from typing import List, Literal, Optional
 from datetime import date, datetime
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from app.database import get_db
-from app.models.user import User
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Select, desc, select, tuple_
+from app.cache import response_cache
+from app.database import get_async_db, session_router
 from app.models.wallet import Wallet
 from app.models.category import Category
 from app.models.transaction import Transaction
-from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionResponse
-from app.utils.security import get_current_user
+from app.schemas.user import UserPrincipal
+from app.schemas.transaction import (
+    TransactionCreate, TransactionUpdate, TransactionResponse, TransactionImportResult
+)
+from app.services.transaction_import import TransactionImporter
+from app.services.transaction_export import EXPORT_FORMATS, ENCODERS, parquet_available
+from app.utils.security import get_current_user, get_user_read_db
+from app.utils.pagination import encode_cursor, decode_cursor
 
 router = APIRouter(prefix="/api/transactions", tags=["Transactions"])
 
+# Uploads larger than this are spooled to disk while they stream in
+IMPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
 
-def transaction_to_response(transaction: Transaction) -> TransactionResponse:
-    """Convert transaction model to response with related data"""
-    return TransactionResponse(
-        id=transaction.id,
-        user_id=transaction.user_id,
-        wallet_id=transaction.wallet_id,
-        category_id=transaction.category_id,
-        type=transaction.type,
-        amount=transaction.amount,
-        description=transaction.description,
-        transaction_date=transaction.transaction_date,
-        created_at=transaction.created_at,
-        category_name=transaction.category.name if transaction.category else None,
-        category_icon=transaction.category.icon if transaction.category else None,
-        category_color=transaction.category.color if transaction.category else None,
-        wallet_name=transaction.wallet.name if transaction.wallet else None
+# Rows fetched per server-side cursor round trip during export
+EXPORT_CHUNK_SIZE = 2000
+
+
+def transaction_projection() -> Select:
+    """
+    Select transaction columns plus the joined category and wallet
+    fields, so responses are built from one statement without loading
+    ORM entities or their relationships.
+    """
+    return select(
+        Transaction.id,
+        Transaction.user_id,
+        Transaction.wallet_id,
+        Transaction.category_id,
+        Transaction.type,
+        Transaction.amount,
+        Transaction.description,
+        Transaction.transaction_date,
+        Transaction.created_at,
+        Category.name.label("category_name"),
+        Category.icon.label("category_icon"),
+        Category.color.label("category_color"),
+        Wallet.name.label("wallet_name")
+    ).outerjoin(
+        Category, Transaction.category_id == Category.id
+    ).outerjoin(
+        Wallet, Transaction.wallet_id == Wallet.id
     )
 
 
+def transaction_to_response(row) -> TransactionResponse:
+    """Convert a projected transaction row to response"""
+    return TransactionResponse(**row._mapping)
+
+
+def apply_transaction_filters(
+    query: Select,
+    type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    wallet_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Select:
+    """Apply the optional list/export filters to a transaction query"""
+    if type:
+        query = query.where(Transaction.type == type)
+    if category_id:
+        query = query.where(Transaction.category_id == category_id)
+    if wallet_id:
+        query = query.where(Transaction.wallet_id == wallet_id)
+    if start_date:
+        query = query.where(Transaction.transaction_date >= start_date)
+    if end_date:
+        query = query.where(Transaction.transaction_date <= end_date)
+    return query
+
+
+async def get_transaction_response(db: AsyncSession, transaction_id: int, user_id: int) -> Optional[TransactionResponse]:
+    """Fetch a single transaction of a user as a response"""
+    row = (await db.execute(transaction_projection().where(
+        Transaction.id == transaction_id,
+        Transaction.user_id == user_id
+    ))).first()
+    return transaction_to_response(row) if row else None
+
+
 @router.get("/", response_model=List[TransactionResponse])
 async def get_transactions(
+    response: Response,
     type: Optional[str] = None,
     category_id: Optional[int] = None,
     wallet_id: Optional[int] = None,
@@ -45,46 +104,106 @@ async def get_transactions(
     end_date: Optional[date] = None,
     limit: int = Query(default=50, le=100),
     offset: int = 0,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(default=None, description="Opaque cursor from X-Next-Cursor; replaces offset"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
 ):
-    """Get transactions with filters"""
+    """
+    Get transactions with filters.
     
-    query = db.query(Transaction).filter(
-        Transaction.user_id == current_user.id
+    Every full page sets the X-Next-Cursor header. Passing it back as
+    `cursor` resumes right after the last row with a seek predicate,
+    so deep pages cost the same as the first one.
+    """
+    
+    query = apply_transaction_filters(
+        transaction_projection().where(Transaction.user_id == current_user.id),
+        type, category_id, wallet_id, start_date, end_date
     )
     
-    if type:
-        query = query.filter(Transaction.type == type)
-    if category_id:
-        query = query.filter(Transaction.category_id == category_id)
-    if wallet_id:
-        query = query.filter(Transaction.wallet_id == wallet_id)
-    if start_date:
-        query = query.filter(Transaction.transaction_date >= start_date)
-    if end_date:
-        query = query.filter(Transaction.transaction_date <= end_date)
+    if cursor:
+        # Seek past the last row of the previous page instead of skipping rows
+        query = query.where(
+            tuple_(Transaction.transaction_date, Transaction.created_at, Transaction.id)
+            < tuple_(*decode_cursor(cursor))
+        )
+    else:
+        query = query.offset(offset)
     
-    transactions = query.order_by(
+    transactions = (await db.execute(query.order_by(
         desc(Transaction.transaction_date),
-        desc(Transaction.created_at)
-    ).offset(offset).limit(limit).all()
+        desc(Transaction.created_at),
+        desc(Transaction.id)
+    ).limit(limit))).all()
+    
+    if len(transactions) == limit:
+        last = transactions[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            last.transaction_date, last.created_at, last.id
+        )
     
     return [transaction_to_response(t) for t in transactions]
 
 
+@router.get("/export")
+async def export_transactions(
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    type: Optional[str] = None,
+    category_id: Optional[int] = None,
+    wallet_id: Optional[int] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Export the full (filtered) ledger as CSV, NDJSON or Parquet.
+    
+    Rows are read from a server-side cursor in fixed-size chunks and
+    streamed as they are encoded, so memory stays flat regardless of
+    history size. Each row carries the same fields as TransactionResponse.
+    """
+    
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export requires pyarrow to be installed"
+        )
+    
+    user_id = current_user.id
+    
+    async def iter_chunks():
+        # The request-scoped session is closed before a streaming body is
+        # sent, so the export owns a session for the cursor's lifetime.
+        async with session_router.reader(user_id) as db:
+            query = apply_transaction_filters(
+                transaction_projection().where(Transaction.user_id == user_id),
+                type, category_id, wallet_id, start_date, end_date
+            ).order_by(
+                desc(Transaction.transaction_date),
+                desc(Transaction.created_at),
+                desc(Transaction.id)
+            )
+            result = await db.stream(query.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+            async for partition in result.partitions():
+                yield partition
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        ENCODERS[format](iter_chunks()),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="transactions.{extension}"'}
+    )
+
+
 @router.get("/{transaction_id}", response_model=TransactionResponse)
 async def get_transaction(
     transaction_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
 ):
     """Get a specific transaction"""
     
-    transaction = db.query(Transaction).filter(
-        Transaction.id == transaction_id,
-        Transaction.user_id == current_user.id
-    ).first()
+    transaction = await get_transaction_response(db, transaction_id, current_user.id)
     
     if not transaction:
         raise HTTPException(
@@ -92,23 +211,23 @@ async def get_transaction(
             detail="Transaction not found"
         )
     
-    return transaction_to_response(transaction)
+    return transaction
 
 
 @router.post("/", response_model=TransactionResponse, status_code=status.HTTP_201_CREATED)
 async def create_transaction(
     transaction_data: TransactionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new transaction"""
     
     # Verify wallet belongs to user
-    wallet = db.query(Wallet).filter(
+    wallet = (await db.execute(select(Wallet).where(
         Wallet.id == transaction_data.wallet_id,
         Wallet.user_id == current_user.id,
         Wallet.is_active == True
-    ).first()
+    ))).scalars().first()
     
     if not wallet:
         raise HTTPException(
@@ -117,10 +236,10 @@ async def create_transaction(
         )
     
     # Verify category exists and is accessible
-    category = db.query(Category).filter(
+    category = (await db.execute(select(Category).where(
         Category.id == transaction_data.category_id,
         Category.is_active == True
-    ).first()
+    ))).scalars().first()
     
     if not category:
         raise HTTPException(
@@ -146,25 +265,76 @@ async def create_transaction(
     )
     
     db.add(new_transaction)
-    db.commit()
-    db.refresh(new_transaction)
+    await db.flush()
+    # Read the keys before commit expires the instances
+    transaction_id, user_id = new_transaction.id, new_transaction.user_id
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+    
+    return await get_transaction_response(db, transaction_id, user_id)
+
+
+@router.post("/bulk", response_model=TransactionImportResult)
+async def bulk_import_transactions(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(
+        default=None, description="Body format; inferred from Content-Type when omitted"
+    ),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import many transactions from a streamed CSV or NDJSON body.
+    
+    Each row has wallet_id, category_id, type, amount, description and
+    transaction_date (CSV needs a header row). Invalid rows are reported
+    with their row number and skipped; valid rows are loaded through COPY
+    and every wallet receives a single aggregated balance delta.
+    """
+    
+    if format is None:
+        content_type = request.headers.get("content-type", "")
+        if "csv" in content_type:
+            format = "csv"
+        elif "ndjson" in content_type or "jsonl" in content_type:
+            format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass ?format="
+            )
+    
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MAX_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        
+        importer = TransactionImporter(db, current_user.id)
+        if format == "csv":
+            records = importer.iter_csv(spool)
+        else:
+            records = importer.iter_ndjson(spool)
+        result = await importer.run(records)
     
-    return transaction_to_response(new_transaction)
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+    return result
 
 
 @router.put("/{transaction_id}", response_model=TransactionResponse)
 async def update_transaction(
     transaction_id: int,
     transaction_data: TransactionUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a transaction"""
     
-    transaction = db.query(Transaction).filter(
+    transaction = (await db.execute(select(Transaction).where(
         Transaction.id == transaction_id,
         Transaction.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not transaction:
         raise HTTPException(
@@ -174,11 +344,11 @@ async def update_transaction(
     
     # Verify new wallet if provided
     if transaction_data.wallet_id is not None:
-        wallet = db.query(Wallet).filter(
+        wallet = (await db.execute(select(Wallet).where(
             Wallet.id == transaction_data.wallet_id,
             Wallet.user_id == current_user.id,
             Wallet.is_active == True
-        ).first()
+        ))).scalars().first()
         if not wallet:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -188,10 +358,10 @@ async def update_transaction(
     
     # Verify new category if provided
     if transaction_data.category_id is not None:
-        category = db.query(Category).filter(
+        category = (await db.execute(select(Category).where(
             Category.id == transaction_data.category_id,
             Category.is_active == True
-        ).first()
+        ))).scalars().first()
         if not category:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -208,24 +378,26 @@ async def update_transaction(
     if transaction_data.transaction_date is not None:
         transaction.transaction_date = transaction_data.transaction_date
     
-    db.commit()
-    db.refresh(transaction)
+    user_id = transaction.user_id
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
     
-    return transaction_to_response(transaction)
+    return await get_transaction_response(db, transaction_id, user_id)
 
 
 @router.delete("/{transaction_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_transaction(
     transaction_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a transaction"""
     
-    transaction = db.query(Transaction).filter(
+    transaction = (await db.execute(select(Transaction).where(
         Transaction.id == transaction_id,
         Transaction.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not transaction:
         raise HTTPException(
@@ -233,7 +405,9 @@ async def delete_transaction(
             detail="Transaction not found"
         )
     
-    db.delete(transaction)
-    db.commit()
+    await db.delete(transaction)
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
     
     return None
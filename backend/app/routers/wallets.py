@@ -3,43 +3,47 @@ Wallet routes
 """
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.models.user import User
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.cache import response_cache
+from app.database import get_async_db, session_router
 from app.models.wallet import Wallet
+from app.schemas.user import UserPrincipal
 from app.schemas.wallet import WalletCreate, WalletUpdate, WalletResponse
-from app.utils.security import get_current_user
+from app.utils.security import get_current_user, get_user_read_db
 
 router = APIRouter(prefix="/api/wallets", tags=["Wallets"])
 
 
+async def fetch_wallets(db: AsyncSession, user_id: int) -> List[Wallet]:
+    """Active wallets of a user in creation order"""
+    return (await db.execute(select(Wallet).where(
+        Wallet.user_id == user_id,
+        Wallet.is_active == True
+    ).order_by(Wallet.created_at))).scalars().all()
+
+
 @router.get("/", response_model=List[WalletResponse])
 async def get_wallets(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
 ):
     """Get all wallets for current user"""
-    
-    wallets = db.query(Wallet).filter(
-        Wallet.user_id == current_user.id,
-        Wallet.is_active == True
-    ).order_by(Wallet.created_at).all()
-    
-    return wallets
+    return await fetch_wallets(db, current_user.id)
 
 
 @router.get("/{wallet_id}", response_model=WalletResponse)
 async def get_wallet(
     wallet_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_user_read_db)
 ):
     """Get a specific wallet"""
     
-    wallet = db.query(Wallet).filter(
+    wallet = (await db.execute(select(Wallet).where(
         Wallet.id == wallet_id,
         Wallet.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not wallet:
         raise HTTPException(
@@ -53,16 +57,16 @@ async def get_wallet(
 @router.post("/", response_model=WalletResponse, status_code=status.HTTP_201_CREATED)
 async def create_wallet(
     wallet_data: WalletCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new wallet"""
     
     # Check if wallet with same name exists
-    existing = db.query(Wallet).filter(
+    existing = (await db.execute(select(Wallet).where(
         Wallet.user_id == current_user.id,
         Wallet.name == wallet_data.name
-    ).first()
+    ))).scalars().first()
     
     if existing:
         raise HTTPException(
@@ -74,13 +78,16 @@ async def create_wallet(
         user_id=current_user.id,
         name=wallet_data.name,
         balance=wallet_data.initial_balance,
+        opening_balance=wallet_data.initial_balance,
         currency=wallet_data.currency,
         icon=wallet_data.icon
     )
     
     db.add(new_wallet)
-    db.commit()
-    db.refresh(new_wallet)
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+    await db.refresh(new_wallet)
     
     return new_wallet
 
@@ -89,15 +96,15 @@ async def create_wallet(
 async def update_wallet(
     wallet_id: int,
     wallet_data: WalletUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a wallet"""
     
-    wallet = db.query(Wallet).filter(
+    wallet = (await db.execute(select(Wallet).where(
         Wallet.id == wallet_id,
         Wallet.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not wallet:
         raise HTTPException(
@@ -107,11 +114,11 @@ async def update_wallet(
     
     if wallet_data.name is not None:
         # Check for duplicate name
-        existing = db.query(Wallet).filter(
+        existing = (await db.execute(select(Wallet).where(
             Wallet.user_id == current_user.id,
             Wallet.name == wallet_data.name,
             Wallet.id != wallet_id
-        ).first()
+        ))).scalars().first()
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -124,8 +131,10 @@ async def update_wallet(
     if wallet_data.is_active is not None:
         wallet.is_active = wallet_data.is_active
     
-    db.commit()
-    db.refresh(wallet)
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
+    await db.refresh(wallet)
     
     return wallet
 
@@ -133,15 +142,15 @@ async def update_wallet(
 @router.delete("/{wallet_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_wallet(
     wallet_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a wallet (soft delete)"""
     
-    wallet = db.query(Wallet).filter(
+    wallet = (await db.execute(select(Wallet).where(
         Wallet.id == wallet_id,
         Wallet.user_id == current_user.id
-    ).first()
+    ))).scalars().first()
     
     if not wallet:
         raise HTTPException(
@@ -150,6 +159,8 @@ async def delete_wallet(
         )
     
     wallet.is_active = False
-    db.commit()
+    await db.commit()
+    session_router.record_write(current_user.id)
+    await response_cache.invalidate_user(current_user.id)
     
     return None
@@ -2,7 +2,7 @@
 Pydantic schemas for request/response validation
 """
 from app.schemas.user import (
-    UserCreate, UserLogin, UserResponse, Token, TokenData
+    UserCreate, UserLogin, UserResponse, Token, TokenData, UserPrincipal
 )
 from app.schemas.category import (
     CategoryCreate, CategoryUpdate, CategoryResponse
@@ -11,7 +11,8 @@ from app.schemas.wallet import (
     WalletCreate, WalletUpdate, WalletResponse
 )
 from app.schemas.transaction import (
-    TransactionCreate, TransactionUpdate, TransactionResponse
+    TransactionCreate, TransactionUpdate, TransactionResponse,
+    TransactionImportError, TransactionImportResult
 )
 from app.schemas.budget import (
     BudgetCreate, BudgetUpdate, BudgetResponse, BudgetStatus
@@ -21,16 +22,19 @@ from app.schemas.bill import (
 )
 from app.schemas.chatbot import (
     ChatbotQueryRequest, ChatbotQueryResponse, 
+    ChatbotBatchQueryRequest, ChatbotBatchAnswer, ChatbotBatchQueryResponse,
     ChatbotHealthResponse, QueryResultResponse
 )
 
 __all__ = [
-    "UserCreate", "UserLogin", "UserResponse", "Token", "TokenData",
+    "UserCreate", "UserLogin", "UserResponse", "Token", "TokenData", "UserPrincipal",
     "CategoryCreate", "CategoryUpdate", "CategoryResponse",
     "WalletCreate", "WalletUpdate", "WalletResponse",
     "TransactionCreate", "TransactionUpdate", "TransactionResponse",
+    "TransactionImportError", "TransactionImportResult",
     "BudgetCreate", "BudgetUpdate", "BudgetResponse", "BudgetStatus",
     "BillCreate", "BillUpdate", "BillResponse", "UpcomingBillResponse",
     "ChatbotQueryRequest", "ChatbotQueryResponse", 
+    "ChatbotBatchQueryRequest", "ChatbotBatchAnswer", "ChatbotBatchQueryResponse",
     "ChatbotHealthResponse", "QueryResultResponse"
 ]
@@ -48,6 +48,37 @@ class ChatbotQueryResponse(BaseModel):
         }
 
 
+class ChatbotBatchQueryRequest(BaseModel):
+    """Request schema for answering several questions of one user at once"""
+    user_id: int = Field(..., description="User ID to filter data")
+    questions: List[str] = Field(..., min_length=1, max_length=10, description="Questions, answered in order")
+    timezone: str = Field(default="Asia/Bangkok", description="User's timezone")
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "user_id": 1,
+                "questions": [
+                    "Tổng chi tiêu tháng này là bao nhiêu?",
+                    "Kiểm tra ngân sách",
+                    "Số dư trong ví"
+                ],
+                "timezone": "Asia/Bangkok"
+            }
+        }
+
+
+class ChatbotBatchAnswer(ChatbotQueryResponse):
+    """One answer of a batch query"""
+    question: str = Field(..., description="The question as asked")
+    intent: str = Field(..., description="Detected intent")
+
+
+class ChatbotBatchQueryResponse(BaseModel):
+    """Response schema for batch chatbot queries"""
+    answers: List[ChatbotBatchAnswer] = Field(..., description="Answers in the order of the questions")
+
+
 class ChatbotHealthResponse(BaseModel):
     """Response schema for health check endpoint"""
     status: str = Field(..., description="Service status")
@@ -3,7 +3,7 @@ Transaction schemas
 """
 from pydantic import BaseModel, field_validator
 from datetime import date, datetime
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from decimal import Decimal
 
 
@@ -60,3 +60,16 @@ class TransactionResponse(TransactionBase):
     
     class Config:
         from_attributes = True
+
+
+class TransactionImportError(BaseModel):
+    """Schema for a rejected row of a bulk import"""
+    row: int
+    error: str
+
+
+class TransactionImportResult(BaseModel):
+    """Schema for bulk import result"""
+    inserted: int
+    failed: int
+    errors: List[TransactionImportError] = []
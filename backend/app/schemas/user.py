@@ -41,3 +41,16 @@ class TokenData(BaseModel):
     """Schema for decoded token data"""
     user_id: Optional[int] = None
     email: Optional[str] = None
+    exp: Optional[int] = None
+
+
+class UserPrincipal(BaseModel):
+    """Authenticated user resolved from a token; what route handlers receive"""
+    id: int
+    email: str
+    full_name: str
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+        frozen = True
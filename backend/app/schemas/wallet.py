@@ -1,7 +1,7 @@
 """
 Wallet schemas
 """
-from pydantic import BaseModel
+from pydantic import AliasChoices, BaseModel, Field
 from datetime import datetime
 from typing import Optional
 from decimal import Decimal
@@ -30,7 +30,8 @@ class WalletResponse(WalletBase):
     """Schema for wallet response"""
     id: int
     user_id: int
-    balance: Decimal
+    # Read from Wallet.current_balance, which includes pending ledger deltas
+    balance: Decimal = Field(validation_alias=AliasChoices("current_balance", "balance"))
     is_active: bool
     created_at: datetime
     
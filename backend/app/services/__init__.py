@@ -2,5 +2,6 @@
 Services module
 """
 from app.services.chatbot_service import ChatbotService
+from app.services.transaction_import import TransactionImporter
 
-__all__ = ["ChatbotService"]
+__all__ = ["ChatbotService", "TransactionImporter"]
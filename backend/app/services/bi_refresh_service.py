@@ -0,0 +1,140 @@
+"""
+BI Refresh Service
+Keeps the mv_* copies of the heavy Phase 3 views current and resolves
+which copy (live or materialized) readers should query.
+
+Usage (from backend/):
+    python -m app.services.bi_refresh_service refresh [--force]
+    python -m app.services.bi_refresh_service status
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Live view -> materialized copy (database/06-bi-materialized.sql)
+MATERIALIZED_VIEWS = {
+    "v_kpi_summary": "mv_kpi_summary",
+    "v_user_financial_health": "mv_user_financial_health",
+    "v_expense_forecast": "mv_expense_forecast",
+    "v_category_growth": "mv_category_growth",
+    "v_monthly_cashflow": "mv_monthly_cashflow",
+}
+
+
+def bi_view(live_view: str) -> str:
+    """The relation to read for live_view under BI_VIEW_SOURCE"""
+    if settings.BI_VIEW_SOURCE == "materialized":
+        return MATERIALIZED_VIEWS.get(live_view, live_view)
+    return live_view
+
+
+async def refresh_views(db: AsyncSession, force: bool = False) -> Dict[str, bool]:
+    """
+    Refresh every materialized view whose sources changed since its last
+    refresh, each in its own transaction so one slow view does not hold
+    the others' locks. Returns view -> whether it was refreshed.
+    Must run on the primary.
+    """
+    refreshed = {}
+    for view in MATERIALIZED_VIEWS.values():
+        refreshed[view] = bool((await db.execute(
+            text("SELECT refresh_bi_materialized_view(:view, :force)"),
+            {"view": view, "force": force}
+        )).scalar())
+        await db.commit()
+    return refreshed
+
+
+async def view_freshness(db: AsyncSession) -> List[Dict[str, Any]]:
+    """Last refresh time and staleness of every materialized view"""
+    result = await db.execute(text("SELECT * FROM v_bi_freshness ORDER BY view_name"))
+    return [dict(row._mapping) for row in result]
+
+
+async def data_as_of(db: AsyncSession, live_view: str) -> Optional[Any]:
+    """
+    When the rows read for live_view were computed: the last refresh of
+    its materialized copy, or None when it is read live.
+    """
+    view = bi_view(live_view)
+    if view == live_view:
+        return None
+    return (await db.execute(
+        text("SELECT refreshed_at FROM bi_materialized_views WHERE view_name = :view"),
+        {"view": view}
+    )).scalar()
+
+
+class RefreshScheduler:
+    """
+    Background task refreshing stale views every
+    BI_REFRESH_INTERVAL_SECONDS. Several workers may run one each; the
+    advisory lock in refresh_bi_materialized_view keeps them from
+    refreshing the same view twice.
+    """
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        from app.database import session_router
+
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with session_router.writer() as db:
+                    refreshed = await refresh_views(db)
+                logger.info("Refreshed BI views: %s", [view for view, done in refreshed.items() if done])
+            except Exception:
+                logger.exception("BI view refresh failed")
+
+
+refresh_scheduler = RefreshScheduler(settings.BI_REFRESH_INTERVAL_SECONDS)
+
+
+async def _run(command: str, force: bool) -> int:
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        if command == "refresh":
+            for view, refreshed in (await refresh_views(db, force)).items():
+                print(f"{view}: {'refreshed' if refreshed else 'up to date'}")
+            return 0
+
+        for row in await view_freshness(db):
+            print(row)
+        return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Refresh the materialized BI views")
+    parser.add_argument("command", choices=["refresh", "status"])
+    parser.add_argument("--force", action="store_true", help="Refresh even views whose sources are unchanged")
+    args = parser.parse_args(argv)
+    return asyncio.run(_run(args.command, args.force))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Budget Service
+Evaluates budgets of one period against actual spending. Each budget
+row looks up its own (user, year, month, category) group in the monthly
+rollup through a LATERAL subquery, so the cost depends on the budgets
+being evaluated, not on the size of the transactions table.
+"""
+from typing import Any, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+
+BUDGET_EVALUATION_SQL = """
+    SELECT
+        b.id,
+        b.user_id,
+        u.email AS user_email,
+        u.full_name AS user_name,
+        b.category_id,
+        c.name AS category_name,
+        c.icon AS category_icon,
+        c.color AS category_color,
+        b.amount AS budget_amount,
+        s.actual_spent,
+        b.amount - s.actual_spent AS remaining,
+        ROUND(s.actual_spent * 100.0 / NULLIF(b.amount, 0), 2) AS usage_percentage,
+        CASE
+            WHEN s.actual_spent >= b.amount THEN 'exceeded'
+            WHEN s.actual_spent >= b.amount * 0.8 THEN 'warning'
+            ELSE 'safe'
+        END AS status,
+        b.month,
+        b.year
+    FROM budgets b
+    JOIN categories c ON c.id = b.category_id
+    JOIN users u ON u.id = b.user_id
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(SUM(r.total_amount), 0) AS actual_spent
+        FROM transaction_monthly_rollup r
+        WHERE r.user_id = b.user_id
+          AND r.year = b.year
+          AND r.month = b.month
+          AND r.category_id = b.category_id
+          AND r.type = 'expense'
+    ) s
+    WHERE b.year = :year
+      AND b.month = :month
+"""
+
+
+async def evaluate_budgets(
+    db: AsyncSession,
+    year: int,
+    month: int,
+    user_id: Optional[int] = None,
+    exceeded_only: bool = False
+) -> List[Any]:
+    """
+    Budgets of a period with actual spending, usage and status.
+
+    Args:
+        user_id: Restrict to one user (uses idx_budgets_user_period); all users when None
+        exceeded_only: Only budgets whose spending is above the budgeted amount
+
+    Returns:
+        Rows ordered by user, then usage percentage (highest first)
+    """
+    sql = BUDGET_EVALUATION_SQL
+    params = {"year": year, "month": month}
+
+    if user_id is not None:
+        sql += "      AND b.user_id = :user_id\n"
+        params["user_id"] = user_id
+    if exceeded_only:
+        sql += "      AND s.actual_spent > b.amount\n"
+    sql += "    ORDER BY b.user_id, usage_percentage DESC NULLS LAST"
+
+    return (await db.execute(text(sql), params)).fetchall()
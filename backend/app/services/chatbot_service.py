@@ -3,11 +3,18 @@ Chatbot Service
 Handles intent detection, safe query execution, and response generation
 for Dify Cloud integration
 """
-import re
+import asyncio
+import json
 from datetime import datetime, date
 from typing import Optional, Tuple, List, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
+from app.cache import response_cache
+from app.config import settings
+from app.database import session_router
+from app.services.bi_refresh_service import bi_view
+from app.services.budget_service import evaluate_budgets
+from app.services.intent_engine import IntentEngine
 
 
 # =============================================================================
@@ -20,7 +27,8 @@ ALLOWED_VIEWS = [
     "v_budget_vs_actual",
     "v_wallet_balance",
     "v_recent_transactions",
-    "v_daily_summary"
+    "v_daily_summary",
+    "v_kpi_summary"
 ]
 
 
@@ -43,6 +51,7 @@ INTENT_PATTERNS = {
         r"earnings?\s*total",
         r"bao\s*nhiêu\s*tiền\s*(đã\s*)?(nhận|thu)",
         r"đã\s*(nhận|thu)\s*bao\s*nhiêu",
+        r"thu\s*nhập\s*(tháng|năm)",
     ],
     "category_breakdown": [
         r"chi\s*tiêu\s*(theo|từng)\s*danh\s*mục",
@@ -54,8 +63,10 @@ INTENT_PATTERNS = {
     ],
     "monthly_trend": [
         r"xu\s*hướng\s*(hàng\s*)?tháng",
+        r"xu\s*hướng\s*chi\s*tiêu",
         r"so\s*sánh\s*(các\s*)?tháng",
         r"monthly\s*trend",
+        r"monthly\s*(spending|expense|income)\s*trend",
         r"trend\s*analysis",
         r"biến\s*động\s*(theo\s*)?tháng",
         r"tháng\s*này\s*so\s*(với\s*)?tháng\s*trước",
@@ -141,10 +152,24 @@ TIME_PATTERNS = {
 }
 
 
+# Compiled once at import; shared by every request
+intent_engine = IntentEngine(INTENT_PATTERNS, TIME_PATTERNS)
+
+# Questions classified per intent, exported by /metrics
+intent_counts: Dict[str, int] = {}
+
+# Answers are cached per (user, intent, period) under this endpoint name
+ANSWER_CACHE_ENDPOINT = "chatbot.answer"
+
+# Intents answered for one month
+PERIOD_INTENTS = {"total_expense", "total_income", "category_breakdown", "budget_status", "income_vs_expense"}
+
+
 class ChatbotService:
     """Service class for chatbot operations"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Optional[AsyncSession] = None):
+        # process_batch opens its own sessions and needs no db here
         self.db = db
         
     def detect_intent(self, question: str) -> Tuple[str, float]:
@@ -152,22 +177,20 @@ class ChatbotService:
         Detect the user's intent from their question
         Returns: (intent_name, confidence_score)
         """
-        question_lower = question.lower().strip()
-        
-        for intent, patterns in INTENT_PATTERNS.items():
-            for pattern in patterns:
-                if re.search(pattern, question_lower):
-                    return intent, 0.9
-        
-        # Default fallback
-        return "unknown", 0.0
+        intent, confidence = intent_engine.classify(question)
+        intent_counts[intent] = intent_counts.get(intent, 0) + 1
+        return intent, confidence
+    
+    def rank_intents(self, question: str) -> List[Tuple[str, float]]:
+        """All matching intents with their confidence, best first"""
+        return intent_engine.rank(question)
     
     def extract_time_context(self, question: str) -> Dict[str, Any]:
         """
         Extract time context from the question
         Returns dict with year, month, date_range, etc.
         """
-        question_lower = question.lower()
+        hits = intent_engine.time_hits(question)
         now = datetime.now()
         
         context = {
@@ -177,54 +200,44 @@ class ChatbotService:
             "specified": False,
         }
         
-        # Check for "this month"
-        for pattern in TIME_PATTERNS["this_month"]:
-            if re.search(pattern, question_lower):
-                context["time_type"] = "this_month"
-                context["specified"] = True
-                return context
-        
-        # Check for "last month"
-        for pattern in TIME_PATTERNS["last_month"]:
-            if re.search(pattern, question_lower):
-                if now.month == 1:
-                    context["year"] = now.year - 1
-                    context["month"] = 12
-                else:
-                    context["month"] = now.month - 1
-                context["time_type"] = "last_month"
-                context["specified"] = True
-                return context
-        
-        # Check for specific month number (e.g., "tháng 5")
-        for pattern in TIME_PATTERNS["specific_month"]:
-            match = re.search(pattern, question_lower)
-            if match:
-                month_num = int(match.group(1))
-                if 1 <= month_num <= 12:
-                    context["month"] = month_num
-                    context["time_type"] = "specific_month"
-                    context["specified"] = True
-                    return context
-        
-        # Check for today
-        for pattern in TIME_PATTERNS["today"]:
-            if re.search(pattern, question_lower):
-                context["time_type"] = "today"
-                context["date"] = now.date()
-                context["specified"] = True
-                return context
-        
-        # Check for this year
-        for pattern in TIME_PATTERNS["this_year"]:
-            if re.search(pattern, question_lower):
-                context["time_type"] = "this_year"
-                context["specified"] = True
-                return context
+        specific_months = [m for m in hits.get("specific_month", []) if 1 <= int(m.group(1)) <= 12]
+        
+        # Most explicit expression wins, independent of where it appears
+        if "this_month" in hits:
+            context["time_type"] = "this_month"
+            context["specified"] = True
+        
+        elif "last_month" in hits:
+            if now.month == 1:
+                context["year"] = now.year - 1
+                context["month"] = 12
+            else:
+                context["month"] = now.month - 1
+            context["time_type"] = "last_month"
+            context["specified"] = True
+        
+        elif specific_months:
+            # e.g. "tháng 5", "month 5" or "5/2024"; a "m/yyyy" form also sets the year
+            with_year = [m for m in specific_months if m.lastindex == 2]
+            match = with_year[0] if with_year else specific_months[0]
+            context["month"] = int(match.group(1))
+            if match.lastindex == 2:
+                context["year"] = int(match.group(2))
+            context["time_type"] = "specific_month"
+            context["specified"] = True
+        
+        elif "today" in hits:
+            context["time_type"] = "today"
+            context["date"] = now.date()
+            context["specified"] = True
+        
+        elif "this_year" in hits:
+            context["time_type"] = "this_year"
+            context["specified"] = True
         
         return context
     
-    def query_income_vs_expense(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
+    async def query_income_vs_expense(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
         """Query income vs expense for a specific month"""
         query = text("""
             SELECT 
@@ -238,11 +251,11 @@ class ChatbotService:
               AND month = :month
         """)
         
-        result = self.db.execute(query, {
+        result = (await self.db.execute(query, {
             "user_id": user_id,
             "year": year,
             "month": month
-        }).fetchone()
+        })).fetchone()
         
         if result:
             return {
@@ -262,7 +275,7 @@ class ChatbotService:
             "month": month,
         }
     
-    def query_category_breakdown(self, user_id: int, year: int, month: int, 
+    async def query_category_breakdown(self, user_id: int, year: int, month: int, 
                                   transaction_type: str = "expense") -> List[Dict[str, Any]]:
         """Query category breakdown for a specific month"""
         query = text("""
@@ -282,12 +295,12 @@ class ChatbotService:
             LIMIT 10
         """)
         
-        result = self.db.execute(query, {
+        result = (await self.db.execute(query, {
             "user_id": user_id,
             "year": year,
             "month": month,
             "type": transaction_type
-        }).fetchall()
+        })).fetchall()
         
         return [
             {
@@ -300,30 +313,9 @@ class ChatbotService:
             for row in result
         ]
     
-    def query_budget_status(self, user_id: int, year: int, month: int) -> List[Dict[str, Any]]:
+    async def query_budget_status(self, user_id: int, year: int, month: int) -> List[Dict[str, Any]]:
         """Query budget vs actual spending"""
-        query = text("""
-            SELECT 
-                category_name,
-                category_icon,
-                category_color,
-                budget_amount,
-                actual_spent,
-                remaining,
-                usage_percentage,
-                status
-            FROM v_budget_vs_actual
-            WHERE user_id = :user_id 
-              AND year = :year 
-              AND month = :month
-            ORDER BY usage_percentage DESC
-        """)
-        
-        result = self.db.execute(query, {
-            "user_id": user_id,
-            "year": year,
-            "month": month
-        }).fetchall()
+        result = await evaluate_budgets(self.db, year, month, user_id=user_id)
         
         return [
             {
@@ -337,7 +329,40 @@ class ChatbotService:
             for row in result
         ]
     
-    def query_wallet_balance(self, user_id: int) -> List[Dict[str, Any]]:
+    async def query_kpi_summary(self, user_id: int) -> Dict[str, Any]:
+        """Query month-to-date KPIs (live or materialized, per BI_VIEW_SOURCE)"""
+        query = text(f"""
+            SELECT 
+                mtd_income,
+                mtd_expense,
+                mtd_savings,
+                mtd_transactions,
+                budgets_on_track,
+                budgets_exceeded,
+                total_balance,
+                income_change_pct,
+                expense_change_pct
+            FROM {bi_view("v_kpi_summary")}
+            WHERE user_id = :user_id
+        """)
+        
+        result = (await self.db.execute(query, {"user_id": user_id})).fetchone()
+        
+        if result is None:
+            return {}
+        return {
+            "mtd_income": float(result.mtd_income),
+            "mtd_expense": float(result.mtd_expense),
+            "mtd_savings": float(result.mtd_savings),
+            "mtd_transactions": result.mtd_transactions,
+            "budgets_on_track": result.budgets_on_track,
+            "budgets_exceeded": result.budgets_exceeded,
+            "total_balance": float(result.total_balance),
+            "income_change_pct": float(result.income_change_pct),
+            "expense_change_pct": float(result.expense_change_pct),
+        }
+    
+    async def query_wallet_balance(self, user_id: int) -> List[Dict[str, Any]]:
         """Query wallet balances"""
         query = text("""
             SELECT 
@@ -353,7 +378,7 @@ class ChatbotService:
             ORDER BY current_balance DESC
         """)
         
-        result = self.db.execute(query, {"user_id": user_id}).fetchall()
+        result = (await self.db.execute(query, {"user_id": user_id})).fetchall()
         
         return [
             {
@@ -367,7 +392,7 @@ class ChatbotService:
             for row in result
         ]
     
-    def query_recent_transactions(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
+    async def query_recent_transactions(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """Query recent transactions"""
         query = text("""
             SELECT 
@@ -385,10 +410,10 @@ class ChatbotService:
             LIMIT :limit
         """)
         
-        result = self.db.execute(query, {
+        result = (await self.db.execute(query, {
             "user_id": user_id,
             "limit": limit
-        }).fetchall()
+        })).fetchall()
         
         return [
             {
@@ -403,7 +428,7 @@ class ChatbotService:
             for row in result
         ]
     
-    def query_monthly_summary(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
+    async def query_monthly_summary(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
         """Query monthly summary"""
         query = text("""
             SELECT 
@@ -418,11 +443,11 @@ class ChatbotService:
               AND month = :month
         """)
         
-        result = self.db.execute(query, {
+        result = (await self.db.execute(query, {
             "user_id": user_id,
             "year": year,
             "month": month
-        }).fetchall()
+        })).fetchall()
         
         summary = {
             "year": year,
@@ -447,7 +472,7 @@ class ChatbotService:
         
         return summary
     
-    def query_daily_summary(self, user_id: int, target_date: date) -> Dict[str, Any]:
+    async def query_daily_summary(self, user_id: int, target_date: date) -> Dict[str, Any]:
         """Query daily summary"""
         query = text("""
             SELECT 
@@ -459,10 +484,10 @@ class ChatbotService:
               AND transaction_date = :target_date
         """)
         
-        result = self.db.execute(query, {
+        result = (await self.db.execute(query, {
             "user_id": user_id,
             "target_date": target_date
-        }).fetchall()
+        })).fetchall()
         
         summary = {
             "date": target_date.strftime("%Y-%m-%d"),
@@ -492,7 +517,7 @@ class ChatbotService:
         """Get Vietnamese month name"""
         return f"tháng {month}"
     
-    def process_query(self, user_id: int, question: str, timezone: str = "Asia/Bangkok") -> Dict[str, Any]:
+    async def process_query(self, user_id: int, question: str, timezone: str = "Asia/Bangkok") -> Dict[str, Any]:
         """
         Main entry point - process a user question and return an answer
         """
@@ -501,44 +526,108 @@ class ChatbotService:
         
         # Extract time context
         time_context = self.extract_time_context(question)
+        
+        if intent == "unknown":
+            return await self._handle_unknown(question, time_context)
+        
+        return await self.cached_answer(user_id, intent, time_context)
+    
+    async def process_batch(self, user_id: int, questions: List[str]) -> List[Dict[str, Any]]:
+        """
+        Answer several questions of one user, in order.
+        
+        Questions resolving to the same (intent, period) are answered once.
+        The distinct answers run concurrently, each on its own read session
+        since a session cannot run statements concurrently, at most
+        CHATBOT_BATCH_CONCURRENCY at a time so one batch cannot drain the
+        pool shared with every other request.
+        """
+        resolved = []
+        distinct: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+        for question in questions:
+            intent, _ = self.detect_intent(question)
+            time_context = self.extract_time_context(question)
+            key = None
+            if intent != "unknown":
+                key = json.dumps(self.answer_cache_params(intent, time_context), sort_keys=True)
+                distinct.setdefault(key, (intent, time_context))
+            resolved.append((question, intent, time_context, key))
+        
+        sessions = asyncio.Semaphore(settings.CHATBOT_BATCH_CONCURRENCY)
+        
+        async def run(intent: str, time_context: Dict[str, Any]) -> Dict[str, Any]:
+            async with sessions, session_router.reader(user_id) as db:
+                return await ChatbotService(db).cached_answer(user_id, intent, time_context)
+        
+        answers = dict(zip(distinct, await asyncio.gather(
+            *(run(intent, time_context) for intent, time_context in distinct.values())
+        )))
+        
+        results = []
+        for question, intent, time_context, key in resolved:
+            result = answers[key] if key else await self._handle_unknown(question, time_context)
+            results.append({"question": question, "intent": intent, **result})
+        return results
+    
+    async def cached_answer(self, user_id: int, intent: str, time_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Answer a resolved question through the per-user answer cache"""
+        # Paraphrases that resolve to the same intent and period share an answer
+        return await response_cache.get_or_load(
+            user_id, ANSWER_CACHE_ENDPOINT, self.answer_cache_params(intent, time_context),
+            lambda: self.answer(user_id, intent, time_context), Dict[str, Any]
+        )
+    
+    @staticmethod
+    def answer_cache_params(intent: str, time_context: Dict[str, Any]) -> Dict[str, Any]:
+        """The parts of a resolved question that its answer depends on"""
+        params: Dict[str, Any] = {"intent": intent}
+        if intent in PERIOD_INTENTS:
+            params.update(year=time_context["year"], month=time_context["month"])
+        elif intent == "monthly_trend":
+            params["year"] = time_context["year"]
+        elif intent == "daily_summary":
+            params["date"] = time_context.get("date", datetime.now().date()).isoformat()
+        return params
+    
+    async def answer(self, user_id: int, intent: str, time_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the answer for a resolved intent and time context"""
         year = time_context["year"]
         month = time_context["month"]
         
-        # Process based on intent
         if intent == "total_expense":
-            return self._handle_total_expense(user_id, year, month)
+            return await self._handle_total_expense(user_id, year, month)
         
         elif intent == "total_income":
-            return self._handle_total_income(user_id, year, month)
+            return await self._handle_total_income(user_id, year, month)
         
         elif intent == "category_breakdown":
-            return self._handle_category_breakdown(user_id, year, month)
+            return await self._handle_category_breakdown(user_id, year, month)
         
         elif intent == "budget_status":
-            return self._handle_budget_status(user_id, year, month)
+            return await self._handle_budget_status(user_id, year, month)
         
         elif intent == "wallet_balance":
-            return self._handle_wallet_balance(user_id)
+            return await self._handle_wallet_balance(user_id)
         
         elif intent == "recent_transactions":
-            return self._handle_recent_transactions(user_id)
+            return await self._handle_recent_transactions(user_id)
         
         elif intent == "income_vs_expense":
-            return self._handle_income_vs_expense(user_id, year, month)
+            return await self._handle_income_vs_expense(user_id, year, month)
         
         elif intent == "monthly_trend":
-            return self._handle_monthly_trend(user_id, year)
+            return await self._handle_monthly_trend(user_id, year)
         
         elif intent == "daily_summary":
             target_date = time_context.get("date", datetime.now().date())
-            return self._handle_daily_summary(user_id, target_date)
+            return await self._handle_daily_summary(user_id, target_date)
         
         else:
-            return self._handle_unknown(question, time_context)
+            raise ValueError(f"Unknown intent: {intent}")
     
-    def _handle_total_expense(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
+    async def _handle_total_expense(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
         """Handle total expense query"""
-        data = self.query_income_vs_expense(user_id, year, month)
+        data = await self.query_income_vs_expense(user_id, year, month)
         expense = data["total_expense"]
         month_name = self.get_month_name_vi(month)
         
@@ -558,9 +647,9 @@ class ChatbotService:
             ]
         }
     
-    def _handle_total_income(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
+    async def _handle_total_income(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
         """Handle total income query"""
-        data = self.query_income_vs_expense(user_id, year, month)
+        data = await self.query_income_vs_expense(user_id, year, month)
         income = data["total_income"]
         month_name = self.get_month_name_vi(month)
         
@@ -580,9 +669,9 @@ class ChatbotService:
             ]
         }
     
-    def _handle_category_breakdown(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
+    async def _handle_category_breakdown(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
         """Handle category breakdown query"""
-        categories = self.query_category_breakdown(user_id, year, month, "expense")
+        categories = await self.query_category_breakdown(user_id, year, month, "expense")
         month_name = self.get_month_name_vi(month)
         
         if not categories:
@@ -613,9 +702,9 @@ class ChatbotService:
             ]
         }
     
-    def _handle_budget_status(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
+    async def _handle_budget_status(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
         """Handle budget status query"""
-        budgets = self.query_budget_status(user_id, year, month)
+        budgets = await self.query_budget_status(user_id, year, month)
         month_name = self.get_month_name_vi(month)
         
         if not budgets:
@@ -662,9 +751,9 @@ class ChatbotService:
             ]
         }
     
-    def _handle_wallet_balance(self, user_id: int) -> Dict[str, Any]:
+    async def _handle_wallet_balance(self, user_id: int) -> Dict[str, Any]:
         """Handle wallet balance query"""
-        wallets = self.query_wallet_balance(user_id)
+        wallets = await self.query_wallet_balance(user_id)
         
         if not wallets:
             answer = "💳 Bạn chưa có ví nào. Hãy tạo ví đầu tiên để bắt đầu quản lý tài chính!"
@@ -696,9 +785,9 @@ class ChatbotService:
             ]
         }
     
-    def _handle_recent_transactions(self, user_id: int) -> Dict[str, Any]:
+    async def _handle_recent_transactions(self, user_id: int) -> Dict[str, Any]:
         """Handle recent transactions query"""
-        transactions = self.query_recent_transactions(user_id, limit=10)
+        transactions = await self.query_recent_transactions(user_id, limit=10)
         
         if not transactions:
             answer = "📝 Bạn chưa có giao dịch nào. Hãy thêm giao dịch đầu tiên!"
@@ -733,9 +822,9 @@ class ChatbotService:
             ]
         }
     
-    def _handle_income_vs_expense(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
+    async def _handle_income_vs_expense(self, user_id: int, year: int, month: int) -> Dict[str, Any]:
         """Handle income vs expense comparison"""
-        data = self.query_income_vs_expense(user_id, year, month)
+        data = await self.query_income_vs_expense(user_id, year, month)
         month_name = self.get_month_name_vi(month)
         
         income = data["total_income"]
@@ -770,7 +859,7 @@ class ChatbotService:
             ]
         }
     
-    def _handle_monthly_trend(self, user_id: int, year: int) -> Dict[str, Any]:
+    async def _handle_monthly_trend(self, user_id: int, year: int) -> Dict[str, Any]:
         """Handle monthly trend query"""
         # Query last 6 months
         query = text("""
@@ -786,7 +875,7 @@ class ChatbotService:
             LIMIT 6
         """)
         
-        result = self.db.execute(query, {"user_id": user_id}).fetchall()
+        result = (await self.db.execute(query, {"user_id": user_id})).fetchall()
         
         if not result:
             answer = "📈 Chưa có dữ liệu để phân tích xu hướng. Hãy thêm giao dịch để xem báo cáo!"
@@ -834,9 +923,9 @@ class ChatbotService:
             ]
         }
     
-    def _handle_daily_summary(self, user_id: int, target_date: date) -> Dict[str, Any]:
+    async def _handle_daily_summary(self, user_id: int, target_date: date) -> Dict[str, Any]:
         """Handle daily summary query"""
-        data = self.query_daily_summary(user_id, target_date)
+        data = await self.query_daily_summary(user_id, target_date)
         date_str = target_date.strftime("%d/%m/%Y")
         
         if data["income"] == 0 and data["expense"] == 0:
@@ -869,7 +958,7 @@ class ChatbotService:
             ]
         }
     
-    def _handle_unknown(self, question: str, time_context: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_unknown(self, question: str, time_context: Dict[str, Any]) -> Dict[str, Any]:
         """Handle unknown/unrecognized queries"""
         answer = """🤔 Xin lỗi, tôi chưa hiểu câu hỏi của bạn. Bạn có thể hỏi tôi về:
 
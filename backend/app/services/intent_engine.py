@@ -0,0 +1,118 @@
+"""
+Intent Engine
+Classifies chatbot questions in a single pass over diacritic-folded text.
+
+All intent patterns are compiled once at import and indexed by their
+leading letters. One scan over the question's words reports every
+pattern that matches, so each intent is scored on all of its evidence
+instead of the first pattern that happens to fire.
+"""
+import re
+import unicodedata
+from typing import Dict, List, Tuple
+
+
+def _strip_diacritics(text: str) -> str:
+    decomposed = unicodedata.normalize("NFD", text.replace("đ", "d").replace("Đ", "D"))
+    return "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+
+
+# Precomposed Latin letters (incl. the Vietnamese block U+1E00-U+1EFF) -> base letter
+_FOLD_TABLE = {
+    codepoint: _strip_diacritics(chr(codepoint))
+    for codepoint in [*range(0x00C0, 0x0250), *range(0x1E00, 0x1F00)]
+    if _strip_diacritics(chr(codepoint)) != chr(codepoint)
+}
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip Vietnamese diacritics ("Số dư ví" -> "so du vi")"""
+    return unicodedata.normalize("NFC", text.lower()).translate(_FOLD_TABLE)
+
+
+# Start of every word (or number) in folded text
+_WORD_START = re.compile(r"\b\w")
+# Two leading literal characters of a pattern, used as its index key
+_LEADING_LITERAL = re.compile(r"[a-z0-9]{2}")
+
+
+class PatternSet:
+    """
+    A labelled set of regex patterns compiled once and indexed by the
+    first two letters of their leading literal. Scanning tries, at each
+    word start, only the patterns indexed under that word's prefix plus
+    the few that open with a group, so the work grows with the words in
+    the question rather than with the number of patterns.
+    """
+
+    def __init__(self, patterns: Dict[str, List[str]]):
+        self.labels = list(patterns)
+        self._index: Dict[str, List[Tuple[str, "re.Pattern[str]"]]] = {}
+        self._unindexed: List[Tuple[str, "re.Pattern[str]"]] = []
+        for label, label_patterns in patterns.items():
+            for pattern in label_patterns:
+                folded = _strip_diacritics(pattern)
+                entry = (label, re.compile(folded))
+                key = _LEADING_LITERAL.match(folded)
+                if key:
+                    self._index.setdefault(key.group(), []).append(entry)
+                else:
+                    self._unindexed.append(entry)
+
+    def scan(self, folded: str) -> Dict[str, List[re.Match]]:
+        """Every pattern match starting at a word in already-folded text, grouped by label"""
+        hits: Dict[str, List[re.Match]] = {}
+        for word in _WORD_START.finditer(folded):
+            position = word.start()
+            for label, pattern in self._index.get(folded[position:position + 2], ()):
+                match = pattern.match(folded, position)
+                if match:
+                    hits.setdefault(label, []).append(match)
+            for label, pattern in self._unindexed:
+                match = pattern.match(folded, position)
+                if match:
+                    hits.setdefault(label, []).append(match)
+        return hits
+
+
+class IntentEngine:
+    """Ranks intents and extracts time hints from a question"""
+
+    def __init__(self, intent_patterns: Dict[str, List[str]], time_patterns: Dict[str, List[str]]):
+        self.intents = PatternSet(intent_patterns)
+        self.times = PatternSet(time_patterns)
+
+    def rank(self, question: str) -> List[Tuple[str, float]]:
+        """
+        All matching intents as (intent, confidence), best first.
+
+        An intent scores the number of characters its matches cover, so
+        longer and repeated evidence outweighs a single generic keyword.
+        Confidence is the intent's share of the total score. Ties keep
+        the declaration order of the patterns.
+        """
+        hits = self.intents.scan(fold(question))
+        scores = {}
+        for intent, matches in hits.items():
+            covered = set()
+            for match in matches:
+                covered.update(range(match.start(), match.end()))
+            scores[intent] = len(covered)
+
+        total = sum(scores.values())
+        if not total:
+            return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.intents.labels.index(item[0])))
+        return [(intent, round(score / total, 3)) for intent, score in ranked]
+
+    def classify(self, question: str) -> Tuple[str, float]:
+        """Best intent and its confidence, or ("unknown", 0.0)"""
+        ranked = self.rank(question)
+        return ranked[0] if ranked else ("unknown", 0.0)
+
+    def time_hits(self, question: str) -> Dict[str, List[re.Match]]:
+        """Matches of each time expression type found in the question, in text order"""
+        return {
+            label: sorted(matches, key=lambda m: m.start())
+            for label, matches in self.times.scan(fold(question)).items()
+        }
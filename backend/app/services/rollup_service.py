@@ -0,0 +1,55 @@
+"""
+Rollup Service
+Backfill and consistency checks for transaction_monthly_rollup,
+the per-month aggregate table maintained by database triggers.
+
+Usage:
+    python -m app.services.rollup_service backfill
+    python -m app.services.rollup_service check
+"""
+import argparse
+import asyncio
+import sys
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+
+
+async def rebuild_rollup(db: AsyncSession) -> int:
+    """Recompute the whole rollup from transactions; returns the number of groups"""
+    rebuilt = (await db.execute(text("SELECT rebuild_transaction_rollup()"))).scalar()
+    await db.commit()
+    return rebuilt
+
+
+async def check_rollup(db: AsyncSession) -> List[Dict[str, Any]]:
+    """Diff the rollup against a full recompute; an empty list means consistent"""
+    result = await db.execute(text("SELECT * FROM check_transaction_rollup()"))
+    return [dict(row._mapping) for row in result]
+
+
+async def _run(command: str) -> int:
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        if command == "backfill":
+            print(f"Rebuilt {await rebuild_rollup(db)} rollup groups")
+            return 0
+
+        mismatches = await check_rollup(db)
+        for row in mismatches:
+            print(row)
+        print(f"{len(mismatches)} mismatched rollup groups")
+        return 1 if mismatches else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Maintain the monthly transaction rollup")
+    parser.add_argument("command", choices=["backfill", "check"])
+    args = parser.parse_args(argv)
+    return asyncio.run(_run(args.command))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""
+Transaction Export Service
+Encodes chunks of projected transaction rows as CSV, NDJSON or Parquet
+so exports can be streamed with flat memory
+"""
+import csv
+import io
+import json
+from datetime import date
+from typing import Any, AsyncIterable, AsyncIterator, List, Sequence
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Column order of an exported row; matches the TransactionResponse fields
+EXPORT_COLUMNS = [
+    "id",
+    "user_id",
+    "wallet_id",
+    "category_id",
+    "type",
+    "amount",
+    "description",
+    "transaction_date",
+    "created_at",
+    "category_name",
+    "category_icon",
+    "category_color",
+    "wallet_name",
+]
+
+
+def parquet_available() -> bool:
+    """Whether the optional pyarrow dependency is installed"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def encode_csv(chunks: AsyncIterable[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """Yield a header and then one CSV block per chunk of rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buffer.getvalue().encode()
+
+    async for rows in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+
+
+def _json_default(value: Any) -> str:
+    """Serialize dates as ISO 8601 and decimals as strings, like the JSON API"""
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+async def encode_ndjson(chunks: AsyncIterable[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """Yield one block of JSON lines per chunk of rows"""
+    async for rows in chunks:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=_json_default, ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each row group"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+async def encode_parquet(chunks: AsyncIterable[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """Yield Parquet bytes, flushing one row group per chunk of rows"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("wallet_id", pa.int64()),
+        ("category_id", pa.int64()),
+        ("type", pa.string()),
+        ("amount", pa.decimal128(15, 2)),
+        ("description", pa.string()),
+        ("transaction_date", pa.date32()),
+        ("created_at", pa.timestamp("us")),
+        ("category_name", pa.string()),
+        ("category_icon", pa.string()),
+        ("category_color", pa.string()),
+        ("wallet_name", pa.string()),
+    ])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for rows in chunks:
+            columns: List[List[Any]] = [list(column) for column in zip(*rows)] if rows else [[] for _ in EXPORT_COLUMNS]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    "csv": encode_csv,
+    "ndjson": encode_ndjson,
+    "parquet": encode_parquet,
+}
@@ -0,0 +1,174 @@
+"""
+Transaction Import Service
+Bulk-loads CSV / NDJSON transaction histories through COPY into a staging
+table and applies a single balance delta per wallet
+"""
+import csv
+import io
+import json
+from typing import Any, Dict, IO, Iterator, List, Optional, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, text, or_
+from app.models.wallet import Wallet
+from app.models.category import Category
+from app.schemas.transaction import TransactionCreate, TransactionImportError, TransactionImportResult
+
+
+IMPORT_COLUMNS = ["wallet_id", "category_id", "type", "amount", "description", "transaction_date"]
+
+# Rows validated and copied per round trip
+CHUNK_SIZE = 5000
+
+
+class TransactionImporter:
+    """Validates and loads a batch of transactions for one user"""
+
+    def __init__(self, db: AsyncSession, user_id: int):
+        self.db = db
+        self.user_id = user_id
+        # id -> category type for categories the user may post to, None if rejected
+        self._categories: Dict[int, Optional[str]] = {}
+        # id -> whether the wallet is an active wallet of this user
+        self._wallets: Dict[int, bool] = {}
+
+    @staticmethod
+    def iter_csv(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Yield (row_number, record) pairs from a CSV stream with a header row"""
+        reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+        for row_number, record in enumerate(reader, start=1):
+            yield row_number, {k: v for k, v in record.items() if k}
+
+    @staticmethod
+    def iter_ndjson(stream: IO[bytes]) -> Iterator[Tuple[int, Any]]:
+        """Yield (row_number, record) pairs from an NDJSON stream, skipping blank lines"""
+        for row_number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8"), start=1):
+            if not line.strip():
+                continue
+            try:
+                yield row_number, json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, e
+
+    async def run(self, records: Iterator[Tuple[int, Any]]) -> TransactionImportResult:
+        """Validate, stage and insert all records in one database transaction"""
+        errors: List[TransactionImportError] = []
+
+        await self.db.execute(text("""
+            CREATE TEMP TABLE tmp_transaction_import (
+                wallet_id INTEGER NOT NULL,
+                category_id INTEGER NOT NULL,
+                type VARCHAR(10) NOT NULL,
+                amount DECIMAL(15, 2) NOT NULL,
+                description VARCHAR(500),
+                transaction_date DATE NOT NULL
+            ) ON COMMIT DROP
+        """))
+
+        chunk: List[Tuple[int, Any]] = []
+        for item in records:
+            chunk.append(item)
+            if len(chunk) >= CHUNK_SIZE:
+                await self._stage_chunk(chunk, errors)
+                chunk = []
+        if chunk:
+            await self._stage_chunk(chunk, errors)
+
+        # The staged rows are posted in one statement, so the statement-level
+        # wallet trigger appends one aggregated balance delta per wallet
+        inserted = (await self.db.execute(text("""
+            INSERT INTO transactions
+                (user_id, wallet_id, category_id, type, amount, description, transaction_date)
+            SELECT :user_id, wallet_id, category_id, type, amount, description, transaction_date
+            FROM tmp_transaction_import
+        """), {"user_id": self.user_id})).rowcount
+        await self.db.commit()
+
+        return TransactionImportResult(inserted=inserted, failed=len(errors), errors=errors)
+
+    async def _stage_chunk(self, chunk: List[Tuple[int, Any]], errors: List[TransactionImportError]) -> None:
+        """Validate one chunk of records and COPY the valid ones into the staging table"""
+        parsed: List[Tuple[int, TransactionCreate]] = []
+        for row_number, record in chunk:
+            if isinstance(record, Exception):
+                errors.append(TransactionImportError(row=row_number, error=f"Invalid JSON: {record}"))
+                continue
+            if not isinstance(record, dict):
+                errors.append(TransactionImportError(row=row_number, error="Row must be an object"))
+                continue
+            if record.get("description") == "":
+                record["description"] = None
+            try:
+                parsed.append((row_number, TransactionCreate.model_validate(record)))
+            except ValidationError as e:
+                errors.append(TransactionImportError(row=row_number, error=_format_validation_error(e)))
+
+        await self._load_references(
+            {t.wallet_id for _, t in parsed},
+            {t.category_id for _, t in parsed}
+        )
+
+        rows: List[Tuple[Any, ...]] = []
+        for row_number, transaction in parsed:
+            error = self._check_references(transaction)
+            if error:
+                errors.append(TransactionImportError(row=row_number, error=error))
+                continue
+            rows.append((
+                transaction.wallet_id,
+                transaction.category_id,
+                transaction.type,
+                transaction.amount,
+                transaction.description,
+                transaction.transaction_date
+            ))
+
+        if not rows:
+            return
+        # COPY through the asyncpg connection that owns the session's transaction
+        connection = await (await self.db.connection()).get_raw_connection()
+        await connection.driver_connection.copy_records_to_table(
+            "tmp_transaction_import", records=rows, columns=IMPORT_COLUMNS
+        )
+
+    async def _load_references(self, wallet_ids: Set[int], category_ids: Set[int]) -> None:
+        """Look up ownership once per distinct wallet and category id"""
+        new_wallet_ids = wallet_ids - self._wallets.keys()
+        if new_wallet_ids:
+            owned = {
+                wallet_id for (wallet_id,) in await self.db.execute(select(Wallet.id).where(
+                    Wallet.id.in_(new_wallet_ids),
+                    Wallet.user_id == self.user_id,
+                    Wallet.is_active == True
+                ))
+            }
+            for wallet_id in new_wallet_ids:
+                self._wallets[wallet_id] = wallet_id in owned
+
+        new_category_ids = category_ids - self._categories.keys()
+        if new_category_ids:
+            found = dict((await self.db.execute(select(Category.id, Category.type).where(
+                Category.id.in_(new_category_ids),
+                or_(Category.user_id == None, Category.user_id == self.user_id),
+                Category.is_active == True
+            ))).all())
+            for category_id in new_category_ids:
+                self._categories[category_id] = found.get(category_id)
+
+    def _check_references(self, transaction: TransactionCreate) -> Optional[str]:
+        """Return an error message if the row references a foreign wallet or category"""
+        if not self._wallets.get(transaction.wallet_id):
+            return "Wallet not found"
+        category_type = self._categories.get(transaction.category_id)
+        if category_type is None:
+            return "Category not found"
+        if category_type != transaction.type:
+            return f"Category type ({category_type}) doesn't match transaction type ({transaction.type})"
+        return None
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic ValidationError into a single line"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()
+    )
@@ -0,0 +1,122 @@
+"""
+Wallet Ledger Service
+Folds the wallet_balance_deltas appended by the balance triggers into
+wallets.balance. Readers add the pending deltas themselves, so
+compaction only bounds how many they have to sum.
+
+Usage (from backend/):
+    python -m app.services.wallet_ledger_service compact
+    python -m app.services.wallet_ledger_service status
+"""
+import argparse
+import asyncio
+import logging
+import sys
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def compact_deltas(db: AsyncSession, batch_size: int) -> int:
+    """
+    Fold pending deltas into wallets.balance, batch_size per transaction
+    so wallet rows are never locked for long. Returns the number folded;
+    stops early when another compaction holds the lock. Must run on the
+    primary.
+    """
+    total = 0
+    while True:
+        folded = (await db.execute(
+            text("SELECT compact_wallet_balance_deltas(:batch_size)"),
+            {"batch_size": batch_size}
+        )).scalar()
+        await db.commit()
+        total += folded
+        if folded < batch_size:
+            return total
+
+
+async def ledger_status(db: AsyncSession) -> Dict[str, Any]:
+    """Pending deltas, the wallets they touch and the age of the oldest"""
+    result = await db.execute(text("""
+        SELECT
+            COUNT(*) AS pending_deltas,
+            COUNT(DISTINCT wallet_id) AS wallets,
+            NOW()::TIMESTAMP - MIN(created_at) AS oldest_age
+        FROM wallet_balance_deltas
+    """))
+    return dict(result.fetchone()._mapping)
+
+
+class CompactionScheduler:
+    """
+    Background task compacting the ledger every
+    WALLET_COMPACT_INTERVAL_SECONDS. Several workers may run one each;
+    the advisory lock in compact_wallet_balance_deltas lets one fold at
+    a time and the others skip the round.
+    """
+
+    def __init__(self, interval: int, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        from app.database import session_router
+
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                async with session_router.writer() as db:
+                    folded = await compact_deltas(db, self.batch_size)
+                if folded:
+                    logger.info("Folded %d wallet balance deltas", folded)
+            except Exception:
+                logger.exception("Wallet ledger compaction failed")
+
+
+compaction_scheduler = CompactionScheduler(
+    settings.WALLET_COMPACT_INTERVAL_SECONDS,
+    settings.WALLET_COMPACT_BATCH_SIZE
+)
+
+
+async def _run(command: str, batch_size: int) -> int:
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        if command == "compact":
+            print(f"Folded {await compact_deltas(db, batch_size)} deltas")
+            return 0
+
+        print(await ledger_status(db))
+        return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Compact the wallet balance ledger")
+    parser.add_argument("command", choices=["compact", "status"])
+    parser.add_argument("--batch-size", type=int, default=settings.WALLET_COMPACT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+    return asyncio.run(_run(args.command, args.batch_size))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
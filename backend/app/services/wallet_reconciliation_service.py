@@ -0,0 +1,111 @@
+"""
+Wallet Reconciliation Service
+Recomputes every wallet's balance as opening_balance plus its
+transactions and records (optionally repairs) drift from the stored
+balance. Users are checked in chunks, each in its own short transaction
+(database/11-wallet-reconciliation.sql), so a nightly run over the whole
+table never holds locks or a long snapshot.
+
+Usage (from backend/):
+    python -m app.services.wallet_reconciliation_service run [--repair] [--chunk-users 1000]
+    python -m app.services.wallet_reconciliation_service drift
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+
+
+async def reconcile_wallets(
+    db: AsyncSession,
+    repair: bool = False,
+    chunk_users: int = settings.WALLET_RECONCILE_CHUNK_USERS
+) -> Dict[str, Any]:
+    """
+    Check every wallet, chunk_users user ids at a time. With repair the
+    drift is appended to the wallet balance ledger. Returns the run row.
+    Must run on the primary.
+    """
+    run_id = (await db.execute(
+        text("INSERT INTO wallet_reconciliation_runs (repair) VALUES (:repair) RETURNING id"),
+        {"repair": repair}
+    )).scalar()
+    bounds = (await db.execute(text("SELECT MIN(user_id) AS low, MAX(user_id) AS high FROM wallets"))).fetchone()
+    await db.commit()
+
+    if bounds.low is not None:
+        for user_from in range(bounds.low, bounds.high + 1, chunk_users):
+            await db.execute(
+                text("SELECT * FROM reconcile_wallet_balances(:run_id, :user_from, :user_to, :repair)"),
+                {"run_id": run_id, "user_from": user_from, "user_to": user_from + chunk_users, "repair": repair}
+            )
+            await db.commit()
+
+    result = await db.execute(text("""
+        UPDATE wallet_reconciliation_runs
+        SET finished_at = CURRENT_TIMESTAMP
+        WHERE id = :run_id
+        RETURNING id, repair, started_at, finished_at, wallets_checked, drifted_wallets
+    """), {"run_id": run_id})
+    run = dict(result.fetchone()._mapping)
+    await db.commit()
+    return run
+
+
+async def latest_drift(db: AsyncSession, limit: int = 100) -> List[Dict[str, Any]]:
+    """Drifted wallets of the most recent finished run, largest drift first"""
+    result = await db.execute(text("""
+        SELECT run_id, wallet_id, user_id, wallet_name, stored_balance, expected_balance, drift, repaired
+        FROM v_wallet_balance_drift
+        ORDER BY ABS(drift) DESC
+        LIMIT :limit
+    """), {"limit": limit})
+    return [dict(row._mapping) for row in result]
+
+
+async def drifted_users(db: AsyncSession, run_id: int) -> List[int]:
+    """Owners of the wallets a run found drifted"""
+    result = await db.execute(
+        text("SELECT DISTINCT user_id FROM wallet_balance_drift WHERE run_id = :run_id"),
+        {"run_id": run_id}
+    )
+    return list(result.scalars())
+
+
+async def _run(command: str, repair: bool, chunk_users: int) -> int:
+    from app.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        if command == "run":
+            start = time.perf_counter()
+            run = await reconcile_wallets(db, repair, chunk_users)
+            print(
+                f"Run {run['id']}: {run['wallets_checked']} wallets checked, "
+                f"{run['drifted_wallets']} drifted{' and repaired' if repair else ''} "
+                f"in {time.perf_counter() - start:.1f} s"
+            )
+            return 1 if run["drifted_wallets"] and not repair else 0
+
+        drift = await latest_drift(db)
+        for row in drift:
+            print(row)
+        print(f"{len(drift)} drifted wallets in the latest run")
+        return 1 if drift else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Reconcile wallet balances with their transactions")
+    parser.add_argument("command", choices=["run", "drift"])
+    parser.add_argument("--repair", action="store_true", help="Append each drift to the balance ledger")
+    parser.add_argument("--chunk-users", type=int, default=settings.WALLET_RECONCILE_CHUNK_USERS)
+    args = parser.parse_args(argv)
+    return asyncio.run(_run(args.command, args.repair, args.chunk_users))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Prometheus metrics in the text exposition format.
+
+Request latency is recorded per route template by MetricsMiddleware.
+Pool, cache, password-pool and chatbot figures are read from their
+owners when /metrics is scraped, so they cost nothing per request.
+"""
+import bisect
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from app.cache import response_cache
+from app.database import TimedQueuePool, engine, replica_engine, session_router
+from app.services.chatbot_service import intent_counts
+from app.utils.security import password_hasher, principal_cache
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _sample(name: str, labels: Labels, value: float) -> str:
+    return f"{name}{_format_labels(labels)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, series in sorted(self._series.items()):
+            labels = tuple(zip(self.label_names, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield _sample(f"{self.name}_bucket", labels + (("le", repr(bound)),), cumulative)
+            cumulative += series[len(self.buckets)]
+            yield _sample(f"{self.name}_bucket", labels + (("le", "+Inf"),), cumulative)
+            yield _sample(f"{self.name}_sum", labels, round(series[-1], 6))
+            yield _sample(f"{self.name}_count", labels, cumulative)
+
+
+def _family(name: str, kind: str, help_text: str, samples: Iterable[Tuple[Labels, float]]) -> Iterable[str]:
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} {kind}"
+    for labels, value in samples:
+        yield _sample(name, labels, value)
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Request latency by route template",
+    ("method", "route", "status"), LATENCY_BUCKETS
+)
+pool_wait = Histogram(
+    "db_pool_wait_seconds", "Time spent waiting for a pooled connection",
+    ("role",), POOL_WAIT_BUCKETS
+)
+in_flight = 0
+
+
+def _watch_pool(role: str, pool) -> None:
+    if isinstance(pool, TimedQueuePool):
+        pool.wait_observers.append(lambda waited: pool_wait.observe(waited, role))
+
+
+_engines = {"primary": engine}
+if replica_engine is not None:
+    _engines["replica"] = replica_engine
+for _role, _engine in _engines.items():
+    _watch_pool(_role, _engine.pool)
+
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording in-flight requests and latency per route template"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        global in_flight
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code: Optional[int] = None
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight -= 1
+            request_latency.observe(
+                time.perf_counter() - start,
+                scope["method"], _route_template(scope), str(status_code or 500)
+            )
+
+
+def render_metrics() -> str:
+    """Every metric family in the Prometheus text format"""
+    lines: List[str] = []
+    lines.extend(request_latency.render())
+    lines.extend(_family("http_requests_in_flight", "gauge", "Requests being served", [((), in_flight)]))
+
+    pools = [(role, e.pool) for role, e in _engines.items()]
+    lines.extend(_family("db_pool_size", "gauge", "Configured pool size",
+                         [((("role", role),), pool.size()) for role, pool in pools]))
+    lines.extend(_family("db_pool_checked_out", "gauge", "Connections in use",
+                         [((("role", role),), pool.checkedout()) for role, pool in pools]))
+    lines.extend(_family("db_pool_checked_in", "gauge", "Idle connections in the pool",
+                         [((("role", role),), pool.checkedin()) for role, pool in pools]))
+    lines.extend(_family("db_pool_overflow", "gauge", "Connections opened beyond the pool size (negative while below it)",
+                         [((("role", role),), pool.overflow()) for role, pool in pools]))
+    lines.extend(pool_wait.render())
+    lines.extend(_family("db_statements_total", "counter", "Statements run per engine role",
+                         [((("role", role),), count) for role, count in session_router.queries.items()]))
+
+    cache_stats = [("response", response_cache.stats.hits, response_cache.stats.misses)]
+    cache_stats += [
+        (f"response:{endpoint}", stats.hits, stats.misses)
+        for endpoint, stats in sorted(response_cache.endpoint_stats.items())
+    ]
+    cache_stats.append(("principal", principal_cache.hits, principal_cache.misses))
+    lines.extend(_family("cache_hits_total", "counter", "Cache hits",
+                         [((("cache", name),), hits) for name, hits, _ in cache_stats]))
+    lines.extend(_family("cache_misses_total", "counter", "Cache misses",
+                         [((("cache", name),), misses) for name, _, misses in cache_stats]))
+    lines.extend(_family("cache_hit_ratio", "gauge", "Hits over lookups since start",
+                         [((("cache", name),), round(hits / (hits + misses), 4) if hits + misses else 0)
+                          for name, hits, misses in cache_stats]))
+
+    lines.extend(_family("password_hash_pending", "gauge", "bcrypt jobs queued or running",
+                         [((), password_hasher.pending)]))
+    lines.extend(_family("password_hash_rejected_total", "counter", "bcrypt jobs rejected with 503",
+                         [((), password_hasher.rejected)]))
+
+    lines.extend(_family("chatbot_intents_total", "counter", "Chatbot questions by detected intent",
+                         [((("intent", intent),), count) for intent, count in sorted(intent_counts.items())]))
+    return "\n".join(lines) + "\n"
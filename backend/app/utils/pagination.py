@@ -0,0 +1,34 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+import base64
+import json
+from datetime import date, datetime
+from typing import Tuple
+from fastapi import HTTPException, status
+
+
+def encode_cursor(transaction_date: date, created_at: datetime, transaction_id: int) -> str:
+    """Encode the sort key of the last row of a page into an opaque cursor"""
+    payload = json.dumps(
+        [transaction_date.isoformat(), created_at.isoformat(), transaction_id],
+        separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[date, datetime, int]:
+    """Decode an opaque cursor back into (transaction_date, created_at, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_created_at, transaction_id = json.loads(base64.urlsafe_b64decode(padded))
+        return (
+            date.fromisoformat(raw_date),
+            datetime.fromisoformat(raw_created_at),
+            int(transaction_id)
+        )
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
@@ -0,0 +1,174 @@
+"""
+Per-request query accounting and slow-query log.
+
+Engine event hooks add every statement's count, duration and row count
+to the RequestStats of the request that ran it, found through a context
+variable set by QueryStatsMiddleware. The middleware reports the totals
+in a Server-Timing header. Statements slower than SLOW_QUERY_MS are
+logged as JSON with their SQL normalized (literals replaced by "?"),
+whether or not they ran inside a request.
+
+The hot path is two perf_counter calls and a context variable lookup
+per statement; normalization only happens for slow statements.
+"""
+import json
+import logging
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+import fastapi.routing
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.config import settings
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+MAX_LOGGED_SQL = 2000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse whitespace and replace literals so equal queries log alike"""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _IN_LIST.sub("(?)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()[:MAX_LOGGED_SQL]
+
+
+class RequestStats:
+    """Database and phase timings of one request"""
+
+    __slots__ = ("method", "path", "statements", "db_seconds", "rows", "phases")
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.phases: Dict[str, float] = {}
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        parts = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.statements} queries, {self.rows} rows"']
+        for name, seconds in self.phases.items():
+            parts.append(f"{name};dur={seconds * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Add the duration of the block to the current request's phase"""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_phase(phase, time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    rows = max(cursor.rowcount or 0, 0)
+    stats = _current.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.db_seconds += elapsed
+        stats.rows += rows
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        slow_query_logger.warning(json.dumps({
+            "event": "slow_query",
+            "duration_ms": round(elapsed * 1000, 1),
+            "rows": rows,
+            "method": stats.method if stats else None,
+            "path": stats.path if stats else None,
+            "database": conn.engine.url.database,
+            "sql": normalize_sql(statement),
+        }))
+
+
+def _handle_error(exception_context) -> None:
+    # after_cursor_execute does not fire for failed statements
+    starts = exception_context.connection.info.get("query_start") if exception_context.connection else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Attach the accounting hooks to an engine"""
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def instrument_serialization() -> None:
+    """
+    Time FastAPI's response-model serialization as the "serialize" phase.
+    The route handler calls fastapi.routing.serialize_response through
+    the module global, so wrapping it there covers every route.
+    """
+    serialize_response = fastapi.routing.serialize_response
+    if getattr(serialize_response, "_timed", False):
+        return
+
+    async def timed_serialize_response(*args: Any, **kwargs: Any) -> Any:
+        with timed("serialize"):
+            return await serialize_response(*args, **kwargs)
+
+    timed_serialize_response._timed = True
+    fastapi.routing.serialize_response = timed_serialize_response
+
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that opens a RequestStats per HTTP request and adds a
+    Server-Timing header (db, plus auth and serialize when they ran).
+    Streaming bodies send their headers first, so statements run while
+    streaming are not in the header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope["method"], scope["path"])
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers: List = list(message.get("headers", []))
+                headers.append((b"server-timing", stats.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
@@ -1,17 +1,24 @@
 """
 Security utilities for authentication
 """
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Callable, Dict, Optional, Set, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db, session_router
 from app.models.user import User
-from app.schemas.user import TokenData
+from app.utils.query_stats import timed
+from app.schemas.user import TokenData, UserPrincipal
 
 # Password hashing context
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -30,6 +37,78 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded pool so a burst of
+    logins cannot stall the event loop. Requests beyond
+    PASSWORD_HASH_MAX_PENDING (queued plus running) are rejected with 503
+    instead of piling up behind the pool.
+    
+    "thread" is enough for bcrypt, which releases the GIL while hashing;
+    "process" isolates the work completely at the cost of pickling.
+    """
+    
+    def __init__(self, workers: int, max_pending: int, kind: str = "thread"):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+    
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+        return self._executor
+    
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many authentication requests, please retry",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            with timed("auth"):
+                return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self.pending -= 1
+    
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """verify_password on the pool"""
+        return await self._run(verify_password, plain_password, hashed_password)
+    
+    async def hash(self, password: str) -> str:
+        """get_password_hash on the pool"""
+        return await self._run(get_password_hash, password)
+    
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_PENDING,
+    settings.PASSWORD_HASH_EXECUTOR
+)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -59,7 +138,7 @@ def decode_token(token: str) -> TokenData:
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return TokenData(user_id=int(user_id), email=email)
+        return TokenData(user_id=int(user_id), email=email, exp=payload.get("exp"))
     
     except JWTError:
         raise HTTPException(
@@ -69,20 +148,119 @@ def decode_token(token: str) -> TokenData:
         )
 
 
+class PrincipalCache:
+    """
+    Bounded LRU of validated tokens to their user principal.
+    
+    An entry lives for at most PRINCIPAL_CACHE_TTL_SECONDS and never past
+    the token's own expiry, so a cache hit can skip both the JWT decode
+    and the users lookup.
+    """
+    
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, UserPrincipal]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        # Mapper events may fire from a worker thread (e.g. run_sync)
+        self._lock = threading.Lock()
+    
+    def get(self, token: str) -> Optional[UserPrincipal]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    self._remove(token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[1]
+    
+    def set(self, token: str, principal: UserPrincipal, token_exp: Optional[int]) -> None:
+        expires_at = time.time() + self.ttl
+        if token_exp is not None:
+            expires_at = min(expires_at, token_exp)
+        with self._lock:
+            self._entries[token] = (expires_at, principal)
+            self._entries.move_to_end(token)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+    
+    def invalidate_user(self, user_id: int) -> None:
+        """Forget every token of a user"""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+    
+    def _remove(self, token: str) -> None:
+        _, principal = self._entries.pop(token)
+        tokens = self._tokens_by_user.get(principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[principal.id]
+    
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.PRINCIPAL_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target: User) -> None:
+    """Drop cached principals when a user row is changed or removed through the ORM"""
+    principal_cache.invalidate_user(target.id)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+    db: AsyncSession = Depends(get_async_db)
+) -> UserPrincipal:
     """Get current authenticated user from token"""
+    with timed("auth"):
+        return await load_principal(token, db)
+
+
+async def load_principal(token: str, db: AsyncSession) -> UserPrincipal:
+    """Resolve a token to its principal, through the principal cache"""
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
+    
     token_data = decode_token(token)
     
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    row = (await db.execute(
+        select(User.id, User.email, User.full_name, User.created_at)
+        .where(User.id == token_data.user_id)
+    )).first()
     
-    if user is None:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return user
+    principal = UserPrincipal(**row._mapping)
+    principal_cache.set(token, principal, token_data.exp)
+    return principal
+
+
+async def get_user_read_db(current_user: UserPrincipal = Depends(get_current_user)):
+    """
+    Read session for the current user: the replica, or the primary while
+    the user is inside their read-your-writes window.
+    """
+    async with session_router.reader(current_user.id) as db:
+        yield db
@@ -0,0 +1,44 @@
+"""
+Runs the pass/fail checks in benchmarks/ and exits with status 1 when any
+of them fails, so one command covers them all (e.g. in CI):
+
+    wallet_balance_trigger_check   statement-level balance triggers vs row-level semantics
+    transaction_statement_check    one statement per transaction list/detail request
+
+Both need only DATABASE_URL and leave it unchanged. plan_regression
+needs a loaded scratch database and runs on its own.
+
+Usage (from backend/):
+    python -m benchmarks
+    python -m benchmarks --only wallet_balance_trigger_check
+"""
+import argparse
+import importlib
+import sys
+from typing import Dict, List, Optional
+
+# Module -> arguments
+CHECKS: Dict[str, List[str]] = {
+    "wallet_balance_trigger_check": [],
+    "transaction_statement_check": [],
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Run the pass/fail checks")
+    parser.add_argument("--only", choices=sorted(CHECKS), action="append", help="Run only these checks")
+    args = parser.parse_args(argv)
+
+    failed = []
+    for name in args.only or CHECKS:
+        print(f"== {name}")
+        check = importlib.import_module(f"benchmarks.{name}")
+        if check.main(CHECKS[name]) != 0:
+            failed.append(name)
+
+    print(f"{len(failed)} of {len(args.only or CHECKS)} checks failed: {', '.join(failed)}" if failed else "All checks passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
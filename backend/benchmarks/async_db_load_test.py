@@ -0,0 +1,143 @@
+"""
+Async database layer load test
+Concurrent throughput of one event loop running the same statement the
+way the routers used to (a synchronous psycopg2 Session called from an
+async handler, blocking the loop for every query) and the way they do
+now (AsyncSession on asyncpg, awaiting each query).
+
+Each of --clients coroutines runs the statement in a loop for --seconds,
+like concurrent requests in one uvicorn worker. A probe task sleeps
+--probe-interval ms at a time and records how late it wakes up: that lag
+is what every other request in the worker waits while a query blocks
+the loop. Both modes use the same pool size.
+
+The default statement is a user's v_budget_vs_actual, the slow scan
+that used to stall the worker; --sql runs another one with :user_id
+bound.
+
+Usage (from backend/):
+    python -m benchmarks.async_db_load_test --user-id 1
+    python -m benchmarks.async_db_load_test --user-id 1 --clients 1,8,32,64 --seconds 10
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import make_engine, make_session_factory
+
+DEFAULT_SQL = "SELECT * FROM v_budget_vs_actual WHERE user_id = :user_id"
+
+
+def to_sync_url(url: str) -> str:
+    """Point a postgresql:// URL at psycopg2, the driver of the old Session"""
+    scheme, _, rest = url.partition("://")
+    return f"postgresql+psycopg2://{rest}" if scheme.startswith("postgres") else url
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def probe(stop: asyncio.Event, interval: float) -> List[float]:
+    """Event loop lag (ms): how much later than asked each sleep returns"""
+    lags = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append((time.perf_counter() - start - interval) * 1000)
+    return lags
+
+
+async def client(query: Callable[[], Awaitable[None]], deadline: float) -> List[float]:
+    """Run query until deadline; returns each query's latency (ms)"""
+    latencies = []
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await query()
+        latencies.append((time.perf_counter() - start) * 1000)
+        # A blocking query never yields; give the other clients and the probe a turn
+        await asyncio.sleep(0)
+    return latencies
+
+
+async def run_once(
+    query: Callable[[], Awaitable[None]],
+    clients: int,
+    args: argparse.Namespace
+) -> Tuple[float, float, float, float]:
+    """Queries per second, p50 and p99 query latency, p99 loop lag"""
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(stop, args.probe_interval / 1000))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client(query, start + args.seconds) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    lags = await probe_task
+
+    latencies = [latency for batch in results for latency in batch]
+    return len(latencies) / elapsed, statistics.median(latencies), percentile(latencies, 0.99), percentile(lags, 0.99)
+
+
+async def run(args: argparse.Namespace) -> int:
+    client_counts = [int(n) for n in args.clients.split(",")]
+    statement = text(args.sql)
+    params = {"user_id": args.user_id}
+
+    sync_engine = create_engine(
+        to_sync_url(settings.DATABASE_URL),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW
+    )
+    sync_sessions = sessionmaker(bind=sync_engine)
+    async_engine = make_engine(settings.DATABASE_URL)
+    async_sessions = make_session_factory(async_engine)
+
+    async def blocking_query() -> None:
+        with sync_sessions() as db:
+            db.execute(statement, params).fetchall()
+
+    async def awaited_query() -> None:
+        async with async_sessions() as db:
+            (await db.execute(statement, params)).fetchall()
+
+    modes: Dict[str, Callable[[], Awaitable[None]]] = {"sync": blocking_query, "async": awaited_query}
+    try:
+        for query in modes.values():
+            await query()
+
+        print(f"{args.sql}  (user_id={args.user_id}), {args.seconds:g} s per run")
+        print(f"{'clients':>7}  {'mode':<6} {'queries/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'loop lag p99 ms':>16}")
+        throughput: Dict[Tuple[str, int], float] = {}
+        for clients in client_counts:
+            for mode, query in modes.items():
+                rate, p50, p99, lag = await run_once(query, clients, args)
+                throughput[mode, clients] = rate
+                print(f"{clients:>7}  {mode:<6} {rate:>10.0f} {p50:>8.1f} {p99:>8.1f} {lag:>16.1f}")
+            print(f"{'':>7}  async / sync: {throughput['async', clients] / throughput['sync', clients]:.2f}x")
+        return 0
+    finally:
+        sync_engine.dispose()
+        await async_engine.dispose()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare blocking and async database access under concurrency")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--clients", default="1,4,16,32", help="Comma-separated concurrent client counts")
+    parser.add_argument("--seconds", type=float, default=5, help="Duration of each run")
+    parser.add_argument("--sql", default=DEFAULT_SQL, help="Statement to run, with :user_id bound")
+    parser.add_argument("--probe-interval", type=float, default=5, help="Milliseconds between loop lag probes")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
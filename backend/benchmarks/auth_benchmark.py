@@ -0,0 +1,94 @@
+"""
+Auth dependency benchmark
+Measures the per-request overhead of get_current_user on the three paths
+a request can take: a principal cache hit, a JWT decode alone (what a
+miss pays before touching the database), and a full miss that also loads
+the user row. The miss path needs a reachable DATABASE_URL and a user
+with --user-id; without them only the hit and decode paths are timed.
+
+Usage (from backend/):
+    python -m benchmarks.auth_benchmark
+    python -m benchmarks.auth_benchmark --user-id 1 --repeat 2000
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+
+from app.database import AsyncSessionLocal
+from app.schemas.user import UserPrincipal
+from app.utils.security import create_access_token, decode_token, get_current_user, principal_cache
+
+
+def report(name: str, latencies: List[float]) -> None:
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<12} mean {statistics.mean(latencies):8.1f} us  "
+        f"p50 {statistics.median(latencies):8.1f} us  p99 {p99:8.1f} us"
+    )
+
+
+async def measure(call: Callable[[], Awaitable[object]], repeat: int) -> List[float]:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+async def run(user_id: int, repeat: int, with_db: bool) -> None:
+    token = create_access_token({"sub": str(user_id), "email": "bench@example.com"})
+
+    async def decode_only():
+        decode_token(token)
+
+    report("decode", await measure(decode_only, repeat))
+
+    if not with_db:
+        # A hit never touches the session, so seed the cache and time it alone
+        principal_cache.set(
+            token,
+            UserPrincipal(id=user_id, email="bench@example.com", full_name="Bench", created_at=datetime.now()),
+            decode_token(token).exp
+        )
+        report("cache hit", await measure(lambda: get_current_user(token, None), repeat))
+        print("miss (db)    skipped (pass --user-id of an existing user)")
+        return
+
+    async with AsyncSessionLocal() as db:
+        try:
+            await get_current_user(token, db)
+        except Exception as exc:
+            print(f"db paths     skipped ({exc.__class__.__name__}: {exc})")
+            return
+
+        async def cold():
+            principal_cache.clear()
+            await get_current_user(token, db)
+
+        async def warm():
+            await get_current_user(token, db)
+
+        report("miss (db)", await measure(cold, repeat))
+        await get_current_user(token, db)
+        report("cache hit", await measure(warm, repeat))
+    print(f"principal cache: {principal_cache.stats()}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the get_current_user dependency")
+    parser.add_argument("--user-id", type=int, help="Existing user to authenticate as")
+    parser.add_argument("--repeat", type=int, default=1000, help="Timed calls per path")
+    args = parser.parse_args(argv)
+
+    asyncio.run(run(args.user_id or 1, args.repeat, args.user_id is not None))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
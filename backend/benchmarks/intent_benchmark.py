@@ -0,0 +1,88 @@
+"""
+Intent classifier benchmark
+Measures accuracy and per-question latency of the chatbot intent engine
+on a labelled Vietnamese/English corpus, next to the previous
+first-match-wins detector for comparison.
+
+Usage (from backend/):
+    python -m benchmarks.intent_benchmark
+    python -m benchmarks.intent_benchmark --corpus benchmarks/intent_corpus.jsonl --repeat 200 --show-errors
+"""
+import argparse
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+from app.services.chatbot_service import INTENT_PATTERNS, intent_engine
+
+
+DEFAULT_CORPUS = Path(__file__).with_name("intent_corpus.jsonl")
+
+
+def legacy_detect_intent(question: str) -> str:
+    """The detector the engine replaced: uncompiled patterns, first match wins"""
+    question_lower = question.lower().strip()
+    for intent, patterns in INTENT_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, question_lower):
+                return intent
+    return "unknown"
+
+
+def engine_detect_intent(question: str) -> str:
+    return intent_engine.classify(question)[0]
+
+
+def load_corpus(path: Path) -> List[Tuple[str, str]]:
+    with open(path, encoding="utf-8") as f:
+        return [(row["question"], row["intent"]) for row in map(json.loads, f) if row]
+
+
+def run(
+    name: str,
+    classify: Callable[[str], str],
+    corpus: List[Tuple[str, str]],
+    repeat: int,
+    show_errors: bool
+) -> None:
+    errors = [(q, label, classify(q)) for q, label in corpus if classify(q) != label]
+
+    latencies = []
+    for question, _ in corpus:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            classify(question)
+        latencies.append((time.perf_counter() - start) / repeat * 1e6)
+    latencies.sort()
+
+    accuracy = 1 - len(errors) / len(corpus)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"{name:<8} accuracy {accuracy:6.1%} ({len(corpus) - len(errors)}/{len(corpus)})  "
+        f"latency/question: mean {statistics.mean(latencies):7.1f} us  "
+        f"p50 {statistics.median(latencies):7.1f} us  p95 {p95:7.1f} us"
+    )
+    if show_errors:
+        for question, expected, got in errors:
+            print(f"    {question!r}: expected {expected}, got {got}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the chatbot intent classifier")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=100, help="Timed runs per question")
+    parser.add_argument("--show-errors", action="store_true")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    run("legacy", legacy_detect_intent, corpus, args.repeat, args.show_errors)
+    run("engine", engine_detect_intent, corpus, args.repeat, args.show_errors)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+"""
+Login storm benchmark
+Measures the latency of an unrelated endpoint while a burst of logins is
+being verified, with bcrypt run inline on the event loop (the previous
+behaviour) and on the bounded password pool.
+
+By default everything runs in-process: the storm calls the password
+check directly and the probe hits /health through the ASGI app, so no
+database is needed. With --url the storm posts real logins to a running
+server instead.
+
+Usage (from backend/):
+    python -m benchmarks.login_storm_benchmark
+    python -m benchmarks.login_storm_benchmark --logins 200 --concurrency 50
+    python -m benchmarks.login_storm_benchmark --url http://localhost:8000 --email a@b.c --password secret
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from fastapi import HTTPException
+
+from app.main import app
+from app.utils.security import get_password_hash, password_hasher, verify_password
+
+
+async def probe(client: httpx.AsyncClient, path: str, stop: asyncio.Event, interval: float) -> List[float]:
+    """
+    Latencies (ms) of GET path, issued every interval seconds until stop
+    is set. Each sample is measured from when the request was due, so a
+    blocked event loop shows up as latency rather than as fewer samples.
+    """
+    latencies = []
+    due = time.perf_counter()
+    while not stop.is_set():
+        await client.get(path)
+        finished = time.perf_counter()
+        latencies.append((finished - due) * 1000)
+        due = finished + interval
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def storm(login: Callable[[], Awaitable[str]], logins: int, concurrency: int) -> Dict[str, int]:
+    """Run logins with bounded concurrency and count outcomes"""
+    outcomes: Dict[str, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            outcome = await login()
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    await asyncio.gather(*(one() for _ in range(logins)))
+    return outcomes
+
+
+def report(name: str, latencies: List[float], elapsed: float, outcomes: Dict[str, int]) -> None:
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{name:<10} probe n={len(latencies):<5} p50 {statistics.median(latencies):8.1f} ms  "
+        f"p99 {p99:8.1f} ms  max {latencies[-1]:8.1f} ms  storm {elapsed:6.2f} s  {outcomes}"
+    )
+
+
+async def run_scenario(
+    name: str,
+    client: httpx.AsyncClient,
+    probe_path: str,
+    login: Optional[Callable[[], Awaitable[str]]],
+    args: argparse.Namespace
+) -> None:
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(client, probe_path, stop, args.interval / 1000))
+    start = time.perf_counter()
+    if login is None:
+        await asyncio.sleep(args.baseline_seconds)
+        outcomes = {}
+    else:
+        outcomes = await storm(login, args.logins, args.concurrency)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    report(name, await probe_task, elapsed, outcomes)
+
+
+async def run_in_process(args: argparse.Namespace) -> None:
+    hashed = get_password_hash(args.password)
+
+    async def inline_login() -> str:
+        return "ok" if verify_password(args.password, hashed) else "denied"
+
+    async def pooled_login() -> str:
+        try:
+            return "ok" if await password_hasher.verify(args.password, hashed) else "denied"
+        except HTTPException as exc:
+            return str(exc.status_code)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await run_scenario("idle", client, args.probe_path, None, args)
+        await run_scenario("inline", client, args.probe_path, inline_login, args)
+        await run_scenario("pool", client, args.probe_path, pooled_login, args)
+    print(f"password pool: {password_hasher.stats()}")
+    password_hasher.shutdown()
+
+
+async def run_against_server(args: argparse.Namespace) -> None:
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        async def login() -> str:
+            response = await client.post(
+                "/api/auth/login",
+                data={"username": args.email, "password": args.password}
+            )
+            return str(response.status_code)
+
+        await run_scenario("idle", client, args.probe_path, None, args)
+        await run_scenario("storm", client, args.probe_path, login, args)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Probe endpoint latency during a login storm")
+    parser.add_argument("--url", help="Base URL of a running server; in-process when omitted")
+    parser.add_argument("--email", default="bench@example.com")
+    parser.add_argument("--password", default="benchmark-password")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-path", default="/health")
+    parser.add_argument("--interval", type=float, default=5, help="Milliseconds between probe requests")
+    parser.add_argument("--baseline-seconds", type=float, default=2)
+    args = parser.parse_args(argv)
+
+    asyncio.run(run_against_server(args) if args.url else run_in_process(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
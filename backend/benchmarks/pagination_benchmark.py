@@ -0,0 +1,175 @@
+"""
+Transaction list pagination benchmark
+Latency of GET /api/transactions at increasing page depths, with
+?offset= (Postgres reads and discards every skipped row) and with the
+?cursor= from X-Next-Cursor (a seek on idx_transactions_user_list_covering).
+
+Runs the get_transactions handler itself on a session whose search_path
+is a scratch schema on DATABASE_URL, filled with one user's synthetic
+history and dropped at the end. Cursors for each measured page are
+collected by walking the list once, as a client would.
+
+Usage (from backend/):
+    python -m benchmarks.pagination_benchmark
+    python -m benchmarks.pagination_benchmark --pages 1,100,1000,5000 --rows 300000
+
+Exits with status 1 when the deepest cursor page is more than
+--max-ratio times slower than the first.
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import asyncpg
+from fastapi import Response
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.database import make_session_factory, to_async_url
+from app.routers.transactions import get_transactions
+from app.schemas.user import UserPrincipal
+
+SCHEMA = "bench_pages"
+
+# The columns transaction_projection() reads, and the list index of database/init.sql
+SETUP_SQL = """
+DROP SCHEMA IF EXISTS bench_pages CASCADE;
+CREATE SCHEMA bench_pages;
+SET search_path = bench_pages;
+
+CREATE TABLE categories (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    icon VARCHAR(50),
+    color VARCHAR(20)
+);
+INSERT INTO categories (name, icon, color)
+SELECT 'Category ' || g, 'tag', '#888888' FROM generate_series(1, 20) AS g;
+
+CREATE TABLE wallets (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL
+);
+INSERT INTO wallets (name) SELECT 'Wallet ' || g FROM generate_series(1, 3) AS g;
+
+CREATE TABLE transactions (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    wallet_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    amount DECIMAL(15, 2) NOT NULL,
+    description VARCHAR(500),
+    transaction_date DATE NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- The benchmarked user's history, ~20 rows a day, plus as many rows of other users
+INSERT INTO transactions (user_id, wallet_id, category_id, type, amount, description, transaction_date, created_at)
+SELECT
+    CASE WHEN g % 2 = 0 THEN 1 ELSE 2 + g % 50 END,
+    1 + g % 3,
+    1 + g % 20,
+    CASE WHEN g % 10 = 0 THEN 'income' ELSE 'expense' END,
+    1000 + g % 997 * 100,
+    'Synthetic transaction ' || g,
+    CURRENT_DATE - g / 40,
+    (CURRENT_DATE - g / 40) + (g % 86400) * INTERVAL '1 second'
+FROM generate_series(1, {rows} * 2) AS g;
+
+CREATE INDEX idx_transactions_user_list_covering
+    ON transactions(user_id, transaction_date DESC, created_at DESC, id DESC)
+    INCLUDE (type, amount, category_id);
+"""
+
+USER = UserPrincipal(id=1, email="bench@example.com", full_name="Bench", created_at=datetime.now())
+
+
+async def fetch_page(db, limit: int, offset: int = 0, cursor: Optional[str] = None) -> Response:
+    """Call the list handler as FastAPI would, with every filter unset"""
+    response = Response()
+    await get_transactions(
+        response=response, type=None, category_id=None, wallet_id=None, start_date=None, end_date=None,
+        limit=limit, offset=offset, cursor=cursor, current_user=USER, db=db
+    )
+    return response
+
+
+async def collect_cursors(db, limit: int, pages: List[int]) -> Dict[int, str]:
+    """Walk the list from the first page and keep the cursor that opens each page in pages"""
+    wanted, cursors = set(pages), {}
+    cursor, page = None, 1
+    while page <= max(pages):
+        if page in wanted:
+            cursors[page] = cursor
+        cursor = (await fetch_page(db, limit, cursor=cursor)).headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        page += 1
+    return cursors
+
+
+async def median_ms(call, repeat: int) -> float:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+async def run(args: argparse.Namespace) -> int:
+    pages = sorted(int(n) for n in args.pages.split(","))
+    needed = (max(pages) + 1) * args.limit
+    if needed > args.rows:
+        print(f"--rows {args.rows} is too few for page {max(pages)} of {args.limit}; need {needed}", file=sys.stderr)
+        return 2
+
+    dsn = to_async_url(settings.DATABASE_URL).replace("postgresql+asyncpg://", "postgresql://", 1)
+    admin = await asyncpg.connect(dsn)
+    engine = create_async_engine(
+        to_async_url(settings.DATABASE_URL),
+        connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+    try:
+        print(f"Loading {args.rows} transactions for the benchmarked user")
+        await admin.execute(SETUP_SQL.format(rows=args.rows))
+        await admin.execute(f"VACUUM ANALYZE {SCHEMA}.transactions")
+
+        async with make_session_factory(engine)() as db:
+            cursors = await collect_cursors(db, args.limit, pages)
+
+            print(f"{args.limit} rows per page, median of {args.repeat}")
+            print(f"{'page':>6} {'offset ms':>10} {'cursor ms':>10}")
+            cursor_ms: Dict[int, float] = {}
+            for page in pages:
+                offset = await median_ms(lambda: fetch_page(db, args.limit, offset=(page - 1) * args.limit), args.repeat)
+                cursor_ms[page] = await median_ms(lambda: fetch_page(db, args.limit, cursor=cursors[page]), args.repeat)
+                print(f"{page:>6} {offset:>10.2f} {cursor_ms[page]:>10.2f}")
+
+        ratio = cursor_ms[pages[-1]] / cursor_ms[pages[0]]
+        print(f"cursor page {pages[-1]} / page {pages[0]}: {ratio:.2f}x (limit {args.max_ratio:g}x)")
+        return 1 if ratio > args.max_ratio else 0
+    finally:
+        await engine.dispose()
+        await admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await admin.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare offset and cursor pagination of the transaction list")
+    parser.add_argument("--pages", default="1,10,100,1000", help="Comma-separated page numbers to time")
+    parser.add_argument("--limit", type=int, default=50, help="Rows per page")
+    parser.add_argument("--rows", type=int, default=60000, help="Transactions of the benchmarked user")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-ratio", type=float, default=3.0, help="Allowed deepest/first cursor page latency")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,376 @@
+"""
+Query plan regression check
+Runs every hot read statement of the API under EXPLAIN (ANALYZE, BUFFERS)
+on a scaled synthetic dataset and fails when one regresses: a sequential
+scan on a guarded table, or more shared buffers or execution time than
+its budget.
+
+Statements are captured from the application code as it runs (summary,
+wallet, budget, automation and chatbot queries), so an edit to their SQL is
+checked as written. Every view and materialized view with a user_id
+column is also queried for one user, which covers the views in
+database/*.sql, including ones added later.
+
+DATABASE_URL must point at a scratch database. --load creates the
+schema from database/*.sql in docker-compose order and fills it with
+synthetic data; it refuses a database that already has a transactions
+table. Budgets are set for the default scale: with far fewer rows the
+planner rightly prefers sequential scans.
+
+Usage (from backend/):
+    createdb finance_plans
+    export DATABASE_URL=postgresql://postgres@localhost/finance_plans
+    python -m benchmarks.plan_regression --load
+    python -m benchmarks.plan_regression
+    python -m benchmarks.plan_regression --only chatbot --verbose
+
+Exits with status 1 when any statement is over budget.
+"""
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import sys
+from datetime import date
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import asyncpg
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import make_engine, make_session_factory, to_async_url
+from app.routers.automation import get_upcoming_bills
+from app.routers.summary import fetch_category_summary, fetch_dashboard_summary, fetch_monthly_summary, fetch_timeseries
+from app.routers.wallets import fetch_wallets
+from app.services.budget_service import evaluate_budgets
+from app.services.chatbot_service import ChatbotService
+from app.utils.query_stats import normalize_sql
+
+SCHEMA_DIR = Path(__file__).resolve().parents[2] / "database"
+# docker-entrypoint-initdb.d order from docker-compose.yml, without the
+# demo rows of seed.sql, so a fresh init runs exactly as it does there
+SCHEMA_FILES = (
+    "init.sql",
+    "bi_views.sql",
+    "04-bills.sql",
+    "05-rollups.sql",
+    "06-bi-materialized.sql",
+    "07-period-columns.sql",
+    "08-hot-path-indexes.sql",
+    "09-wallet-balance-statement-trigger.sql",
+    "10-wallet-balance-ledger.sql",
+    "11-wallet-reconciliation.sql",
+    "12-transactions-created-at.sql",
+)
+
+# CREATE INDEX CONCURRENTLY cannot run inside the implicit transaction of
+# a multi-statement execute, so these run one statement at a time (they
+# have no function bodies, so statements end at a ';' ending a line)
+STATEMENT_FILES = ("08-hot-path-indexes.sql",)
+
+# A sequential scan of these in a per-user statement reads every user's rows
+GUARDED_TABLES = ("transactions", "transaction_monthly_rollup", "wallet_balance_deltas")
+
+EXPLAIN = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+_READ_STATEMENT = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+
+SYNTHETIC_DATA_SQL = """
+INSERT INTO users (email, password_hash, full_name)
+SELECT 'plan' || g || '@example.test', 'x', 'Plan User ' || g
+FROM generate_series(1, {users}) AS g;
+
+INSERT INTO wallets (user_id, name, balance)
+SELECT u.id, w.name, 0
+FROM users u
+CROSS JOIN (VALUES ('Cash'), ('Bank'), ('E-wallet')) AS w(name);
+
+WITH cats AS (
+    SELECT
+        ARRAY(SELECT id FROM categories WHERE user_id IS NULL AND type = 'expense' ORDER BY id) AS expense,
+        ARRAY(SELECT id FROM categories WHERE user_id IS NULL AND type = 'income' ORDER BY id) AS income
+)
+INSERT INTO transactions (user_id, wallet_id, category_id, type, amount, description, transaction_date, created_at)
+SELECT
+    s.user_id,
+    s.wallet_id,
+    CASE WHEN s.g % 10 = 0
+        THEN cats.income[1 + s.g % cardinality(cats.income)]
+        ELSE cats.expense[1 + s.g % cardinality(cats.expense)]
+    END,
+    CASE WHEN s.g % 10 = 0 THEN 'income' ELSE 'expense' END,
+    ROUND((10000 + random() * 2000000)::NUMERIC, 2),
+    'Synthetic transaction ' || s.g,
+    s.d,
+    s.d + (s.g % 86400) * INTERVAL '1 second'
+FROM (
+    SELECT w.user_id, w.id AS wallet_id, g, CURRENT_DATE - (random() * {days})::INTEGER AS d
+    FROM wallets w
+    CROSS JOIN generate_series(1, {per_wallet}) AS g
+) s
+CROSS JOIN cats;
+
+-- Every expense category budgeted for this month and the previous one
+INSERT INTO budgets (user_id, category_id, amount, month, year)
+SELECT u.id, c.id, 3000000, EXTRACT(MONTH FROM p.m)::INTEGER, EXTRACT(YEAR FROM p.m)::INTEGER
+FROM users u
+CROSS JOIN categories c
+CROSS JOIN (VALUES
+    (DATE_TRUNC('month', CURRENT_DATE)),
+    (DATE_TRUNC('month', CURRENT_DATE) - INTERVAL '1 month')
+) AS p(m)
+WHERE c.user_id IS NULL AND c.type = 'expense';
+
+INSERT INTO bills (user_id, wallet_id, category_id, name, amount, due_day)
+SELECT w.user_id, MIN(w.id), (SELECT MIN(id) FROM categories WHERE user_id IS NULL AND type = 'expense'),
+       'Electricity', 500000, 1 + w.user_id % 28
+FROM wallets w
+GROUP BY w.user_id;
+
+SELECT compact_wallet_balance_deltas(NULL);
+
+-- What the compactor leaves pending between runs: one recent write per wallet
+INSERT INTO transactions (user_id, wallet_id, category_id, type, amount, transaction_date)
+SELECT w.user_id, w.id, (SELECT MIN(id) FROM categories WHERE user_id IS NULL AND type = 'expense'),
+       'expense', 50000, CURRENT_DATE
+FROM wallets w;
+
+SELECT refresh_bi_materialized_view(view_name, TRUE) FROM bi_materialized_views;
+"""
+
+VIEWS_WITH_USER_ID_SQL = """
+    SELECT c.relname
+    FROM pg_class c
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    JOIN pg_attribute a ON a.attrelid = c.oid AND a.attname = 'user_id' AND NOT a.attisdropped
+    WHERE n.nspname = 'public' AND c.relkind IN ('v', 'm')
+    ORDER BY c.relname
+"""
+
+
+class Budget:
+    """
+    Limits for every statement of a case. A sequential scan on a
+    GUARDED_TABLES table fails unless the table is in allow_seq_scan;
+    reason says why an allowance or a raised limit is acceptable.
+    """
+
+    def __init__(
+        self,
+        max_buffers: int = 2000,
+        max_ms: float = 50.0,
+        allow_seq_scan: Sequence[str] = (),
+        reason: str = ""
+    ):
+        self.max_buffers = max_buffers
+        self.max_ms = max_ms
+        self.allow_seq_scan = tuple(allow_seq_scan)
+        self.reason = reason
+
+
+VIEW_BUDGET = Budget(max_buffers=5000, max_ms=100.0)
+
+# Views that need a budget of their own
+VIEW_BUDGETS: Dict[str, Budget] = {}
+
+CaseRun = Callable[[AsyncSession, int], Awaitable[Any]]
+
+
+def app_cases(today: date) -> List[Tuple[str, CaseRun, Budget]]:
+    """Application code paths whose statements are checked, with their budgets"""
+    year, month = today.year, today.month
+    year_start, year_end = date(year, 1, 1), date(year, 12, 31)
+    all_users = Budget(max_buffers=200000, max_ms=2000.0, reason="all users; grows with the month's budgets and bills")
+    return [
+        ("summary.dashboard", lambda db, uid: fetch_dashboard_summary(db, uid), Budget()),
+        ("summary.monthly", lambda db, uid: fetch_monthly_summary(db, uid, 12), Budget()),
+        ("summary.categories", lambda db, uid: fetch_category_summary(db, uid, "expense", year, month), Budget()),
+        ("summary.timeseries.rollup", lambda db, uid: fetch_timeseries(
+            db, uid, year_start, year_end, "month", "category"
+        ), Budget()),
+        ("summary.timeseries.transactions", lambda db, uid: fetch_timeseries(
+            db, uid, year_start, year_end, "week", "wallet"
+        ), Budget()),
+        ("wallets.list", lambda db, uid: fetch_wallets(db, uid), Budget()),
+        ("budgets.status", lambda db, uid: evaluate_budgets(db, year, month, user_id=uid), Budget()),
+        ("automation.budget_overruns", lambda db, uid: evaluate_budgets(db, year, month, exceeded_only=True), all_users),
+        ("automation.bills_upcoming", lambda db, uid: get_upcoming_bills(
+            month=f"{year}-{month:02d}", service_key=settings.N8N_SERVICE_KEY, db=db
+        ), all_users),
+        ("chatbot.income_vs_expense", lambda db, uid: ChatbotService(db).query_income_vs_expense(uid, year, month), Budget()),
+        ("chatbot.category_breakdown", lambda db, uid: ChatbotService(db).query_category_breakdown(uid, year, month), Budget()),
+        ("chatbot.budget_status", lambda db, uid: ChatbotService(db).query_budget_status(uid, year, month), Budget()),
+        ("chatbot.kpi_summary", lambda db, uid: ChatbotService(db).query_kpi_summary(uid), VIEW_BUDGET),
+        ("chatbot.wallet_balance", lambda db, uid: ChatbotService(db).query_wallet_balance(uid), Budget()),
+        ("chatbot.recent_transactions", lambda db, uid: ChatbotService(db).query_recent_transactions(uid), Budget()),
+        ("chatbot.monthly_summary", lambda db, uid: ChatbotService(db).query_monthly_summary(uid, year, month), Budget()),
+        ("chatbot.daily_summary", lambda db, uid: ChatbotService(db).query_daily_summary(uid, today), Budget()),
+        ("chatbot.monthly_trend", lambda db, uid: ChatbotService(db)._handle_monthly_trend(uid, year), Budget()),
+    ]
+
+
+def view_case(view: str) -> Tuple[str, CaseRun, Budget]:
+    async def run(db: AsyncSession, uid: int) -> None:
+        await db.execute(text(f"SELECT * FROM {view} WHERE user_id = :user_id"), {"user_id": uid})
+
+    return f"view.{view}", run, VIEW_BUDGETS.get(view, VIEW_BUDGET)
+
+
+class StatementRecorder:
+    """Records the read statements an engine runs while recording is on"""
+
+    def __init__(self, engine):
+        self.recording = False
+        self.statements: List[Tuple[str, Any]] = []
+        event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording and not executemany and _READ_STATEMENT.match(statement):
+            self.statements.append((statement, parameters))
+
+    def take(self) -> List[Tuple[str, Any]]:
+        statements, self.statements = self.statements, []
+        return statements
+
+
+def plan_nodes(node: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def check_plan(plan: Dict[str, Any], median_ms: float, budget: Budget) -> Tuple[List[str], List[str]]:
+    """(problems, allowed seq scans) of one EXPLAIN ANALYZE result"""
+    problems, allowed = [], []
+    for node in plan_nodes(plan["Plan"]):
+        relation = node.get("Relation Name")
+        if node["Node Type"] == "Seq Scan" and relation in GUARDED_TABLES:
+            (allowed if relation in budget.allow_seq_scan else problems).append(f"seq scan on {relation}")
+    root = plan["Plan"]
+    buffers = root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0)
+    if buffers > budget.max_buffers:
+        problems.append(f"{buffers} buffers > {budget.max_buffers}")
+    if median_ms > budget.max_ms:
+        problems.append(f"{median_ms:.1f} ms > {budget.max_ms:.0f} ms")
+    return problems, allowed
+
+
+def format_plan(node: Dict[str, Any], depth: int = 0) -> Iterable[str]:
+    target = node.get("Index Name") or node.get("Relation Name") or ""
+    yield (
+        f"{'  ' * depth}-> {node['Node Type']} {target}".rstrip()
+        + f"  rows={node.get('Actual Rows')} loops={node.get('Actual Loops')}"
+        + f" buffers={node.get('Shared Hit Blocks', 0) + node.get('Shared Read Blocks', 0)}"
+    )
+    for child in node.get("Plans", []):
+        yield from format_plan(child, depth + 1)
+
+
+async def explain(db: AsyncSession, statement: str, parameters: Any, repeat: int) -> Tuple[Dict[str, Any], float]:
+    """Plan of the last of repeat EXPLAIN ANALYZE runs and the median execution time"""
+    conn = await db.connection()
+    timings = []
+    for _ in range(repeat):
+        result = await conn.exec_driver_sql(EXPLAIN + statement, parameters)
+        document = result.scalar()
+        plan = (json.loads(document) if isinstance(document, str) else document)[0]
+        timings.append(plan["Execution Time"])
+    return plan, statistics.median(timings)
+
+
+async def check(args: argparse.Namespace) -> int:
+    engine = make_engine(settings.DATABASE_URL)
+    sessions = make_session_factory(engine)
+    recorder = StatementRecorder(engine)
+    failures = 0
+    try:
+        async with sessions() as db:
+            user_id = args.user_id or (await db.execute(text("SELECT MIN(id) FROM users"))).scalar()
+            views = (await db.execute(text(VIEWS_WITH_USER_ID_SQL))).scalars().all()
+        if user_id is None:
+            print("No users in the database; run with --load first", file=sys.stderr)
+            return 2
+
+        cases = app_cases(date.today()) + [view_case(view) for view in views]
+        for name, run, budget in cases:
+            if args.only and args.only not in name:
+                continue
+            async with sessions() as db:
+                recorder.recording = True
+                try:
+                    await run(db, user_id)
+                finally:
+                    recorder.recording = False
+                statements = recorder.take()
+                for index, (statement, parameters) in enumerate(statements, 1):
+                    plan, median_ms = await explain(db, statement, parameters, args.repeat)
+                    problems, allowed = check_plan(plan, median_ms, budget)
+                    root = plan["Plan"]
+                    buffers = root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0)
+                    label = f"{name}#{index}" if len(statements) > 1 else name
+                    notes = "; ".join(problems)
+                    if allowed:
+                        notes = "; ".join(filter(None, [notes, f"allowed {', '.join(allowed)}: {budget.reason}"]))
+                    print(f"{'FAIL' if problems else 'ok':<5}{label:<40}{median_ms:9.1f} ms{buffers:9} buffers  {notes}")
+                    if problems or args.verbose:
+                        print(f"     {normalize_sql(statement)[:300]}")
+                        for line in format_plan(root):
+                            print(f"     {line}")
+                    failures += bool(problems)
+                await db.rollback()
+    finally:
+        await engine.dispose()
+
+    print(f"\n{failures} statement(s) over budget" if failures else "\nAll statements within budget")
+    return 1 if failures else 0
+
+
+def split_statements(sql: str) -> List[str]:
+    """Statements of a file without function bodies, comments dropped"""
+    lines = [line for line in sql.splitlines() if not line.lstrip().startswith("--")]
+    return [statement.strip() for statement in re.split(r";\s*$", "\n".join(lines), flags=re.MULTILINE) if statement.strip()]
+
+
+async def load(args: argparse.Namespace) -> int:
+    dsn = to_async_url(settings.DATABASE_URL).replace("postgresql+asyncpg://", "postgresql://", 1)
+    conn = await asyncpg.connect(dsn)
+    try:
+        if await conn.fetchval("SELECT to_regclass('public.transactions')") is not None:
+            print("--load needs an empty scratch database; DATABASE_URL already has a transactions table", file=sys.stderr)
+            return 2
+        for name in SCHEMA_FILES:
+            print(f"Applying {name}")
+            sql = (args.schema_dir / name).read_text(encoding="utf-8")
+            for statement in split_statements(sql) if name in STATEMENT_FILES else [sql]:
+                await conn.execute(statement)
+
+        print(f"Loading {args.users} users, {args.users * 3 * args.per_wallet} transactions over {args.months} months")
+        await conn.execute(SYNTHETIC_DATA_SQL.format(
+            users=args.users, per_wallet=args.per_wallet, days=args.months * 30
+        ))
+        # Sets the visibility map too, so covering indexes are read index-only
+        await conn.execute("VACUUM ANALYZE")
+    finally:
+        await conn.close()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fail when a hot SQL statement's plan regresses")
+    parser.add_argument("--load", action="store_true", help="Create the schema and synthetic data, then exit")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--per-wallet", type=int, default=170, help="Transactions per wallet (3 wallets per user)")
+    parser.add_argument("--months", type=int, default=24, help="History spread over this many months")
+    parser.add_argument("--schema-dir", type=Path, default=SCHEMA_DIR)
+    parser.add_argument("--user-id", type=int, help="User the per-user statements run for (default: lowest id)")
+    parser.add_argument("--repeat", type=int, default=3, help="EXPLAIN ANALYZE runs per statement; the median time is checked")
+    parser.add_argument("--only", help="Only cases whose name contains this")
+    parser.add_argument("--verbose", action="store_true", help="Print every plan, not only failing ones")
+    args = parser.parse_args(argv)
+    return asyncio.run(load(args) if args.load else check(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
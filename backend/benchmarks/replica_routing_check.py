@@ -0,0 +1,86 @@
+"""
+Replica routing check
+Sends requests through the ASGI app and prints which engine ran the
+statements of each one, using the SessionRouter query hook.
+
+Works against two Postgres instances, or against one by pointing both
+URLs at the same database, which still yields two separate engines:
+
+    DATABASE_REPLICA_URL=$DATABASE_URL READ_YOUR_WRITES_SECONDS=5 \\
+        python -m benchmarks.replica_routing_check --user-id 1
+
+With --write a category is created and deleted between two reads, so
+the second read shows whether the read-your-writes window pinned it to
+the primary.
+
+Usage (from backend/):
+    python -m benchmarks.replica_routing_check --user-id 1
+    python -m benchmarks.replica_routing_check --user-id 1 --write
+"""
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from typing import List, Optional
+
+import httpx
+
+from app.config import settings
+from app.database import session_router
+from app.main import app
+from app.utils.security import create_access_token
+
+READ_PATHS = [
+    "/api/transactions",
+    "/api/wallets",
+    "/api/summary/dashboard",
+    "/api/budgets/status",
+]
+
+
+async def run(args: argparse.Namespace) -> None:
+    served: Counter = Counter()
+    session_router.add_query_listener(lambda role, statement: served.update([role]))
+
+    token = create_access_token({"sub": str(args.user_id)})
+    headers = {"Authorization": f"Bearer {token}"}
+    automation = {"service_key": settings.N8N_SERVICE_KEY}
+
+    async def call(method: str, path: str, **kwargs) -> httpx.Response:
+        served.clear()
+        response = await client.request(method, path, **kwargs)
+        roles = ", ".join(f"{role}={count}" for role, count in sorted(served.items())) or "no queries"
+        print(f"{method:<6} {path:<32} {response.status_code}  {roles}")
+        return response
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check", follow_redirects=True) as client:
+        for path in READ_PATHS:
+            await call("GET", path, headers=headers)
+        await call("GET", "/api/automation/budget/overruns", params=automation)
+        await call("POST", "/chatbot/query", json={"user_id": args.user_id, "question": "Số dư trong ví"})
+
+        if args.write:
+            created = await call(
+                "POST", "/api/categories",
+                headers=headers, json={"name": "replica-check", "type": "expense"}
+            )
+            if created.status_code == 201:
+                await call("GET", "/api/wallets", headers=headers)
+                await call("DELETE", f"/api/categories/{created.json()['id']}", headers=headers)
+
+    print(f"router: {session_router.stats()}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Show which engine serves each request")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--write", action="store_true", help="Also exercise the read-your-writes window")
+    args = parser.parse_args(argv)
+
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Transaction read statement-count check
+Asserts that GET /api/transactions and GET /api/transactions/{id} each
+run one statement, whatever the page size: category and wallet fields
+come from the joined projection, so no per-row or per-category lazy
+load may follow the main query.
+
+Runs the handlers on the scratch schema of benchmarks.pagination_benchmark
+(one user's history spread over 20 categories and 3 wallets) and counts
+the statements the engine executes during each call.
+
+Usage (from backend/):
+    python -m benchmarks.transaction_statement_check
+    python -m benchmarks.transaction_statement_check --limits 1,5,50,100
+
+Exits with status 1 when any request runs a different number of
+statements than expected.
+"""
+import argparse
+import asyncio
+import sys
+from typing import Awaitable, Callable, List, Optional
+
+import asyncpg
+from fastapi import Response
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.config import settings
+from app.database import make_session_factory, to_async_url
+from app.routers.transactions import get_transaction, get_transactions
+from benchmarks.pagination_benchmark import SCHEMA, SETUP_SQL, USER
+
+# Statements one list or detail request may run
+EXPECTED_STATEMENTS = 1
+
+
+async def run(args: argparse.Namespace) -> int:
+    limits = [int(n) for n in args.limits.split(",")]
+    dsn = to_async_url(settings.DATABASE_URL).replace("postgresql+asyncpg://", "postgresql://", 1)
+    admin = await asyncpg.connect(dsn)
+    engine = create_async_engine(
+        to_async_url(settings.DATABASE_URL),
+        connect_args={"server_settings": {"search_path": SCHEMA}}
+    )
+    statements: List[str] = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    try:
+        await admin.execute(SETUP_SQL.format(rows=max(limits) * 4))
+        failures = 0
+
+        async with make_session_factory(engine)() as db:
+            async def check(name: str, call: Callable[[], Awaitable[object]]) -> object:
+                nonlocal failures
+                statements.clear()
+                result = await call()
+                ok = len(statements) == EXPECTED_STATEMENTS
+                failures += not ok
+                print(f"{'ok  ' if ok else 'FAIL'} {name:<36} {len(statements)} statement(s)")
+                if not ok and args.verbose:
+                    for statement in statements:
+                        print(f"       {' '.join(statement.split())[:160]}")
+                return result
+
+            async def page(limit: int, cursor: Optional[str] = None, category_id: Optional[int] = None):
+                response = Response()
+                rows = await get_transactions(
+                    response=response, type=None, category_id=category_id, wallet_id=None,
+                    start_date=None, end_date=None, limit=limit, offset=0, cursor=cursor,
+                    current_user=USER, db=db
+                )
+                return rows, response.headers.get("X-Next-Cursor")
+
+            # The dialect's first-connect queries are not part of any request
+            await db.execute(text("SELECT 1"))
+
+            for limit in limits:
+                rows, cursor = await check(f"list limit={limit}", lambda: page(limit))
+                await check(f"list limit={limit} next page", lambda: page(limit, cursor))
+            await check("list category_id=1", lambda: page(max(limits), category_id=1))
+            await check("detail", lambda: get_transaction(transaction_id=rows[0].id, current_user=USER, db=db))
+
+        return 1 if failures else 0
+    finally:
+        await engine.dispose()
+        await admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await admin.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the statement count of transaction reads")
+    parser.add_argument("--limits", default="1,10,50,100", help="Comma-separated page sizes")
+    parser.add_argument("--verbose", action="store_true", help="Print the statements of failing requests")
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
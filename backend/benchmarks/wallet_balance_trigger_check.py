@@ -0,0 +1,221 @@
+"""
+Wallet balance trigger check
+Property test for the statement-level wallet balance triggers: each
+run executes random multi-row inserts, updates (moving rows between
+wallets, flipping their type, changing amounts, or only their
+description), deletes and ledger compactions, and after every statement
+asserts that each wallet's balance plus its pending deltas equals a
+model that applies the row-level rules one row at a time.
+
+--runs independent sequences are generated from consecutive seeds,
+each in its own transaction on DATABASE_URL that is rolled back at the
+end, so it can be pointed at a development database. Compactions fold
+the oldest deltas of any wallet and hold those wallet rows until the
+rollback, so do not run it against live traffic. A failure prints the
+seed and statement that reproduce it.
+
+Usage (from backend/):
+    python -m benchmarks.wallet_balance_trigger_check
+    python -m benchmarks.wallet_balance_trigger_check --statements 2000 --runs 50
+    python -m benchmarks.wallet_balance_trigger_check --runs 1 --seed 7   # reproduce one sequence
+    python -m benchmarks                                                 # with the other checks
+
+Exits with status 1 on the first mismatch.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import AsyncSessionLocal
+
+WALLETS = 4
+MAX_ROWS_PER_STATEMENT = 25
+
+# transaction id -> (wallet_id, type, amount)
+Rows = Dict[int, Tuple[int, str, Decimal]]
+
+
+def signed(type: str, amount: Decimal) -> Decimal:
+    return amount if type == "income" else -amount
+
+
+def expected_balances(opening: Dict[int, Decimal], rows: Rows) -> Dict[int, Decimal]:
+    """Balances the row-level trigger would have left: opening balance plus every row"""
+    balances = dict(opening)
+    for wallet_id, type, amount in rows.values():
+        balances[wallet_id] += signed(type, amount)
+    return balances
+
+
+class Checker:
+    def __init__(self, db: AsyncSession, rng: random.Random):
+        self.db = db
+        self.rng = rng
+        self.user_id: Optional[int] = None
+        self.rows: Rows = {}
+        self.wallets: List[int] = []
+        self.opening: Dict[int, Decimal] = {}
+        self.categories: Dict[str, int] = {}
+
+    async def setup(self) -> None:
+        self.user_id = user_id = (await self.db.execute(text("""
+            INSERT INTO users (email, password_hash, full_name)
+            VALUES (:email, 'x', 'Wallet trigger check')
+            RETURNING id
+        """), {"email": f"wallet-check-{uuid.uuid4().hex}@example.test"})).scalar()
+
+        for index in range(WALLETS):
+            opening = Decimal(self.rng.randrange(0, 10_000_000)) / 100
+            wallet_id = (await self.db.execute(text("""
+                INSERT INTO wallets (user_id, name, balance)
+                VALUES (:user_id, :name, :balance)
+                RETURNING id
+            """), {"user_id": user_id, "name": f"Wallet {index}", "balance": opening})).scalar()
+            self.wallets.append(wallet_id)
+            self.opening[wallet_id] = opening
+
+        for type in ("income", "expense"):
+            self.categories[type] = (await self.db.execute(text("""
+                SELECT MIN(id) FROM categories WHERE user_id IS NULL AND type = :type
+            """), {"type": type})).scalar()
+
+    def random_row(self) -> Tuple[int, str, Decimal]:
+        type = self.rng.choice(("income", "expense"))
+        amount = Decimal(self.rng.randrange(1, 5_000_000)) / 100
+        return self.rng.choice(self.wallets), type, amount
+
+    def sample_ids(self) -> List[int]:
+        return self.rng.sample(sorted(self.rows), self.rng.randint(1, min(len(self.rows), MAX_ROWS_PER_STATEMENT)))
+
+    async def insert(self) -> str:
+        new_rows = [self.random_row() for _ in range(self.rng.randint(1, MAX_ROWS_PER_STATEMENT))]
+        values, params = [], {"user_id": self.user_id}
+        for i, (wallet_id, type, amount) in enumerate(new_rows):
+            values.append(f"(:user_id, :w{i}, :c{i}, :t{i}, :a{i}, CURRENT_DATE)")
+            params.update({f"w{i}": wallet_id, f"c{i}": self.categories[type], f"t{i}": type, f"a{i}": amount})
+        result = await self.db.execute(text(f"""
+            INSERT INTO transactions (user_id, wallet_id, category_id, type, amount, transaction_date)
+            VALUES {", ".join(values)}
+            RETURNING id, wallet_id, type, amount
+        """), params)
+        for row in result:
+            self.rows[row.id] = (row.wallet_id, row.type, row.amount)
+        return f"insert {len(new_rows)} rows"
+
+    async def update(self) -> str:
+        ids = self.sample_ids()
+        changes = {transaction_id: self.random_row() for transaction_id in ids}
+        values, params = [], {}
+        for i, (transaction_id, (wallet_id, type, amount)) in enumerate(changes.items()):
+            values.append(
+                f"(CAST(:id{i} AS INTEGER), CAST(:w{i} AS INTEGER), CAST(:c{i} AS INTEGER), "
+                f"CAST(:t{i} AS VARCHAR), CAST(:a{i} AS NUMERIC))"
+            )
+            params.update({
+                f"id{i}": transaction_id, f"w{i}": wallet_id, f"c{i}": self.categories[type],
+                f"t{i}": type, f"a{i}": amount,
+            })
+        await self.db.execute(text(f"""
+            UPDATE transactions t
+            SET wallet_id = v.wallet_id, category_id = v.category_id, type = v.type, amount = v.amount
+            FROM (VALUES {", ".join(values)}) AS v(id, wallet_id, category_id, type, amount)
+            WHERE t.id = v.id
+        """), params)
+        self.rows.update(changes)
+        return f"update {len(ids)} rows"
+
+    async def touch(self) -> str:
+        """An update that changes no balance (nets to zero for every wallet)"""
+        ids = self.sample_ids()
+        await self.db.execute(
+            text("UPDATE transactions SET description = 'edited' WHERE id = ANY(:ids)"),
+            {"ids": ids}
+        )
+        return f"edit description of {len(ids)} rows"
+
+    async def delete(self) -> str:
+        ids = self.sample_ids()
+        await self.db.execute(text("DELETE FROM transactions WHERE id = ANY(:ids)"), {"ids": ids})
+        for transaction_id in ids:
+            del self.rows[transaction_id]
+        return f"delete {len(ids)} rows"
+
+    async def compact(self) -> str:
+        """Fold some of the pending deltas; must not change any balance"""
+        batch_size = self.rng.randint(1, 50)
+        folded = (await self.db.execute(
+            text("SELECT compact_wallet_balance_deltas(:batch_size)"), {"batch_size": batch_size}
+        )).scalar()
+        return f"compact {folded} deltas"
+
+    async def balances(self) -> Dict[int, Decimal]:
+        """Balance plus pending deltas, as the API reads it"""
+        result = await self.db.execute(
+            text("SELECT wallet_id, current_balance FROM v_wallet_balance WHERE wallet_id = ANY(:ids)"),
+            {"ids": self.wallets}
+        )
+        return {row.wallet_id: row.current_balance for row in result}
+
+    async def step(self) -> str:
+        if len(self.rows) < MAX_ROWS_PER_STATEMENT:
+            return await self.insert()
+        operation = self.rng.choices(
+            (self.insert, self.update, self.touch, self.delete, self.compact), weights=(3, 3, 1, 2, 1)
+        )[0]
+        return await operation()
+
+
+class BalanceMismatch(AssertionError):
+    pass
+
+
+async def check_sequence(seed: int, statements: int) -> int:
+    """Run one random sequence, rolled back at the end; returns the rows left"""
+    async with AsyncSessionLocal() as db:
+        try:
+            checker = Checker(db, random.Random(seed))
+            await checker.setup()
+            for number in range(1, statements + 1):
+                description = await checker.step()
+                expected = expected_balances(checker.opening, checker.rows)
+                actual = await checker.balances()
+                if actual != expected:
+                    raise BalanceMismatch(
+                        f"seed {seed}, statement {number} ({description}) "
+                        f"left balances {actual}, expected {expected}"
+                    )
+            return len(checker.rows)
+        finally:
+            await db.rollback()
+
+
+async def run(args: argparse.Namespace) -> int:
+    for seed in range(args.seed, args.seed + args.runs):
+        try:
+            rows = await check_sequence(seed, args.statements)
+        except BalanceMismatch as exc:
+            print(f"FAIL {exc}")
+            return 1
+        print(f"ok   seed {seed}: {args.statements} statements, {rows} rows left")
+    print(f"{args.runs} sequences: balances match row-level semantics after every statement")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the wallet balance triggers against row-level semantics")
+    parser.add_argument("--statements", type=int, default=500, help="Statements per sequence")
+    parser.add_argument("--runs", type=int, default=20, help="Sequences, seeded --seed, --seed + 1, ...")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+"""
+Wallet ledger benchmark
+Insert throughput into shared wallets as the number of concurrent
+clients grows, with the balance trigger updating the wallet row (the
+previous behaviour: every writer queues on the row lock until the one
+ahead of it commits) and appending to wallet_balance_deltas while a
+compactor folds them in the background.
+
+Inserts also fire the monthly rollup trigger of database/05-rollups.sql,
+as they do in the app. Its upsert row-locks one transaction_monthly_rollup
+row per (user, month, category, type), so writers to the same category
+still queue on that lock whichever wallet trigger runs: the ledger only
+removes the wallet row lock. --categories spreads writes over more
+rollup rows, and --no-rollup measures the wallet triggers alone. (The
+opening balance trigger of 11-wallet-reconciliation.sql fires on wallet
+inserts only, not on transactions.)
+
+Runs in a scratch schema on DATABASE_URL that is dropped at the end,
+with the INSERT path of both trigger bodies and of
+update_transaction_rollup(), and a copy of
+compact_wallet_balance_deltas() from database/init.sql. After every run
+it checks that balance plus pending deltas matches the transactions.
+
+Usage (from backend/):
+    python -m benchmarks.wallet_ledger_benchmark
+    python -m benchmarks.wallet_ledger_benchmark --clients 1,8,32,64 --seconds 20
+    python -m benchmarks.wallet_ledger_benchmark --statements 5   # n8n-style multi-insert transactions
+    python -m benchmarks.wallet_ledger_benchmark --categories 20  # writers spread over 20 rollup rows
+    python -m benchmarks.wallet_ledger_benchmark --no-rollup      # wallet triggers only
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+
+from app.config import settings
+from app.database import to_async_url
+
+SCHEMA = "bench_ledger"
+
+SETUP_SQL = """
+DROP SCHEMA IF EXISTS bench_ledger CASCADE;
+CREATE SCHEMA bench_ledger;
+SET search_path = bench_ledger;
+
+CREATE TABLE wallets (
+    id SERIAL PRIMARY KEY,
+    balance DECIMAL(15, 2) DEFAULT 0
+);
+INSERT INTO wallets (balance) SELECT 0 FROM generate_series(1, {wallets});
+
+-- Every writer is the same user writing in the current month
+CREATE TABLE transactions (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL DEFAULT 1,
+    wallet_id INTEGER NOT NULL REFERENCES wallets(id),
+    category_id INTEGER NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    amount DECIMAL(15, 2) NOT NULL,
+    transaction_date DATE NOT NULL DEFAULT CURRENT_DATE,
+    year INTEGER GENERATED ALWAYS AS (EXTRACT(YEAR FROM transaction_date)::INTEGER) STORED,
+    month INTEGER GENERATED ALWAYS AS (EXTRACT(MONTH FROM transaction_date)::INTEGER) STORED
+);
+
+CREATE TABLE transaction_monthly_rollup (
+    user_id INTEGER NOT NULL,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    total_amount NUMERIC NOT NULL DEFAULT 0,
+    transaction_count BIGINT NOT NULL DEFAULT 0,
+    max_amount DECIMAL(15, 2),
+    PRIMARY KEY (user_id, year, month, category_id, type)
+);
+
+CREATE TABLE wallet_balance_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    wallet_id INTEGER NOT NULL REFERENCES wallets(id) ON DELETE CASCADE,
+    delta DECIMAL(15, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX ON wallet_balance_deltas(wallet_id) INCLUDE (delta);
+
+-- INSERT path of update_wallet_balance() before the ledger
+CREATE FUNCTION update_wallet_row()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE wallets w
+    SET balance = w.balance + d.delta
+    FROM (
+        SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END) AS delta
+        FROM new_rows
+        GROUP BY wallet_id
+    ) d
+    WHERE w.id = d.wallet_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- INSERT path of update_wallet_balance() in database/init.sql
+CREATE FUNCTION append_wallet_delta()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO wallet_balance_deltas (wallet_id, delta)
+    SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END)
+    FROM new_rows
+    GROUP BY wallet_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- INSERT path of update_transaction_rollup() in database/05-rollups.sql
+CREATE FUNCTION update_transaction_rollup()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO transaction_monthly_rollup AS r
+        (user_id, year, month, category_id, type, total_amount, transaction_count, max_amount)
+    SELECT user_id, year, month, category_id, type, SUM(amount), COUNT(*), MAX(amount)
+    FROM new_rows
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (user_id, year, month, category_id, type) DO UPDATE
+    SET total_amount = r.total_amount + EXCLUDED.total_amount,
+        transaction_count = r.transaction_count + EXCLUDED.transaction_count,
+        max_amount = GREATEST(r.max_amount, EXCLUDED.max_amount);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Same body as compact_wallet_balance_deltas() in database/init.sql
+CREATE FUNCTION compact_wallet_balance_deltas(p_batch_size INTEGER DEFAULT 50000)
+RETURNS INTEGER AS $$
+DECLARE
+    v_folded INTEGER;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('compact_wallet_balance_deltas')) THEN
+        RETURN 0;
+    END IF;
+
+    WITH folded AS (
+        DELETE FROM wallet_balance_deltas
+        WHERE id IN (
+            SELECT id FROM wallet_balance_deltas ORDER BY id LIMIT p_batch_size
+        )
+        RETURNING wallet_id, delta
+    ), totals AS (
+        SELECT wallet_id, SUM(delta) AS delta, COUNT(*) AS deltas
+        FROM folded
+        GROUP BY wallet_id
+    ), applied AS (
+        UPDATE wallets w
+        SET balance = w.balance + t.delta
+        FROM totals t
+        WHERE w.id = t.wallet_id
+        RETURNING t.deltas
+    )
+    SELECT COALESCE(SUM(deltas), 0) INTO v_folded FROM applied;
+
+    RETURN v_folded;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+MODES = {
+    "update": "update_wallet_row",
+    "ledger": "append_wallet_delta",
+}
+
+RESET_SQL = """
+DROP TRIGGER IF EXISTS trg_bench_wallet_balance ON transactions;
+DROP TRIGGER IF EXISTS trg_bench_rollup ON transactions;
+TRUNCATE transactions, wallet_balance_deltas, transaction_monthly_rollup RESTART IDENTITY;
+UPDATE wallets SET balance = 0;
+CREATE TRIGGER trg_bench_wallet_balance
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION {function}();
+"""
+
+ROLLUP_TRIGGER_SQL = """
+CREATE TRIGGER trg_bench_rollup
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_transaction_rollup();
+"""
+
+INSERT_SQL = "INSERT INTO transactions (wallet_id, category_id, type, amount) VALUES ($1, $2, $3, $4)"
+
+# Wallets whose balance plus pending deltas differs from their transactions
+MISMATCH_SQL = """
+SELECT COUNT(*)
+FROM wallets w
+WHERE w.balance
+      + COALESCE((SELECT SUM(d.delta) FROM wallet_balance_deltas d WHERE d.wallet_id = w.id), 0)
+   <> COALESCE((
+          SELECT SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE -t.amount END)
+          FROM transactions t
+          WHERE t.wallet_id = w.id
+      ), 0)
+"""
+
+
+async def writer(
+    conn: asyncpg.Connection,
+    rng: random.Random,
+    wallets: int,
+    categories: int,
+    statements: int,
+    deadline: float
+) -> Tuple[int, List[float]]:
+    """Insert until deadline, statements per transaction; returns rows and transaction latencies (ms)"""
+    rows, latencies = 0, []
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        async with conn.transaction():
+            for _ in range(statements):
+                type = "income" if rng.random() < 0.1 else "expense"
+                await conn.execute(
+                    INSERT_SQL, rng.randint(1, wallets), rng.randint(1, categories), type,
+                    Decimal(rng.randrange(1000, 500000))
+                )
+        latencies.append((time.perf_counter() - start) * 1000)
+        rows += statements
+    return rows, latencies
+
+
+async def compactor(conn: asyncpg.Connection, interval: float, batch_size: int, stop: asyncio.Event) -> int:
+    """Fold deltas every interval seconds until stop is set, as CompactionScheduler does"""
+    folded = 0
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+        while True:
+            batch = await conn.fetchval("SELECT compact_wallet_balance_deltas($1)", batch_size)
+            folded += batch
+            if batch < batch_size:
+                break
+    return folded
+
+
+async def run_once(
+    admin: asyncpg.Connection,
+    connections: List[asyncpg.Connection],
+    mode: str,
+    clients: int,
+    args: argparse.Namespace
+) -> Tuple[float, float, float, int]:
+    """Rows per second, p50 and p99 transaction latency, and mismatched wallets"""
+    await admin.execute(RESET_SQL.format(function=MODES[mode]))
+    if args.rollup:
+        await admin.execute(ROLLUP_TRIGGER_SQL)
+    # Each run starts without the previous run's dead wallet row versions
+    await admin.execute("VACUUM ANALYZE wallets")
+
+    stop = asyncio.Event()
+    compaction = None
+    if mode == "ledger":
+        compaction = asyncio.create_task(compactor(admin, args.compact_interval, args.batch_size, stop))
+
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    results = await asyncio.gather(*(
+        writer(conn, random.Random(args.seed + i), args.wallets, args.categories, args.statements, deadline)
+        for i, conn in enumerate(connections[:clients])
+    ))
+    elapsed = time.perf_counter() - start
+
+    if compaction is not None:
+        stop.set()
+        await compaction
+    mismatched = await admin.fetchval(MISMATCH_SQL)
+
+    rows = sum(r for r, _ in results)
+    latencies = sorted(latency for _, batch in results for latency in batch)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return rows / elapsed, statistics.median(latencies), p99, mismatched
+
+
+async def run(args: argparse.Namespace) -> int:
+    client_counts = [int(n) for n in args.clients.split(",")]
+    dsn = to_async_url(settings.DATABASE_URL).replace("postgresql+asyncpg://", "postgresql://", 1)
+    server_settings = {"search_path": SCHEMA}
+
+    admin = await asyncpg.connect(dsn)
+    connections: List[asyncpg.Connection] = []
+    try:
+        await admin.execute(SETUP_SQL.format(wallets=args.wallets))
+        connections = [
+            await asyncpg.connect(dsn, server_settings=server_settings)
+            for _ in range(max(client_counts))
+        ]
+
+        print(f"{args.wallets} shared wallet(s), {args.statements} insert(s) per transaction, {args.seconds:g} s per run")
+        if args.rollup:
+            print(f"Rollup trigger on, {args.categories} category(ies): writers to one category still share its rollup row lock")
+        else:
+            print("Rollup trigger off: wallet triggers only, not the app's full insert path")
+        print(f"{'clients':>7}  {'mode':<6} {'rows/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        throughput: Dict[Tuple[str, int], float] = {}
+        failures = 0
+        for clients in client_counts:
+            for mode in MODES:
+                rate, p50, p99, mismatched = await run_once(admin, connections, mode, clients, args)
+                throughput[mode, clients] = rate
+                note = f"  {mismatched} mismatched wallet(s)" if mismatched else ""
+                print(f"{clients:>7}  {mode:<6} {rate:>9.0f} {p50:>8.1f} {p99:>8.1f}{note}")
+                failures += bool(mismatched)
+            print(f"{'':>7}  ledger / update: {throughput['ledger', clients] / throughput['update', clients]:.2f}x")
+
+        base = client_counts[0]
+        for mode in MODES:
+            scaling = ", ".join(
+                f"{clients}: {throughput[mode, clients] / throughput[mode, base]:.1f}x" for clients in client_counts
+            )
+            print(f"{mode} scaling vs {base} client(s): {scaling}")
+        return 1 if failures else 0
+    finally:
+        for conn in connections:
+            await conn.close()
+        await admin.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await admin.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare wallet balance insert throughput with and without the delta ledger")
+    parser.add_argument("--clients", default="1,2,4,8,16,32", help="Comma-separated concurrent client counts")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each run")
+    parser.add_argument("--wallets", type=int, default=1, help="Wallets the clients write to, shared by all of them")
+    parser.add_argument("--categories", type=int, default=1, help="Categories the clients write to (rollup rows they share)")
+    parser.add_argument("--no-rollup", dest="rollup", action="store_false", help="Leave out the monthly rollup trigger")
+    parser.add_argument("--statements", type=int, default=1, help="Single-row INSERTs per transaction")
+    parser.add_argument("--compact-interval", type=float, default=1.0, help="Seconds between compactions in ledger runs")
+    parser.add_argument("--batch-size", type=int, default=settings.WALLET_COMPACT_BATCH_SIZE)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
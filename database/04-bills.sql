@@ -21,7 +21,9 @@ CREATE TABLE IF NOT EXISTS bills (
 
 CREATE INDEX IF NOT EXISTS idx_bills_user ON bills(user_id);
 CREATE INDEX IF NOT EXISTS idx_bills_due_day ON bills(due_day);
-CREATE INDEX IF NOT EXISTS idx_bills_active ON bills(is_active);
+-- Reminders read active bills ordered by user and due day
+CREATE INDEX IF NOT EXISTS idx_bills_user_active
+    ON bills(user_id, due_day) WHERE is_active = TRUE;
 
 -- ============================================
 -- View: Upcoming Bills for a Month
@@ -0,0 +1,305 @@
+-- ============================================
+-- Personal Finance BI System - Monthly Rollup
+-- Incrementally maintained aggregates for dashboards
+-- ============================================
+
+-- ============================================
+-- 1. ROLLUP TABLE
+-- ============================================
+
+-- One row per (user, month, category, type); kept in sync by triggers
+CREATE TABLE IF NOT EXISTS transaction_monthly_rollup (
+    user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    year INTEGER NOT NULL,
+    month INTEGER NOT NULL CHECK (month BETWEEN 1 AND 12),
+    category_id INTEGER NOT NULL,
+    type VARCHAR(10) NOT NULL CHECK (type IN ('income', 'expense')),
+    total_amount NUMERIC NOT NULL DEFAULT 0,
+    transaction_count BIGINT NOT NULL DEFAULT 0,
+    max_amount DECIMAL(15, 2),
+    PRIMARY KEY (user_id, year, month, category_id, type)
+);
+
+-- ============================================
+-- 2. TRIGGER: Keep rollup in sync (statement-level)
+-- ============================================
+
+CREATE OR REPLACE FUNCTION update_transaction_rollup()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        -- Subtract removed rows
+        UPDATE transaction_monthly_rollup r
+        SET total_amount = r.total_amount - d.total_amount,
+            transaction_count = r.transaction_count - d.transaction_count
+        FROM (
+            SELECT
+                user_id,
+                year,
+                month,
+                category_id,
+                type,
+                SUM(amount) AS total_amount,
+                COUNT(*) AS transaction_count
+            FROM old_rows
+            GROUP BY 1, 2, 3, 4, 5
+        ) d
+        WHERE r.user_id = d.user_id
+          AND r.year = d.year
+          AND r.month = d.month
+          AND r.category_id = d.category_id
+          AND r.type = d.type;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        -- Add new rows
+        INSERT INTO transaction_monthly_rollup AS r
+            (user_id, year, month, category_id, type, total_amount, transaction_count, max_amount)
+        SELECT
+            user_id,
+            year,
+            month,
+            category_id,
+            type,
+            SUM(amount),
+            COUNT(*),
+            MAX(amount)
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4, 5
+        ON CONFLICT (user_id, year, month, category_id, type) DO UPDATE
+        SET total_amount = r.total_amount + EXCLUDED.total_amount,
+            transaction_count = r.transaction_count + EXCLUDED.transaction_count,
+            max_amount = GREATEST(r.max_amount, EXCLUDED.max_amount);
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        -- Drop emptied groups
+        DELETE FROM transaction_monthly_rollup r
+        USING (
+            SELECT DISTINCT
+                user_id,
+                year,
+                month,
+                category_id,
+                type
+            FROM old_rows
+        ) d
+        WHERE r.user_id = d.user_id
+          AND r.year = d.year
+          AND r.month = d.month
+          AND r.category_id = d.category_id
+          AND r.type = d.type
+          AND r.transaction_count <= 0;
+
+        -- MAX cannot be decremented; recompute it where a removed row held it
+        UPDATE transaction_monthly_rollup r
+        SET max_amount = (
+            SELECT MAX(t.amount)
+            FROM transactions t
+            WHERE t.user_id = r.user_id
+              AND t.transaction_date >= MAKE_DATE(r.year, r.month, 1)
+              AND t.transaction_date < MAKE_DATE(r.year, r.month, 1) + INTERVAL '1 month'
+              AND t.category_id = r.category_id
+              AND t.type = r.type
+        )
+        FROM (
+            SELECT
+                user_id,
+                year,
+                month,
+                category_id,
+                type,
+                MAX(amount) AS removed_max
+            FROM old_rows
+            GROUP BY 1, 2, 3, 4, 5
+        ) d
+        WHERE r.user_id = d.user_id
+          AND r.year = d.year
+          AND r.month = d.month
+          AND r.category_id = d.category_id
+          AND r.type = d.type
+          AND d.removed_max >= r.max_amount;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_transaction_rollup_insert ON transactions;
+CREATE TRIGGER trg_transaction_rollup_insert
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_transaction_rollup();
+
+DROP TRIGGER IF EXISTS trg_transaction_rollup_update ON transactions;
+CREATE TRIGGER trg_transaction_rollup_update
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_transaction_rollup();
+
+DROP TRIGGER IF EXISTS trg_transaction_rollup_delete ON transactions;
+CREATE TRIGGER trg_transaction_rollup_delete
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_transaction_rollup();
+
+-- ============================================
+-- 3. BACKFILL & CONSISTENCY CHECK
+-- ============================================
+
+-- Full recompute of the rollup; blocks transaction writes while it runs
+CREATE OR REPLACE FUNCTION rebuild_transaction_rollup()
+RETURNS BIGINT AS $$
+DECLARE
+    rebuilt_rows BIGINT;
+BEGIN
+    LOCK TABLE transactions IN SHARE MODE;
+    DELETE FROM transaction_monthly_rollup;
+
+    INSERT INTO transaction_monthly_rollup
+        (user_id, year, month, category_id, type, total_amount, transaction_count, max_amount)
+    SELECT
+        user_id,
+        year,
+        month,
+        category_id,
+        type,
+        SUM(amount),
+        COUNT(*),
+        MAX(amount)
+    FROM transactions
+    GROUP BY 1, 2, 3, 4, 5;
+
+    GET DIAGNOSTICS rebuilt_rows = ROW_COUNT;
+    RETURN rebuilt_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Groups where the rollup disagrees with a full recompute (empty = consistent)
+CREATE OR REPLACE FUNCTION check_transaction_rollup()
+RETURNS TABLE (
+    user_id INTEGER,
+    year INTEGER,
+    month INTEGER,
+    category_id INTEGER,
+    type VARCHAR(10),
+    expected_total NUMERIC,
+    actual_total NUMERIC,
+    expected_count BIGINT,
+    actual_count BIGINT,
+    expected_max NUMERIC,
+    actual_max NUMERIC
+) AS $$
+    WITH expected AS (
+        SELECT
+            t.user_id,
+            t.year,
+            t.month,
+            t.category_id,
+            t.type,
+            SUM(t.amount) AS total_amount,
+            COUNT(*) AS transaction_count,
+            MAX(t.amount) AS max_amount
+        FROM transactions t
+        GROUP BY 1, 2, 3, 4, 5
+    )
+    SELECT
+        COALESCE(e.user_id, r.user_id),
+        COALESCE(e.year, r.year),
+        COALESCE(e.month, r.month),
+        COALESCE(e.category_id, r.category_id),
+        COALESCE(e.type, r.type),
+        e.total_amount,
+        r.total_amount,
+        e.transaction_count,
+        r.transaction_count,
+        e.max_amount,
+        r.max_amount
+    FROM expected e
+    FULL OUTER JOIN transaction_monthly_rollup r
+        ON e.user_id = r.user_id
+       AND e.year = r.year
+       AND e.month = r.month
+       AND e.category_id = r.category_id
+       AND e.type = r.type
+    WHERE e.total_amount IS DISTINCT FROM r.total_amount
+       OR e.transaction_count IS DISTINCT FROM r.transaction_count
+       OR e.max_amount IS DISTINCT FROM r.max_amount;
+$$ LANGUAGE sql STABLE;
+
+-- Backfill rows inserted before the triggers existed (e.g. seed data)
+SELECT rebuild_transaction_rollup();
+
+-- ============================================
+-- 4. ANALYTICAL VIEWS READ FROM THE ROLLUP
+-- ============================================
+
+-- View: Monthly Summary (same columns as init.sql, served from the rollup)
+CREATE OR REPLACE VIEW v_monthly_summary AS
+SELECT
+    r.user_id,
+    r.year,
+    r.month,
+    MAKE_DATE(r.year, r.month, 1) AS month_start,
+    r.type,
+    SUM(r.transaction_count)::BIGINT AS transaction_count,
+    SUM(r.total_amount) AS total_amount,
+    SUM(r.total_amount) / NULLIF(SUM(r.transaction_count), 0) AS avg_amount,
+    MAX(r.max_amount) AS max_amount
+FROM transaction_monthly_rollup r
+GROUP BY r.user_id, r.year, r.month, r.type;
+
+-- View: Category Breakdown (same columns as init.sql, served from the rollup)
+CREATE OR REPLACE VIEW v_category_breakdown AS
+SELECT
+    r.user_id,
+    r.year,
+    r.month,
+    r.type,
+    c.id AS category_id,
+    c.name AS category_name,
+    c.icon AS category_icon,
+    c.color AS category_color,
+    r.transaction_count,
+    r.total_amount,
+    ROUND(
+        r.total_amount * 100.0 /
+        NULLIF(SUM(r.total_amount) OVER (PARTITION BY r.user_id, r.type, r.year, r.month), 0)
+    , 2) AS percentage
+FROM transaction_monthly_rollup r
+JOIN categories c ON r.category_id = c.id;
+
+-- View: Budget vs Actual (same columns as init.sql, served from the rollup)
+CREATE OR REPLACE VIEW v_budget_vs_actual AS
+SELECT
+    b.user_id,
+    b.year,
+    b.month,
+    b.category_id,
+    c.name AS category_name,
+    c.icon AS category_icon,
+    c.color AS category_color,
+    b.amount AS budget_amount,
+    COALESCE(r.total_amount, 0) AS actual_spent,
+    b.amount - COALESCE(r.total_amount, 0) AS remaining,
+    ROUND(COALESCE(r.total_amount, 0) * 100.0 / NULLIF(b.amount, 0), 2) AS usage_percentage,
+    CASE
+        WHEN COALESCE(r.total_amount, 0) >= b.amount THEN 'exceeded'
+        WHEN COALESCE(r.total_amount, 0) >= b.amount * 0.8 THEN 'warning'
+        ELSE 'safe'
+    END AS status
+FROM budgets b
+JOIN categories c ON b.category_id = c.id
+LEFT JOIN transaction_monthly_rollup r ON r.user_id = b.user_id
+    AND r.year = b.year
+    AND r.month = b.month
+    AND r.category_id = b.category_id
+    AND r.type = 'expense';
+
+-- Grant permissions
+GRANT SELECT ON transaction_monthly_rollup TO superset_readonly;
+GRANT SELECT ON transaction_monthly_rollup TO n8n_readonly;
+
+-- ============================================
+-- Monthly Rollup Complete!
+-- ============================================
@@ -0,0 +1,211 @@
+-- ============================================
+-- Personal Finance BI System - Materialized BI Views
+-- Precomputed copies of the heaviest Phase 3 views
+-- ============================================
+
+-- The mv_* views select from their live v_* counterpart, so bi_views.sql
+-- stays the single definition. Each has a unique index so it can be
+-- refreshed CONCURRENTLY without blocking readers.
+
+-- ============================================
+-- 1. MATERIALIZED VIEWS
+-- ============================================
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_kpi_summary AS
+SELECT * FROM v_kpi_summary;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_kpi_summary
+    ON mv_kpi_summary (user_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_user_financial_health AS
+SELECT * FROM v_user_financial_health;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_user_financial_health
+    ON mv_user_financial_health (user_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_expense_forecast AS
+SELECT * FROM v_expense_forecast;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_expense_forecast
+    ON mv_expense_forecast (user_id, year, month);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_category_growth AS
+SELECT * FROM v_category_growth;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_category_growth
+    ON mv_category_growth (user_id, category_id, year, month);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_monthly_cashflow AS
+SELECT * FROM v_monthly_cashflow;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_mv_monthly_cashflow
+    ON mv_monthly_cashflow (user_id, year, month);
+
+-- ============================================
+-- 2. REFRESH BOOKKEEPING
+-- ============================================
+
+-- One row per materialized view. source_version is the sum of the
+-- insert/update/delete counters of its source tables when it was last
+-- refreshed; a different current sum means the sources changed.
+-- Views that depend on CURRENT_DATE are also stale after midnight.
+CREATE TABLE IF NOT EXISTS bi_materialized_views (
+    view_name TEXT PRIMARY KEY,
+    live_view TEXT NOT NULL,
+    source_tables TEXT[] NOT NULL,
+    depends_on_date BOOLEAN NOT NULL DEFAULT FALSE,
+    source_version BIGINT,
+    refreshed_at TIMESTAMPTZ,
+    refresh_ms NUMERIC
+);
+
+INSERT INTO bi_materialized_views (view_name, live_view, source_tables, depends_on_date) VALUES
+    ('mv_kpi_summary', 'v_kpi_summary', ARRAY['users', 'transactions', 'budgets', 'wallets', 'categories'], TRUE),
+    ('mv_user_financial_health', 'v_user_financial_health', ARRAY['users', 'transactions', 'budgets', 'wallets', 'categories'], TRUE),
+    ('mv_expense_forecast', 'v_expense_forecast', ARRAY['transactions'], FALSE),
+    ('mv_category_growth', 'v_category_growth', ARRAY['transactions', 'categories'], FALSE),
+    ('mv_monthly_cashflow', 'v_monthly_cashflow', ARRAY['transactions'], FALSE)
+ON CONFLICT (view_name) DO UPDATE
+SET live_view = EXCLUDED.live_view,
+    source_tables = EXCLUDED.source_tables,
+    depends_on_date = EXCLUDED.depends_on_date;
+
+-- The ledger compactor updates wallets every few seconds, which would
+-- make every view reading wallets look stale on every pass. Those
+-- updates only fold deltas into balance, and the views report balance
+-- plus pending deltas, so nothing they show changes. Wallets are
+-- counted by this sequence instead, bumped by every write except
+-- balance-only updates. Balances themselves follow transactions; a
+-- reconciliation repair (deltas only) shows up on the next refresh.
+CREATE SEQUENCE IF NOT EXISTS bi_wallet_changes;
+
+CREATE OR REPLACE FUNCTION count_wallet_bi_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NOT EXISTS (
+        SELECT 1
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id
+        WHERE to_jsonb(n) - 'balance' IS DISTINCT FROM to_jsonb(o) - 'balance'
+    ) THEN
+        RETURN NULL;
+    END IF;
+    PERFORM nextval('bi_wallet_changes');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_wallets_bi_change_insert ON wallets;
+CREATE TRIGGER trg_wallets_bi_change_insert
+    AFTER INSERT ON wallets
+    FOR EACH STATEMENT EXECUTE FUNCTION count_wallet_bi_change();
+
+DROP TRIGGER IF EXISTS trg_wallets_bi_change_update ON wallets;
+CREATE TRIGGER trg_wallets_bi_change_update
+    AFTER UPDATE ON wallets
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION count_wallet_bi_change();
+
+DROP TRIGGER IF EXISTS trg_wallets_bi_change_delete ON wallets;
+CREATE TRIGGER trg_wallets_bi_change_delete
+    AFTER DELETE ON wallets
+    FOR EACH STATEMENT EXECUTE FUNCTION count_wallet_bi_change();
+
+-- Write counters of a set of tables. Read from the statistics system,
+-- so detecting changes adds nothing to the write path. The counters
+-- trail commits by up to a second, so a write that lands right before
+-- a refresh is picked up by the next one. A stats reset changes the
+-- sum too, which only costs one extra refresh. They are per server:
+-- call this on the primary, not on a replica. wallets is read from
+-- bi_wallet_changes (see above).
+CREATE OR REPLACE FUNCTION bi_source_version(p_tables TEXT[])
+RETURNS BIGINT AS $$
+    SELECT (
+        COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0)
+        + CASE WHEN 'wallets' = ANY(p_tables) THEN (SELECT last_value FROM bi_wallet_changes) ELSE 0 END
+    )::BIGINT
+    FROM pg_stat_user_tables
+    WHERE schemaname = 'public' AND relname = ANY(p_tables) AND relname <> 'wallets';
+$$ LANGUAGE sql STABLE;
+
+-- ============================================
+-- 3. REFRESH
+-- ============================================
+
+-- Refresh one materialized view if its sources changed (or p_force).
+-- Returns TRUE when it refreshed. A refresh already running in another
+-- session makes this a no-op instead of queueing behind it.
+CREATE OR REPLACE FUNCTION refresh_bi_materialized_view(p_view TEXT, p_force BOOLEAN DEFAULT FALSE)
+RETURNS BOOLEAN AS $$
+DECLARE
+    mv bi_materialized_views%ROWTYPE;
+    current_version BIGINT;
+    started TIMESTAMPTZ;
+BEGIN
+    SELECT * INTO mv FROM bi_materialized_views WHERE view_name = p_view;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Unknown materialized view: %', p_view;
+    END IF;
+
+    IF NOT pg_try_advisory_xact_lock(hashtext('refresh_bi_materialized_view'), hashtext(p_view)) THEN
+        RETURN FALSE;
+    END IF;
+
+    -- Read the version first: writes during the refresh trigger another one
+    current_version := bi_source_version(mv.source_tables);
+    IF NOT p_force
+       AND mv.refreshed_at IS NOT NULL
+       AND mv.source_version = current_version
+       AND NOT (mv.depends_on_date AND mv.refreshed_at::DATE < CURRENT_DATE) THEN
+        RETURN FALSE;
+    END IF;
+
+    started := clock_timestamp();
+    EXECUTE format('REFRESH MATERIALIZED VIEW CONCURRENTLY %I', p_view);
+
+    UPDATE bi_materialized_views
+    SET source_version = current_version,
+        refreshed_at = started,
+        refresh_ms = ROUND(EXTRACT(EPOCH FROM clock_timestamp() - started) * 1000, 1)
+    WHERE view_name = p_view;
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Freshness of every materialized view, for the API and Superset
+CREATE OR REPLACE VIEW v_bi_freshness AS
+SELECT
+    view_name,
+    live_view,
+    refreshed_at,
+    refresh_ms,
+    source_version IS DISTINCT FROM bi_source_version(source_tables)
+        OR (depends_on_date AND refreshed_at::DATE < CURRENT_DATE) AS stale
+FROM bi_materialized_views;
+
+-- Mark the data loaded by CREATE MATERIALIZED VIEW as current
+UPDATE bi_materialized_views
+SET source_version = bi_source_version(source_tables),
+    refreshed_at = NOW()
+WHERE refreshed_at IS NULL;
+
+-- ============================================
+-- Grant permissions
+-- ============================================
+
+GRANT SELECT ON mv_kpi_summary TO superset_readonly;
+GRANT SELECT ON mv_user_financial_health TO superset_readonly;
+GRANT SELECT ON mv_expense_forecast TO superset_readonly;
+GRANT SELECT ON mv_category_growth TO superset_readonly;
+GRANT SELECT ON mv_monthly_cashflow TO superset_readonly;
+GRANT SELECT ON bi_materialized_views TO superset_readonly;
+GRANT SELECT ON v_bi_freshness TO superset_readonly;
+GRANT SELECT ON SEQUENCE bi_wallet_changes TO superset_readonly;
+
+GRANT SELECT ON mv_kpi_summary TO n8n_readonly;
+GRANT SELECT ON mv_user_financial_health TO n8n_readonly;
+GRANT SELECT ON mv_expense_forecast TO n8n_readonly;
+GRANT SELECT ON mv_category_growth TO n8n_readonly;
+GRANT SELECT ON mv_monthly_cashflow TO n8n_readonly;
+GRANT SELECT ON bi_materialized_views TO n8n_readonly;
+GRANT SELECT ON v_bi_freshness TO n8n_readonly;
+GRANT SELECT ON SEQUENCE bi_wallet_changes TO n8n_readonly;
+
+-- ============================================
+-- Materialized BI Views Complete!
+-- ============================================
@@ -0,0 +1,28 @@
+-- ============================================
+-- Personal Finance BI System - Period Columns
+-- Stored year / month / period_start on transactions
+-- ============================================
+
+-- Fresh databases get these columns and the index from init.sql; this
+-- file upgrades an existing one. Adding stored generated columns
+-- rewrites the table under an ACCESS EXCLUSIVE lock, so run it in a
+-- maintenance window, then reload bi_views.sql, 05-rollups.sql and
+-- 06-bi-materialized.sql so the views and triggers use the columns.
+
+ALTER TABLE transactions
+    ADD COLUMN IF NOT EXISTS year INTEGER
+        GENERATED ALWAYS AS (EXTRACT(YEAR FROM transaction_date)::INTEGER) STORED,
+    ADD COLUMN IF NOT EXISTS month INTEGER
+        GENERATED ALWAYS AS (EXTRACT(MONTH FROM transaction_date)::INTEGER) STORED,
+    ADD COLUMN IF NOT EXISTS period_start DATE
+        GENERATED ALWAYS AS (DATE_TRUNC('month', transaction_date::TIMESTAMP)::DATE) STORED;
+
+-- Covers per-period aggregates: a month of one user is one index range, read index-only
+CREATE INDEX IF NOT EXISTS idx_transactions_user_period
+    ON transactions(user_id, period_start, type, category_id) INCLUDE (amount);
+
+ANALYZE transactions;
+
+-- ============================================
+-- Period Columns Complete!
+-- ============================================
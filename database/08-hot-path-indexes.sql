@@ -0,0 +1,61 @@
+-- ============================================
+-- Personal Finance BI System - Hot Path Indexes
+-- Covering and partial indexes for the API's read paths
+-- ============================================
+
+-- Fresh databases get these indexes from init.sql and 04-bills.sql;
+-- this file upgrades an existing one. Indexes are built and dropped
+-- CONCURRENTLY so writes keep flowing, which means this file must run
+-- statement by statement (psql -f, not psql -1 or a single transaction).
+-- New indexes are created before the ones they replace are dropped.
+-- v_wallet_balance reads idx_transactions_wallet per wallet in its
+-- current definition, installed by 10-wallet-balance-ledger.sql; this
+-- file leaves views alone so it is a no-op on a fresh database.
+-- Measured by scripts/bench_hot_path_indexes.sql.
+
+-- ============================================
+-- 1. TRANSACTIONS
+-- ============================================
+
+-- List endpoint ordering, plus the columns day and date-range sums need.
+-- Replaces idx_transactions_user_list, and makes idx_transactions_user
+-- and idx_transactions_user_date (both left prefixes of it) redundant.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_user_list_covering
+    ON transactions(user_id, transaction_date DESC, created_at DESC, id DESC)
+    INCLUDE (type, amount, category_id);
+
+-- Per-wallet statistics (v_wallet_balance, v_wallet_analytics) and the
+-- ON DELETE RESTRICT check of wallets, which had no index to use
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_wallet
+    ON transactions(wallet_id) INCLUDE (type, amount, transaction_date);
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_user_list;
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_user_date;
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_user;
+-- Two distinct values: never selective enough to beat a scan, paid on every insert
+DROP INDEX CONCURRENTLY IF EXISTS idx_transactions_type;
+
+-- ============================================
+-- 2. WALLETS, CATEGORIES, BILLS
+-- ============================================
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_wallets_user_active
+    ON wallets(user_id, created_at) WHERE is_active = TRUE;
+-- unique_wallet_name_per_user (user_id, name) already serves user_id lookups
+DROP INDEX CONCURRENTLY IF EXISTS idx_wallets_user;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_categories_active
+    ON categories(user_id, type, name) WHERE is_active = TRUE;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_bills_user_active
+    ON bills(user_id, due_day) WHERE is_active = TRUE;
+DROP INDEX CONCURRENTLY IF EXISTS idx_bills_active;
+
+ANALYZE transactions;
+ANALYZE wallets;
+ANALYZE categories;
+ANALYZE bills;
+
+-- ============================================
+-- Hot Path Indexes Complete!
+-- ============================================
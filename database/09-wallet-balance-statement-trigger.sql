@@ -0,0 +1,104 @@
+-- ============================================
+-- Personal Finance BI System - Statement-level Wallet Balance Trigger
+-- Replaces the row-level trg_update_wallet_balance
+-- ============================================
+
+-- Fresh databases get this from init.sql; this file upgrades an existing
+-- one. The swap runs in one transaction, so every write is counted by
+-- exactly one of the two triggers. Balances carry over unchanged.
+-- A database that already has the ledger (init.sql, or after
+-- 10-wallet-balance-ledger.sql) keeps its update_wallet_balance().
+-- Benchmark: scripts/bench_wallet_balance_trigger.sql
+-- Equivalence check: python -m benchmarks.wallet_balance_trigger_check
+
+BEGIN;
+
+-- One UPDATE per affected wallet per statement, with the deltas of all
+-- its rows summed, so a batch of N rows into one wallet touches the
+-- wallet row once instead of N times
+DO $upgrade$
+BEGIN
+    IF to_regclass('wallet_balance_deltas') IS NOT NULL THEN
+        RETURN;
+    END IF;
+
+    EXECUTE $function$
+        CREATE OR REPLACE FUNCTION update_wallet_balance()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            -- Maintenance jobs that set balances themselves can opt out
+            IF current_setting('app.skip_wallet_balance', true) = 'on' THEN
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP = 'INSERT' THEN
+                UPDATE wallets w
+                SET balance = w.balance + d.delta
+                FROM (
+                    SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END) AS delta
+                    FROM new_rows
+                    GROUP BY wallet_id
+                ) d
+                WHERE w.id = d.wallet_id;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE wallets w
+                SET balance = w.balance + d.delta
+                FROM (
+                    SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN -amount ELSE amount END) AS delta
+                    FROM old_rows
+                    GROUP BY wallet_id
+                ) d
+                WHERE w.id = d.wallet_id;
+            ELSE
+                -- Revert the old rows and apply the new ones; rows moved between
+                -- wallets or types net out per wallet, and wallets whose total is
+                -- unchanged (e.g. description edits) are not touched
+                UPDATE wallets w
+                SET balance = w.balance + d.delta
+                FROM (
+                    SELECT wallet_id, SUM(delta) AS delta
+                    FROM (
+                        SELECT wallet_id, CASE WHEN type = 'income' THEN amount ELSE -amount END AS delta
+                        FROM new_rows
+                        UNION ALL
+                        SELECT wallet_id, CASE WHEN type = 'income' THEN -amount ELSE amount END
+                        FROM old_rows
+                    ) changes
+                    GROUP BY wallet_id
+                    HAVING SUM(delta) <> 0
+                ) d
+                WHERE w.id = d.wallet_id;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    $function$;
+END
+$upgrade$;
+
+-- The row-level trigger it replaces
+DROP TRIGGER IF EXISTS trg_update_wallet_balance ON transactions;
+
+DROP TRIGGER IF EXISTS trg_wallet_balance_insert ON transactions;
+CREATE TRIGGER trg_wallet_balance_insert
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_wallet_balance();
+
+DROP TRIGGER IF EXISTS trg_wallet_balance_update ON transactions;
+CREATE TRIGGER trg_wallet_balance_update
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_wallet_balance();
+
+DROP TRIGGER IF EXISTS trg_wallet_balance_delete ON transactions;
+CREATE TRIGGER trg_wallet_balance_delete
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_wallet_balance();
+
+COMMIT;
+
+-- ============================================
+-- Statement-level Wallet Balance Trigger Complete!
+-- ============================================
@@ -0,0 +1,154 @@
+-- ============================================
+-- Personal Finance BI System - Wallet Balance Ledger
+-- The balance triggers append deltas instead of updating wallets
+-- ============================================
+
+-- Fresh databases get this from init.sql; this file upgrades an existing
+-- one (and re-applies the trigger function over the one in
+-- 09-wallet-balance-statement-trigger.sql). Existing balances are already
+-- folded, so the ledger starts empty. The swap runs in one transaction,
+-- so every write either updates its wallet or appends a delta.
+-- Benchmark: python -m benchmarks.wallet_ledger_benchmark
+-- Equivalence check: python -m benchmarks.wallet_balance_trigger_check
+
+BEGIN;
+
+-- ============================================
+-- 1. LEDGER TABLE
+-- ============================================
+
+-- Rows are short-lived, so autovacuum runs on a fixed number of dead rows
+CREATE TABLE IF NOT EXISTS wallet_balance_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    wallet_id INTEGER NOT NULL REFERENCES wallets(id) ON DELETE CASCADE,
+    delta DECIMAL(15, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) WITH (autovacuum_vacuum_scale_factor = 0, autovacuum_vacuum_threshold = 10000);
+
+-- Pending deltas of one wallet
+CREATE INDEX IF NOT EXISTS idx_wallet_balance_deltas_wallet
+    ON wallet_balance_deltas(wallet_id) INCLUDE (delta);
+
+-- ============================================
+-- 2. TRIGGER FUNCTION AND COMPACTION
+-- ============================================
+
+-- Same definitions as init.sql; the statement-level triggers keep calling
+-- update_wallet_balance()
+CREATE OR REPLACE FUNCTION update_wallet_balance()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- Maintenance jobs that set balances themselves can opt out
+    IF current_setting('app.skip_wallet_balance', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO wallet_balance_deltas (wallet_id, delta)
+        SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END)
+        FROM new_rows
+        GROUP BY wallet_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO wallet_balance_deltas (wallet_id, delta)
+        SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN -amount ELSE amount END)
+        FROM old_rows
+        GROUP BY wallet_id;
+    ELSE
+        -- Revert the old rows and apply the new ones; rows moved between
+        -- wallets or types net out per wallet, and wallets whose total is
+        -- unchanged (e.g. description edits) get no delta
+        INSERT INTO wallet_balance_deltas (wallet_id, delta)
+        SELECT wallet_id, SUM(delta)
+        FROM (
+            SELECT wallet_id, CASE WHEN type = 'income' THEN amount ELSE -amount END AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT wallet_id, CASE WHEN type = 'income' THEN -amount ELSE amount END
+            FROM old_rows
+        ) changes
+        GROUP BY wallet_id
+        HAVING SUM(delta) <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Fold the oldest deltas into wallets.balance, deleting them in the same
+-- transaction; returns the number folded, 0 while another compaction runs
+CREATE OR REPLACE FUNCTION compact_wallet_balance_deltas(p_batch_size INTEGER DEFAULT 50000)
+RETURNS INTEGER AS $$
+DECLARE
+    v_folded INTEGER;
+BEGIN
+    -- Two compactions updating the same wallets in different orders could
+    -- deadlock; writers never take this lock
+    IF NOT pg_try_advisory_xact_lock(hashtext('compact_wallet_balance_deltas')) THEN
+        RETURN 0;
+    END IF;
+
+    WITH folded AS (
+        DELETE FROM wallet_balance_deltas
+        WHERE id IN (
+            SELECT id FROM wallet_balance_deltas ORDER BY id LIMIT p_batch_size
+        )
+        RETURNING wallet_id, delta
+    ), totals AS (
+        SELECT wallet_id, SUM(delta) AS delta, COUNT(*) AS deltas
+        FROM folded
+        GROUP BY wallet_id
+    ), applied AS (
+        UPDATE wallets w
+        SET balance = w.balance + t.delta
+        FROM totals t
+        WHERE w.id = t.wallet_id
+        RETURNING t.deltas
+    )
+    SELECT COALESCE(SUM(deltas), 0) INTO v_folded FROM applied;
+
+    RETURN v_folded;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- 3. WALLET BALANCE VIEW
+-- ============================================
+
+-- Same definition as init.sql: the balance includes pending deltas
+CREATE OR REPLACE VIEW v_wallet_balance AS
+SELECT 
+    w.id AS wallet_id,
+    w.user_id,
+    w.name AS wallet_name,
+    w.icon AS wallet_icon,
+    w.currency,
+    -- Cast keeps the column's original type, so CREATE OR REPLACE VIEW
+    -- works over the definitions it replaces
+    (w.balance + COALESCE(pending.delta, 0))::DECIMAL(15, 2) AS current_balance,
+    COALESCE(stats.total_income, 0) AS total_income,
+    COALESCE(stats.total_expense, 0) AS total_expense,
+    COALESCE(stats.transaction_count, 0) AS transaction_count,
+    stats.last_transaction_date
+FROM wallets w
+-- Per wallet, so filtering on user_id only reads that user's wallets
+LEFT JOIN LATERAL (
+    SELECT 
+        SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END) AS total_income,
+        SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END) AS total_expense,
+        COUNT(*) AS transaction_count,
+        MAX(t.transaction_date) AS last_transaction_date
+    FROM transactions t
+    WHERE t.wallet_id = w.id
+) stats ON TRUE
+-- Deltas not yet folded into w.balance
+LEFT JOIN LATERAL (
+    SELECT SUM(d.delta) AS delta
+    FROM wallet_balance_deltas d
+    WHERE d.wallet_id = w.id
+) pending ON TRUE
+WHERE w.is_active = TRUE;
+
+COMMIT;
+
+-- ============================================
+-- Wallet Balance Ledger Complete!
+-- ============================================
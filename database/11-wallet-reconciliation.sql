@@ -0,0 +1,173 @@
+-- ============================================
+-- Personal Finance BI System - Wallet Balance Reconciliation
+-- Recomputes balances from transactions and records drift
+-- ============================================
+
+-- Balances are only ever changed incrementally, by the ledger triggers
+-- and compaction. reconcile_wallet_balances() checks them against
+-- opening_balance + SUM(transactions) for a range of users; the backend's
+-- reconciliation job (app/services/wallet_reconciliation_service.py) runs
+-- it over every user in chunks, each in its own short transaction.
+-- Benchmark: scripts/bench_wallet_reconciliation.sql
+
+-- ============================================
+-- 1. OPENING BALANCE
+-- ============================================
+
+-- Fresh databases get the column and its trigger from init.sql. Existing
+-- wallets are assumed correct today: their opening balance is what is
+-- left after taking their transactions out of balance + pending deltas.
+-- Compaction is held off meanwhile, so balance and deltas are read as one
+BEGIN;
+
+ALTER TABLE wallets ADD COLUMN IF NOT EXISTS opening_balance DECIMAL(15, 2);
+
+SELECT pg_advisory_xact_lock(hashtext('compact_wallet_balance_deltas'));
+
+UPDATE wallets w
+SET opening_balance = COALESCE(w.balance, 0)
+    + COALESCE((SELECT SUM(d.delta) FROM wallet_balance_deltas d WHERE d.wallet_id = w.id), 0)
+    - COALESCE((
+        SELECT SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE -t.amount END)
+        FROM transactions t
+        WHERE t.wallet_id = w.id
+    ), 0)
+WHERE w.opening_balance IS NULL;
+
+ALTER TABLE wallets ALTER COLUMN opening_balance SET NOT NULL;
+
+-- Same definition as init.sql
+CREATE OR REPLACE FUNCTION set_wallet_opening_balance()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.opening_balance := COALESCE(NEW.opening_balance, NEW.balance, 0);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_wallet_opening_balance ON wallets;
+CREATE TRIGGER trg_wallet_opening_balance
+    BEFORE INSERT ON wallets
+    FOR EACH ROW EXECUTE FUNCTION set_wallet_opening_balance();
+
+COMMIT;
+
+-- ============================================
+-- 2. RUNS AND DRIFT
+-- ============================================
+
+-- One row per reconciliation run; counters grow as chunks commit, so a
+-- run without finished_at is in progress or was interrupted
+CREATE TABLE IF NOT EXISTS wallet_reconciliation_runs (
+    id SERIAL PRIMARY KEY,
+    repair BOOLEAN NOT NULL DEFAULT FALSE,
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    wallets_checked INTEGER NOT NULL DEFAULT 0,
+    drifted_wallets INTEGER NOT NULL DEFAULT 0
+);
+
+-- Every wallet found drifted: balance (including pending deltas) as
+-- stored, and as recomputed. drift is what a repair adds
+CREATE TABLE IF NOT EXISTS wallet_balance_drift (
+    id BIGSERIAL PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES wallet_reconciliation_runs(id) ON DELETE CASCADE,
+    wallet_id INTEGER NOT NULL REFERENCES wallets(id) ON DELETE CASCADE,
+    user_id INTEGER NOT NULL,
+    stored_balance DECIMAL(15, 2) NOT NULL,
+    expected_balance DECIMAL(15, 2) NOT NULL,
+    drift DECIMAL(15, 2) GENERATED ALWAYS AS (expected_balance - stored_balance) STORED,
+    repaired BOOLEAN NOT NULL DEFAULT FALSE,
+    detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_wallet_balance_drift_run ON wallet_balance_drift(run_id);
+CREATE INDEX IF NOT EXISTS idx_wallet_balance_drift_wallet ON wallet_balance_drift(wallet_id, detected_at DESC);
+
+-- ============================================
+-- 3. RECONCILE
+-- ============================================
+
+-- Check the wallets of users p_user_from <= user_id < p_user_to in one
+-- statement: each wallet's transactions are summed index-only through
+-- idx_transactions_wallet, and stored and expected balances come from the
+-- same snapshot, so concurrent writes and compactions never show up as
+-- drift. Nothing is locked: with p_repair the correction is appended to
+-- wallet_balance_deltas like any other balance change.
+CREATE OR REPLACE FUNCTION reconcile_wallet_balances(
+    p_run_id INTEGER,
+    p_user_from INTEGER,
+    p_user_to INTEGER,
+    p_repair BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (checked_wallets INTEGER, drifted_wallets INTEGER) AS $$
+BEGIN
+    -- Two overlapping repairing runs would both append the same correction
+    IF p_repair THEN
+        PERFORM pg_advisory_xact_lock(hashtext('reconcile_wallet_balances'));
+    END IF;
+
+    WITH checked AS (
+        SELECT
+            w.id AS wallet_id,
+            w.user_id AS owner_id,
+            COALESCE(w.balance, 0) + COALESCE(pending.delta, 0) AS stored,
+            w.opening_balance + COALESCE(stats.net, 0) AS expected
+        FROM wallets w
+        LEFT JOIN LATERAL (
+            SELECT SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE -t.amount END) AS net
+            FROM transactions t
+            WHERE t.wallet_id = w.id
+        ) stats ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT SUM(d.delta) AS delta
+            FROM wallet_balance_deltas d
+            WHERE d.wallet_id = w.id
+        ) pending ON TRUE
+        WHERE w.user_id >= p_user_from AND w.user_id < p_user_to
+    ), drifted AS (
+        SELECT * FROM checked WHERE stored <> expected
+    ), repaired AS (
+        INSERT INTO wallet_balance_deltas (wallet_id, delta)
+        SELECT wallet_id, expected - stored
+        FROM drifted
+        WHERE p_repair
+    ), recorded AS (
+        INSERT INTO wallet_balance_drift (run_id, wallet_id, user_id, stored_balance, expected_balance, repaired)
+        SELECT p_run_id, wallet_id, owner_id, stored, expected, p_repair
+        FROM drifted
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM checked), (SELECT COUNT(*) FROM recorded)
+    INTO checked_wallets, drifted_wallets;
+
+    UPDATE wallet_reconciliation_runs r
+    SET wallets_checked = r.wallets_checked + reconcile_wallet_balances.checked_wallets,
+        drifted_wallets = r.drifted_wallets + reconcile_wallet_balances.drifted_wallets
+    WHERE r.id = p_run_id;
+
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Wallets found drifted by the most recent finished run
+CREATE OR REPLACE VIEW v_wallet_balance_drift AS
+SELECT
+    d.run_id,
+    d.wallet_id,
+    d.user_id,
+    w.name AS wallet_name,
+    d.stored_balance,
+    d.expected_balance,
+    d.drift,
+    d.repaired,
+    d.detected_at
+FROM wallet_balance_drift d
+JOIN wallets w ON w.id = d.wallet_id
+WHERE d.run_id = (
+    SELECT MAX(id) FROM wallet_reconciliation_runs WHERE finished_at IS NOT NULL
+);
+
+-- ============================================
+-- Wallet Balance Reconciliation Complete!
+-- ============================================
@@ -0,0 +1,25 @@
+-- ============================================
+-- Personal Finance BI System - transactions.created_at NOT NULL
+-- The list cursor is (transaction_date, created_at, id)
+-- ============================================
+
+-- Fresh databases get the constraint from init.sql; this file upgrades
+-- an existing one. A row with a NULL created_at could not be encoded
+-- into a cursor, and the row-value seek predicate skipped it. Missing
+-- values are backfilled with the start of their transaction day, which
+-- keeps them in date order. NOT NULL is proven by a CHECK validated
+-- without blocking writes, so SET NOT NULL does not rescan the table.
+
+UPDATE transactions
+SET created_at = transaction_date::TIMESTAMP
+WHERE created_at IS NULL;
+
+ALTER TABLE transactions
+    ADD CONSTRAINT transactions_created_at_not_null CHECK (created_at IS NOT NULL) NOT VALID;
+ALTER TABLE transactions VALIDATE CONSTRAINT transactions_created_at_not_null;
+ALTER TABLE transactions ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE transactions DROP CONSTRAINT transactions_created_at_not_null;
+
+-- ============================================
+-- transactions.created_at NOT NULL Complete!
+-- ============================================
@@ -257,18 +257,18 @@ WITH monthly_category AS (
         c.name AS category_name,
         c.type AS category_type,
         c.color AS category_color,
-        EXTRACT(YEAR FROM t.transaction_date)::INTEGER AS year,
-        EXTRACT(MONTH FROM t.transaction_date)::INTEGER AS month,
-        DATE_TRUNC('month', t.transaction_date)::DATE AS month_start,
+        t.year,
+        t.month,
+        t.period_start AS month_start,
         COUNT(*) AS transaction_count,
         SUM(t.amount) AS total_amount
     FROM transactions t
     JOIN categories c ON t.category_id = c.id
     GROUP BY 
         t.user_id, c.id, c.name, c.type, c.color,
-        EXTRACT(YEAR FROM t.transaction_date),
-        EXTRACT(MONTH FROM t.transaction_date),
-        DATE_TRUNC('month', t.transaction_date)
+        t.year,
+        t.month,
+        t.period_start
 )
 SELECT 
     *,
@@ -290,9 +290,9 @@ CREATE OR REPLACE VIEW v_top_categories AS
 WITH category_totals AS (
     SELECT 
         t.user_id,
-        EXTRACT(YEAR FROM t.transaction_date)::INTEGER AS year,
-        EXTRACT(MONTH FROM t.transaction_date)::INTEGER AS month,
-        DATE_TRUNC('month', t.transaction_date)::DATE AS month_start,
+        t.year,
+        t.month,
+        t.period_start AS month_start,
         c.id AS category_id,
         c.name AS category_name,
         c.color AS category_color,
@@ -304,9 +304,9 @@ WITH category_totals AS (
     JOIN categories c ON t.category_id = c.id
     GROUP BY 
         t.user_id,
-        EXTRACT(YEAR FROM t.transaction_date),
-        EXTRACT(MONTH FROM t.transaction_date),
-        DATE_TRUNC('month', t.transaction_date),
+        t.year,
+        t.month,
+        t.period_start,
         c.id, c.name, c.color, c.icon, t.type
 )
 SELECT 
@@ -481,9 +481,14 @@ WITH user_metrics AS (
         GROUP BY user_id
     ) ba ON u.id = ba.user_id
     LEFT JOIN (
-        SELECT user_id, SUM(balance) AS total_balance
-        FROM wallets WHERE is_active = TRUE
-        GROUP BY user_id
+        -- Balance plus pending ledger deltas, as v_wallet_balance reports it
+        SELECT w.user_id, SUM(w.balance + COALESCE(p.delta, 0)) AS total_balance
+        FROM wallets w
+        LEFT JOIN (
+            SELECT wallet_id, SUM(delta) AS delta FROM wallet_balance_deltas GROUP BY wallet_id
+        ) p ON p.wallet_id = w.id
+        WHERE w.is_active = TRUE
+        GROUP BY w.user_id
     ) wb ON u.id = wb.user_id
     LEFT JOIN (
         SELECT user_id, COUNT(DISTINCT category_id) AS category_diversity
@@ -560,12 +565,12 @@ CREATE OR REPLACE VIEW v_expense_forecast AS
 WITH monthly_expenses AS (
     SELECT 
         user_id,
-        EXTRACT(YEAR FROM transaction_date)::INTEGER AS year,
-        EXTRACT(MONTH FROM transaction_date)::INTEGER AS month,
+        year,
+        month,
         SUM(amount) AS total_expense
     FROM transactions
     WHERE type = 'expense'
-    GROUP BY user_id, EXTRACT(YEAR FROM transaction_date), EXTRACT(MONTH FROM transaction_date)
+    GROUP BY user_id, year, month
 )
 SELECT 
     user_id,
@@ -678,9 +683,14 @@ LEFT JOIN (
     GROUP BY user_id
 ) bk ON u.id = bk.user_id
 LEFT JOIN (
-    SELECT user_id, SUM(balance) AS total_balance, COUNT(*) AS active_wallets
-    FROM wallets WHERE is_active = TRUE
-    GROUP BY user_id
+    -- Balance plus pending ledger deltas, as v_wallet_balance reports it
+    SELECT w.user_id, SUM(w.balance + COALESCE(p.delta, 0)) AS total_balance, COUNT(*) AS active_wallets
+    FROM wallets w
+    LEFT JOIN (
+        SELECT wallet_id, SUM(delta) AS delta FROM wallet_balance_deltas GROUP BY wallet_id
+    ) p ON p.wallet_id = w.id
+    WHERE w.is_active = TRUE
+    GROUP BY w.user_id
 ) wk ON u.id = wk.user_id;
 
 -- ============================================
@@ -691,35 +701,35 @@ CREATE OR REPLACE VIEW v_transaction_comparison AS
 SELECT 
     t.user_id,
     t.type,
-    EXTRACT(YEAR FROM t.transaction_date)::INTEGER AS year,
-    EXTRACT(MONTH FROM t.transaction_date)::INTEGER AS month,
-    TO_CHAR(t.transaction_date, 'YYYY-MM') AS period,
+    t.year,
+    t.month,
+    TO_CHAR(t.period_start, 'YYYY-MM') AS period,
     COUNT(*) AS transaction_count,
     SUM(t.amount) AS total_amount,
     AVG(t.amount) AS avg_amount,
     
     -- Previous period data
-    LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type, EXTRACT(MONTH FROM t.transaction_date) ORDER BY EXTRACT(YEAR FROM t.transaction_date)) AS same_month_last_year,
-    LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type ORDER BY EXTRACT(YEAR FROM t.transaction_date), EXTRACT(MONTH FROM t.transaction_date)) AS previous_month,
+    LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type, t.month ORDER BY t.year) AS same_month_last_year,
+    LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type ORDER BY t.year, t.month) AS previous_month,
     
     -- YoY change
     CASE 
-        WHEN LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type, EXTRACT(MONTH FROM t.transaction_date) ORDER BY EXTRACT(YEAR FROM t.transaction_date)) > 0
-        THEN ROUND((SUM(t.amount) - LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type, EXTRACT(MONTH FROM t.transaction_date) ORDER BY EXTRACT(YEAR FROM t.transaction_date))) * 100.0 /
-            LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type, EXTRACT(MONTH FROM t.transaction_date) ORDER BY EXTRACT(YEAR FROM t.transaction_date)), 2)
+        WHEN LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type, t.month ORDER BY t.year) > 0
+        THEN ROUND((SUM(t.amount) - LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type, t.month ORDER BY t.year)) * 100.0 /
+            LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type, t.month ORDER BY t.year), 2)
         ELSE NULL
     END AS yoy_change_pct,
     
     -- MoM change
     CASE 
-        WHEN LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type ORDER BY EXTRACT(YEAR FROM t.transaction_date), EXTRACT(MONTH FROM t.transaction_date)) > 0
-        THEN ROUND((SUM(t.amount) - LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type ORDER BY EXTRACT(YEAR FROM t.transaction_date), EXTRACT(MONTH FROM t.transaction_date))) * 100.0 /
-            LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type ORDER BY EXTRACT(YEAR FROM t.transaction_date), EXTRACT(MONTH FROM t.transaction_date)), 2)
+        WHEN LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type ORDER BY t.year, t.month) > 0
+        THEN ROUND((SUM(t.amount) - LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type ORDER BY t.year, t.month)) * 100.0 /
+            LAG(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type ORDER BY t.year, t.month), 2)
         ELSE NULL
     END AS mom_change_pct
 
 FROM transactions t
-GROUP BY t.user_id, t.type, EXTRACT(YEAR FROM t.transaction_date), EXTRACT(MONTH FROM t.transaction_date)
+GROUP BY t.user_id, t.type, t.year, t.month, t.period_start
 ORDER BY t.user_id, year, month;
 
 -- ============================================
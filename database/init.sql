@@ -32,6 +32,9 @@ CREATE TABLE IF NOT EXISTS categories (
 
 CREATE INDEX IF NOT EXISTS idx_categories_user ON categories(user_id);
 CREATE INDEX IF NOT EXISTS idx_categories_type ON categories(type);
+-- Category pickers and summaries only read active categories, by owner and type, sorted by name
+CREATE INDEX IF NOT EXISTS idx_categories_active
+    ON categories(user_id, type, name) WHERE is_active = TRUE;
 
 -- Wallets table
 CREATE TABLE IF NOT EXISTS wallets (
@@ -39,6 +42,9 @@ CREATE TABLE IF NOT EXISTS wallets (
     user_id INTEGER NOT NULL REFERENCES users(id) ON DELETE CASCADE,
     name VARCHAR(100) NOT NULL,
     balance DECIMAL(15, 2) DEFAULT 0,
+    -- Balance before any transaction; balance is opening_balance plus the
+    -- wallet's transactions. Defaults to the inserted balance
+    opening_balance DECIMAL(15, 2) NOT NULL,
     currency VARCHAR(3) DEFAULT 'VND',
     icon VARCHAR(50) DEFAULT 'wallet',
     is_active BOOLEAN DEFAULT TRUE,
@@ -46,7 +52,9 @@ CREATE TABLE IF NOT EXISTS wallets (
     CONSTRAINT unique_wallet_name_per_user UNIQUE(user_id, name)
 );
 
-CREATE INDEX IF NOT EXISTS idx_wallets_user ON wallets(user_id);
+-- unique_wallet_name_per_user already indexes user_id; listings only read active wallets
+CREATE INDEX IF NOT EXISTS idx_wallets_user_active
+    ON wallets(user_id, created_at) WHERE is_active = TRUE;
 
 -- Transactions table
 CREATE TABLE IF NOT EXISTS transactions (
@@ -58,14 +66,44 @@ CREATE TABLE IF NOT EXISTS transactions (
     amount DECIMAL(15, 2) NOT NULL CHECK (amount > 0),
     description VARCHAR(500),
     transaction_date DATE NOT NULL,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    -- Part of the list cursor (transaction_date, created_at, id)
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    -- Period of transaction_date, stored so period filters and GROUP BYs can use indexes
+    year INTEGER GENERATED ALWAYS AS (EXTRACT(YEAR FROM transaction_date)::INTEGER) STORED,
+    month INTEGER GENERATED ALWAYS AS (EXTRACT(MONTH FROM transaction_date)::INTEGER) STORED,
+    period_start DATE GENERATED ALWAYS AS (DATE_TRUNC('month', transaction_date::TIMESTAMP)::DATE) STORED
 );
 
-CREATE INDEX IF NOT EXISTS idx_transactions_user ON transactions(user_id);
 CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(transaction_date);
-CREATE INDEX IF NOT EXISTS idx_transactions_user_date ON transactions(user_id, transaction_date);
+-- Matches the list endpoint ordering so cursor pages are a pure index seek; also
+-- serves any (user_id) or (user_id, transaction_date) lookup, and covers day and
+-- date-range sums index-only
+CREATE INDEX IF NOT EXISTS idx_transactions_user_list_covering
+    ON transactions(user_id, transaction_date DESC, created_at DESC, id DESC)
+    INCLUDE (type, amount, category_id);
+-- Covers per-period aggregates: a month of one user is one index range, read index-only
+CREATE INDEX IF NOT EXISTS idx_transactions_user_period
+    ON transactions(user_id, period_start, type, category_id) INCLUDE (amount);
 CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category_id);
-CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions(type);
+-- Per-wallet statistics read index-only; also backs the wallets foreign key
+CREATE INDEX IF NOT EXISTS idx_transactions_wallet
+    ON transactions(wallet_id) INCLUDE (type, amount, transaction_date);
+
+-- Wallet balance ledger: the balance triggers append per-wallet deltas here
+-- instead of updating wallets, so concurrent writers to one wallet never
+-- queue on its row lock. compact_wallet_balance_deltas() folds them into
+-- wallets.balance; a wallet's balance is balance + its pending deltas.
+-- Rows are short-lived, so autovacuum runs on a fixed number of dead rows
+CREATE TABLE IF NOT EXISTS wallet_balance_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    wallet_id INTEGER NOT NULL REFERENCES wallets(id) ON DELETE CASCADE,
+    delta DECIMAL(15, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) WITH (autovacuum_vacuum_scale_factor = 0, autovacuum_vacuum_threshold = 10000);
+
+-- Pending deltas of one wallet
+CREATE INDEX IF NOT EXISTS idx_wallet_balance_deltas_wallet
+    ON wallet_balance_deltas(wallet_id) INCLUDE (delta);
 
 -- Budgets table
 CREATE TABLE IF NOT EXISTS budgets (
@@ -104,46 +142,121 @@ INSERT INTO categories (user_id, name, type, icon, color) VALUES
 ON CONFLICT DO NOTHING;
 
 -- ============================================
--- 3. TRIGGER: Auto-update wallet balance
+-- 3. TRIGGER: Auto-update wallet balance (statement-level, via deltas)
 -- ============================================
 
+-- One delta per affected wallet per statement, with the deltas of all its
+-- rows summed. The wallet row is not locked: concurrent writers to one
+-- wallet only append, and compact_wallet_balance_deltas() folds the
+-- deltas into wallets.balance in the background
 CREATE OR REPLACE FUNCTION update_wallet_balance()
 RETURNS TRIGGER AS $$
 BEGIN
+    -- Maintenance jobs that set balances themselves can opt out
+    IF current_setting('app.skip_wallet_balance', true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+
     IF TG_OP = 'INSERT' THEN
-        IF NEW.type = 'income' THEN
-            UPDATE wallets SET balance = balance + NEW.amount WHERE id = NEW.wallet_id;
-        ELSE
-            UPDATE wallets SET balance = balance - NEW.amount WHERE id = NEW.wallet_id;
-        END IF;
+        INSERT INTO wallet_balance_deltas (wallet_id, delta)
+        SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END)
+        FROM new_rows
+        GROUP BY wallet_id;
     ELSIF TG_OP = 'DELETE' THEN
-        IF OLD.type = 'income' THEN
-            UPDATE wallets SET balance = balance - OLD.amount WHERE id = OLD.wallet_id;
-        ELSE
-            UPDATE wallets SET balance = balance + OLD.amount WHERE id = OLD.wallet_id;
-        END IF;
-    ELSIF TG_OP = 'UPDATE' THEN
-        -- Revert old transaction
-        IF OLD.type = 'income' THEN
-            UPDATE wallets SET balance = balance - OLD.amount WHERE id = OLD.wallet_id;
-        ELSE
-            UPDATE wallets SET balance = balance + OLD.amount WHERE id = OLD.wallet_id;
-        END IF;
-        -- Apply new transaction
-        IF NEW.type = 'income' THEN
-            UPDATE wallets SET balance = balance + NEW.amount WHERE id = NEW.wallet_id;
-        ELSE
-            UPDATE wallets SET balance = balance - NEW.amount WHERE id = NEW.wallet_id;
-        END IF;
+        INSERT INTO wallet_balance_deltas (wallet_id, delta)
+        SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN -amount ELSE amount END)
+        FROM old_rows
+        GROUP BY wallet_id;
+    ELSE
+        -- Revert the old rows and apply the new ones; rows moved between
+        -- wallets or types net out per wallet, and wallets whose total is
+        -- unchanged (e.g. description edits) get no delta
+        INSERT INTO wallet_balance_deltas (wallet_id, delta)
+        SELECT wallet_id, SUM(delta)
+        FROM (
+            SELECT wallet_id, CASE WHEN type = 'income' THEN amount ELSE -amount END AS delta
+            FROM new_rows
+            UNION ALL
+            SELECT wallet_id, CASE WHEN type = 'income' THEN -amount ELSE amount END
+            FROM old_rows
+        ) changes
+        GROUP BY wallet_id
+        HAVING SUM(delta) <> 0;
     END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_wallet_balance_insert ON transactions;
+CREATE TRIGGER trg_wallet_balance_insert
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_wallet_balance();
+
+DROP TRIGGER IF EXISTS trg_wallet_balance_update ON transactions;
+CREATE TRIGGER trg_wallet_balance_update
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_wallet_balance();
+
+DROP TRIGGER IF EXISTS trg_wallet_balance_delete ON transactions;
+CREATE TRIGGER trg_wallet_balance_delete
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION update_wallet_balance();
+
+-- A wallet created with a balance opens with it
+CREATE OR REPLACE FUNCTION set_wallet_opening_balance()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.opening_balance := COALESCE(NEW.opening_balance, NEW.balance, 0);
     RETURN NEW;
 END;
 $$ LANGUAGE plpgsql;
 
-DROP TRIGGER IF EXISTS trg_update_wallet_balance ON transactions;
-CREATE TRIGGER trg_update_wallet_balance
-    AFTER INSERT OR UPDATE OR DELETE ON transactions
-    FOR EACH ROW EXECUTE FUNCTION update_wallet_balance();
+DROP TRIGGER IF EXISTS trg_wallet_opening_balance ON wallets;
+CREATE TRIGGER trg_wallet_opening_balance
+    BEFORE INSERT ON wallets
+    FOR EACH ROW EXECUTE FUNCTION set_wallet_opening_balance();
+
+-- Fold up to p_batch_size of the oldest deltas (all of them when NULL)
+-- into wallets.balance and delete them in the same transaction, so a
+-- reader of balance + pending deltas sees each delta exactly once.
+-- Returns the number of deltas folded; 0 when another compaction is
+-- running. Called by the backend's compaction task
+CREATE OR REPLACE FUNCTION compact_wallet_balance_deltas(p_batch_size INTEGER DEFAULT 50000)
+RETURNS INTEGER AS $$
+DECLARE
+    v_folded INTEGER;
+BEGIN
+    -- Two compactions updating the same wallets in different orders could
+    -- deadlock; writers never take this lock
+    IF NOT pg_try_advisory_xact_lock(hashtext('compact_wallet_balance_deltas')) THEN
+        RETURN 0;
+    END IF;
+
+    WITH folded AS (
+        DELETE FROM wallet_balance_deltas
+        WHERE id IN (
+            SELECT id FROM wallet_balance_deltas ORDER BY id LIMIT p_batch_size
+        )
+        RETURNING wallet_id, delta
+    ), totals AS (
+        SELECT wallet_id, SUM(delta) AS delta, COUNT(*) AS deltas
+        FROM folded
+        GROUP BY wallet_id
+    ), applied AS (
+        UPDATE wallets w
+        SET balance = w.balance + t.delta
+        FROM totals t
+        WHERE w.id = t.wallet_id
+        RETURNING t.deltas
+    )
+    SELECT COALESCE(SUM(deltas), 0) INTO v_folded FROM applied;
+
+    RETURN v_folded;
+END;
+$$ LANGUAGE plpgsql;
 
 -- ============================================
 -- 4. ANALYTICAL VIEWS (For Superset & Dify)
@@ -164,9 +277,9 @@ GROUP BY t.user_id, t.transaction_date, t.type;
 CREATE OR REPLACE VIEW v_monthly_summary AS
 SELECT 
     t.user_id,
-    EXTRACT(YEAR FROM t.transaction_date)::INTEGER AS year,
-    EXTRACT(MONTH FROM t.transaction_date)::INTEGER AS month,
-    DATE_TRUNC('month', t.transaction_date)::DATE AS month_start,
+    t.year,
+    t.month,
+    t.period_start AS month_start,
     t.type,
     COUNT(*) AS transaction_count,
     SUM(t.amount) AS total_amount,
@@ -175,17 +288,17 @@ SELECT
 FROM transactions t
 GROUP BY 
     t.user_id,
-    EXTRACT(YEAR FROM t.transaction_date),
-    EXTRACT(MONTH FROM t.transaction_date),
-    DATE_TRUNC('month', t.transaction_date),
+    t.year,
+    t.month,
+    t.period_start,
     t.type;
 
 -- View: Category Breakdown
 CREATE OR REPLACE VIEW v_category_breakdown AS
 SELECT 
     t.user_id,
-    EXTRACT(YEAR FROM t.transaction_date)::INTEGER AS year,
-    EXTRACT(MONTH FROM t.transaction_date)::INTEGER AS month,
+    t.year,
+    t.month,
     t.type,
     c.id AS category_id,
     c.name AS category_name,
@@ -196,15 +309,15 @@ SELECT
     ROUND(
         SUM(t.amount) * 100.0 / 
         NULLIF(SUM(SUM(t.amount)) OVER (PARTITION BY t.user_id, t.type, 
-            EXTRACT(YEAR FROM t.transaction_date), 
-            EXTRACT(MONTH FROM t.transaction_date)), 0)
+            t.year, 
+            t.month), 0)
     , 2) AS percentage
 FROM transactions t
 JOIN categories c ON t.category_id = c.id
 GROUP BY 
     t.user_id,
-    EXTRACT(YEAR FROM t.transaction_date),
-    EXTRACT(MONTH FROM t.transaction_date),
+    t.year,
+    t.month,
     t.type,
     c.id, c.name, c.icon, c.color;
 
@@ -255,14 +368,14 @@ LEFT JOIN (
     SELECT 
         user_id,
         category_id,
-        EXTRACT(YEAR FROM transaction_date)::INTEGER AS year,
-        EXTRACT(MONTH FROM transaction_date)::INTEGER AS month,
+        year,
+        month,
         SUM(amount) AS spent
     FROM transactions
     WHERE type = 'expense'
     GROUP BY user_id, category_id, 
-        EXTRACT(YEAR FROM transaction_date),
-        EXTRACT(MONTH FROM transaction_date)
+        year,
+        month
 ) actual ON b.user_id = actual.user_id 
     AND b.category_id = actual.category_id 
     AND b.year = actual.year 
@@ -276,22 +389,30 @@ SELECT
     w.name AS wallet_name,
     w.icon AS wallet_icon,
     w.currency,
-    w.balance AS current_balance,
+    -- Cast keeps the column's original type, so CREATE OR REPLACE VIEW
+    -- works over the definitions it replaces
+    (w.balance + COALESCE(pending.delta, 0))::DECIMAL(15, 2) AS current_balance,
     COALESCE(stats.total_income, 0) AS total_income,
     COALESCE(stats.total_expense, 0) AS total_expense,
     COALESCE(stats.transaction_count, 0) AS transaction_count,
     stats.last_transaction_date
 FROM wallets w
-LEFT JOIN (
+-- Per wallet, so filtering on user_id only reads that user's wallets
+LEFT JOIN LATERAL (
     SELECT 
-        wallet_id,
-        SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END) AS total_income,
-        SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) AS total_expense,
+        SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END) AS total_income,
+        SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END) AS total_expense,
         COUNT(*) AS transaction_count,
-        MAX(transaction_date) AS last_transaction_date
-    FROM transactions
-    GROUP BY wallet_id
-) stats ON w.id = stats.wallet_id
+        MAX(t.transaction_date) AS last_transaction_date
+    FROM transactions t
+    WHERE t.wallet_id = w.id
+) stats ON TRUE
+-- Deltas not yet folded into w.balance
+LEFT JOIN LATERAL (
+    SELECT SUM(d.delta) AS delta
+    FROM wallet_balance_deltas d
+    WHERE d.wallet_id = w.id
+) pending ON TRUE
 WHERE w.is_active = TRUE;
 
 -- View: Recent Transactions (with details)
@@ -107,17 +107,17 @@ export default function Dashboard() {
 
   const fetchData = async () => {
     try {
-      const [summaryRes, monthlyRes, categoryRes, transactionsRes] =
-        await Promise.all([
-          summaryAPI.getDashboard(),
-          summaryAPI.getMonthly(6),
-          summaryAPI.getCategories('expense'),
-          transactionsAPI.getAll({ limit: 5 }),
-        ]);
+      const [bundleRes, transactionsRes] = await Promise.all([
+        summaryAPI.getBundle(['dashboard', 'monthly', 'categories'], {
+          months: 6,
+          type: 'expense',
+        }),
+        transactionsAPI.getAll({ limit: 5 }),
+      ]);
 
-      setSummary(summaryRes.data);
-      setMonthlyData(monthlyRes.data.reverse());
-      setCategoryData(categoryRes.data);
+      setSummary(bundleRes.data.dashboard);
+      setMonthlyData(bundleRes.data.monthly.reverse());
+      setCategoryData(bundleRes.data.categories);
       setRecentTransactions(transactionsRes.data);
     } catch (error) {
       console.error('Failed to fetch dashboard data:', error);
@@ -92,6 +92,8 @@ export const summaryAPI = {
   getMonthly: (months) => api.get('/api/summary/monthly', { params: { months } }),
   getCategories: (type, month, year) =>
     api.get('/api/summary/categories', { params: { type, month, year } }),
+  getBundle: (sections, params = {}) =>
+    api.get('/api/summary/bundle', { params: { sections: sections.join(','), ...params } }),
 };
 
 // Chatbot API (Backend direct - fallback)
@@ -0,0 +1,114 @@
+-- ============================================
+-- Benchmark: budget status evaluation
+-- Compares the old "aggregate every user's expenses, then join" query
+-- with the per-budget LATERAL lookup used by app/services/budget_service.py
+--
+-- Runs in a scratch schema on a 10M-row synthetic transactions table:
+--   docker-compose exec -T postgres psql -U postgres -d finance_db < scripts/bench_budget_status.sql
+-- ============================================
+
+\timing on
+SET client_min_messages = warning;
+
+DROP SCHEMA IF EXISTS bench CASCADE;
+CREATE SCHEMA bench;
+SET search_path = bench;
+
+-- 10,000 users x 20 expense categories, ~10M transactions over 24 months
+CREATE TABLE transactions (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    amount DECIMAL(15, 2) NOT NULL,
+    transaction_date DATE NOT NULL
+);
+
+INSERT INTO transactions (user_id, category_id, type, amount, transaction_date)
+SELECT
+    1 + (g % 10000),
+    1 + (g % 20),
+    CASE WHEN g % 10 = 0 THEN 'income' ELSE 'expense' END,
+    ROUND((random() * 2000000)::NUMERIC, 2),
+    DATE '2023-01-01' + (random() * 729)::INTEGER
+FROM generate_series(1, 10000000) AS g;
+
+CREATE INDEX idx_transactions_user_date ON transactions(user_id, transaction_date);
+
+CREATE TABLE transaction_monthly_rollup AS
+SELECT
+    user_id,
+    EXTRACT(YEAR FROM transaction_date)::INTEGER AS year,
+    EXTRACT(MONTH FROM transaction_date)::INTEGER AS month,
+    category_id,
+    type,
+    SUM(amount) AS total_amount,
+    COUNT(*) AS transaction_count
+FROM transactions
+GROUP BY 1, 2, 3, 4, 5;
+ALTER TABLE transaction_monthly_rollup ADD PRIMARY KEY (user_id, year, month, category_id, type);
+
+-- Five budgets per user for the benchmark month
+CREATE TABLE budgets AS
+SELECT
+    u AS id,
+    1 + (u % 10000) AS user_id,
+    1 + (u % 20) AS category_id,
+    3000000::DECIMAL(15, 2) AS amount,
+    12 AS month,
+    2024 AS year
+FROM generate_series(1, 50000) AS u;
+CREATE INDEX idx_budgets_user_period ON budgets(user_id, year, month);
+
+ANALYZE;
+
+-- --------------------------------------------
+-- One user (GET /api/budgets/status, chatbot)
+-- --------------------------------------------
+
+-- Before: aggregate all users' expenses, then join one user's budgets
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT b.id, b.amount, COALESCE(a.total_spent, 0) AS actual_spent
+FROM budgets b
+LEFT JOIN (
+    SELECT user_id, category_id,
+           EXTRACT(YEAR FROM transaction_date)::INTEGER AS year,
+           EXTRACT(MONTH FROM transaction_date)::INTEGER AS month,
+           SUM(amount) AS total_spent
+    FROM transactions
+    WHERE type = 'expense'
+    GROUP BY 1, 2, 3, 4
+) a ON a.user_id = b.user_id AND a.category_id = b.category_id
+   AND a.year = b.year AND a.month = b.month
+WHERE b.user_id = 4242 AND b.year = 2024 AND b.month = 12;
+
+-- After: one rollup primary-key lookup per budget
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT b.id, b.amount, s.actual_spent
+FROM budgets b
+CROSS JOIN LATERAL (
+    SELECT COALESCE(SUM(r.total_amount), 0) AS actual_spent
+    FROM transaction_monthly_rollup r
+    WHERE r.user_id = b.user_id AND r.year = b.year AND r.month = b.month
+      AND r.category_id = b.category_id AND r.type = 'expense'
+) s
+WHERE b.user_id = 4242 AND b.year = 2024 AND b.month = 12;
+
+-- --------------------------------------------
+-- All users (GET /api/automation/budget/overruns)
+-- --------------------------------------------
+
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT b.id, b.user_id, b.amount, s.actual_spent
+FROM budgets b
+CROSS JOIN LATERAL (
+    SELECT COALESCE(SUM(r.total_amount), 0) AS actual_spent
+    FROM transaction_monthly_rollup r
+    WHERE r.user_id = b.user_id AND r.year = b.year AND r.month = b.month
+      AND r.category_id = b.category_id AND r.type = 'expense'
+) s
+WHERE b.year = 2024 AND b.month = 12
+  AND s.actual_spent > b.amount;
+
+RESET search_path;
+DROP SCHEMA bench CASCADE;
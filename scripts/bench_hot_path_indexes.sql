@@ -0,0 +1,284 @@
+-- ============================================
+-- Benchmark: hot path indexes (database/08-hot-path-indexes.sql)
+-- Runs the API's read paths under the previous index set and the new
+-- one, and times bulk and single-row inserts under each, so every index
+-- added or dropped is weighed against its write cost
+--
+-- Runs in a scratch schema on a 5M-row synthetic transactions table:
+--   docker-compose exec -T postgres psql -U postgres -d finance_db < scripts/bench_hot_path_indexes.sql
+-- ============================================
+
+\timing on
+SET client_min_messages = warning;
+
+DROP SCHEMA IF EXISTS bench CASCADE;
+CREATE SCHEMA bench;
+SET search_path = bench;
+
+-- 10,000 users with 3 wallets (10% inactive), 13 system categories plus
+-- 4 custom ones each (25% inactive), 3 bills each (30% inactive)
+CREATE TABLE wallets (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    balance DECIMAL(15, 2) DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT unique_wallet_name_per_user UNIQUE(user_id, name)
+);
+INSERT INTO wallets (user_id, name, is_active, created_at)
+SELECT u, 'Wallet ' || w, (u + w) % 10 <> 0, TIMESTAMP '2023-01-01' + (u * 3 + w) * INTERVAL '1 minute'
+FROM generate_series(1, 10000) AS u, generate_series(1, 3) AS w;
+
+CREATE TABLE categories (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER,
+    name VARCHAR(100) NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE
+);
+INSERT INTO categories (user_id, name, type)
+SELECT NULL, 'System ' || c, CASE WHEN c <= 8 THEN 'expense' ELSE 'income' END
+FROM generate_series(1, 13) AS c;
+INSERT INTO categories (user_id, name, type, is_active)
+SELECT u, 'Custom ' || c, CASE WHEN c % 2 = 0 THEN 'expense' ELSE 'income' END, (u + c) % 4 <> 0
+FROM generate_series(1, 10000) AS u, generate_series(1, 4) AS c;
+
+CREATE TABLE bills (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    wallet_id INTEGER NOT NULL,
+    amount DECIMAL(15, 2) NOT NULL,
+    due_day INTEGER NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE
+);
+INSERT INTO bills (user_id, wallet_id, amount, due_day, is_active)
+SELECT u, (u - 1) * 3 + 1, 500000, 1 + (u + b) % 28, (u + b) % 10 >= 3
+FROM generate_series(1, 10000) AS u, generate_series(1, 3) AS b;
+
+CREATE TABLE transactions (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    wallet_id INTEGER NOT NULL,
+    category_id INTEGER NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    amount DECIMAL(15, 2) NOT NULL,
+    description VARCHAR(500),
+    transaction_date DATE NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    year INTEGER GENERATED ALWAYS AS (EXTRACT(YEAR FROM transaction_date)::INTEGER) STORED,
+    month INTEGER GENERATED ALWAYS AS (EXTRACT(MONTH FROM transaction_date)::INTEGER) STORED,
+    period_start DATE GENERATED ALWAYS AS (DATE_TRUNC('month', transaction_date::TIMESTAMP)::DATE) STORED
+);
+INSERT INTO transactions (user_id, wallet_id, category_id, type, amount, description, transaction_date, created_at)
+SELECT
+    1 + (g % 10000),
+    (g % 10000) * 3 + 1 + (g / 10000) % 3,
+    1 + (g % 13),
+    CASE WHEN g % 10 = 0 THEN 'income' ELSE 'expense' END,
+    ROUND((random() * 2000000)::NUMERIC, 2),
+    'Synthetic transaction ' || g,
+    d,
+    d + (g % 86400) * INTERVAL '1 second'
+FROM (
+    SELECT g, DATE '2023-01-01' + (random() * 729)::INTEGER AS d
+    FROM generate_series(1, 5000000) AS g
+) s;
+
+-- ============================================
+-- BEFORE: index set of init.sql / 04-bills.sql until now
+-- ============================================
+
+CREATE INDEX idx_transactions_user ON transactions(user_id);
+CREATE INDEX idx_transactions_date ON transactions(transaction_date);
+CREATE INDEX idx_transactions_user_date ON transactions(user_id, transaction_date);
+CREATE INDEX idx_transactions_user_list
+    ON transactions(user_id, transaction_date DESC, created_at DESC, id DESC);
+CREATE INDEX idx_transactions_user_period
+    ON transactions(user_id, period_start, type, category_id) INCLUDE (amount);
+CREATE INDEX idx_transactions_category ON transactions(category_id);
+CREATE INDEX idx_transactions_type ON transactions(type);
+CREATE INDEX idx_wallets_user ON wallets(user_id);
+CREATE INDEX idx_categories_user ON categories(user_id);
+CREATE INDEX idx_categories_type ON categories(type);
+CREATE INDEX idx_bills_user ON bills(user_id);
+CREATE INDEX idx_bills_due_day ON bills(due_day);
+CREATE INDEX idx_bills_active ON bills(is_active);
+VACUUM ANALYZE;
+
+SELECT indexrelname AS index, pg_size_pretty(pg_relation_size(indexrelid)) AS size
+FROM pg_stat_user_indexes WHERE schemaname = 'bench' AND relname = 'transactions'
+ORDER BY indexrelname;
+SELECT pg_size_pretty(SUM(pg_relation_size(indexrelid))) AS transactions_index_total
+FROM pg_stat_user_indexes WHERE schemaname = 'bench' AND relname = 'transactions';
+
+-- Write cost: an empty copy with the same indexes, loaded in bulk, then row by row
+CREATE TABLE tx_write (LIKE transactions INCLUDING ALL);
+INSERT INTO tx_write (user_id, wallet_id, category_id, type, amount, description, transaction_date, created_at)
+SELECT user_id, wallet_id, category_id, type, amount, description, transaction_date, created_at
+FROM transactions WHERE id <= 1000000;
+DO $$
+DECLARE
+    i INTEGER;
+BEGIN
+    FOR i IN 1..20000 LOOP
+        INSERT INTO tx_write (user_id, wallet_id, category_id, type, amount, description, transaction_date)
+        VALUES (1 + i % 10000, (i % 10000) * 3 + 1, 1 + i % 13, 'expense', 50000, 'Single row', DATE '2024-06-01' + i % 30);
+    END LOOP;
+END $$;
+DROP TABLE tx_write;
+
+-- List endpoint, first page
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT id, wallet_id, category_id, type, amount, description, transaction_date, created_at
+FROM transactions
+WHERE user_id = 4242
+ORDER BY transaction_date DESC, created_at DESC, id DESC
+LIMIT 50;
+
+-- One day of a user (daily summary)
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT type, COUNT(*), SUM(amount)
+FROM transactions
+WHERE user_id = 4242 AND transaction_date = DATE '2024-06-15'
+GROUP BY type;
+
+-- Date range of a user by category (month to date, export filters)
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT category_id, type, SUM(amount)
+FROM transactions
+WHERE user_id = 4242 AND transaction_date >= DATE '2024-06-01' AND transaction_date < DATE '2024-09-15'
+GROUP BY category_id, type;
+
+-- Wallet statistics of a user, as v_wallet_balance computed them
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT w.id, w.balance, stats.total_income, stats.total_expense, stats.transaction_count
+FROM wallets w
+LEFT JOIN (
+    SELECT
+        wallet_id,
+        SUM(CASE WHEN type = 'income' THEN amount ELSE 0 END) AS total_income,
+        SUM(CASE WHEN type = 'expense' THEN amount ELSE 0 END) AS total_expense,
+        COUNT(*) AS transaction_count
+    FROM transactions
+    GROUP BY wallet_id
+) stats ON w.id = stats.wallet_id
+WHERE w.is_active = TRUE AND w.user_id = 4242;
+
+-- Active wallets of a user (GET /api/wallets)
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM wallets WHERE user_id = 4242 AND is_active = TRUE ORDER BY created_at;
+
+-- Active expense categories visible to a user (GET /api/categories, category summary)
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM categories
+WHERE (user_id IS NULL OR user_id = 4242) AND is_active = TRUE AND type = 'expense'
+ORDER BY name;
+
+-- Active bills of every user (bill reminder automation)
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM bills WHERE is_active = TRUE ORDER BY user_id, due_day;
+
+-- The only shape idx_transactions_type can serve: every user's rows of one type
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT COUNT(*), SUM(amount) FROM transactions WHERE type = 'income';
+
+-- ============================================
+-- AFTER: database/08-hot-path-indexes.sql
+-- ============================================
+
+CREATE INDEX idx_transactions_user_list_covering
+    ON transactions(user_id, transaction_date DESC, created_at DESC, id DESC)
+    INCLUDE (type, amount, category_id);
+CREATE INDEX idx_transactions_wallet
+    ON transactions(wallet_id) INCLUDE (type, amount, transaction_date);
+DROP INDEX idx_transactions_user_list;
+DROP INDEX idx_transactions_user_date;
+DROP INDEX idx_transactions_user;
+DROP INDEX idx_transactions_type;
+CREATE INDEX idx_wallets_user_active ON wallets(user_id, created_at) WHERE is_active = TRUE;
+DROP INDEX idx_wallets_user;
+CREATE INDEX idx_categories_active ON categories(user_id, type, name) WHERE is_active = TRUE;
+CREATE INDEX idx_bills_user_active ON bills(user_id, due_day) WHERE is_active = TRUE;
+DROP INDEX idx_bills_active;
+VACUUM ANALYZE;
+
+SELECT indexrelname AS index, pg_size_pretty(pg_relation_size(indexrelid)) AS size
+FROM pg_stat_user_indexes WHERE schemaname = 'bench' AND relname = 'transactions'
+ORDER BY indexrelname;
+SELECT pg_size_pretty(SUM(pg_relation_size(indexrelid))) AS transactions_index_total
+FROM pg_stat_user_indexes WHERE schemaname = 'bench' AND relname = 'transactions';
+
+-- Write cost: same loads as above, with two indexes fewer on transactions
+CREATE TABLE tx_write (LIKE transactions INCLUDING ALL);
+INSERT INTO tx_write (user_id, wallet_id, category_id, type, amount, description, transaction_date, created_at)
+SELECT user_id, wallet_id, category_id, type, amount, description, transaction_date, created_at
+FROM transactions WHERE id <= 1000000;
+DO $$
+DECLARE
+    i INTEGER;
+BEGIN
+    FOR i IN 1..20000 LOOP
+        INSERT INTO tx_write (user_id, wallet_id, category_id, type, amount, description, transaction_date)
+        VALUES (1 + i % 10000, (i % 10000) * 3 + 1, 1 + i % 13, 'expense', 50000, 'Single row', DATE '2024-06-01' + i % 30);
+    END LOOP;
+END $$;
+DROP TABLE tx_write;
+
+-- List endpoint, first page: same seek, on the covering index
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT id, wallet_id, category_id, type, amount, description, transaction_date, created_at
+FROM transactions
+WHERE user_id = 4242
+ORDER BY transaction_date DESC, created_at DESC, id DESC
+LIMIT 50;
+
+-- One day of a user: index-only
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT type, COUNT(*), SUM(amount)
+FROM transactions
+WHERE user_id = 4242 AND transaction_date = DATE '2024-06-15'
+GROUP BY type;
+
+-- Date range of a user by category: index-only
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT category_id, type, SUM(amount)
+FROM transactions
+WHERE user_id = 4242 AND transaction_date >= DATE '2024-06-01' AND transaction_date < DATE '2024-09-15'
+GROUP BY category_id, type;
+
+-- Wallet statistics of a user, as v_wallet_balance now computes them:
+-- one index-only range per wallet instead of aggregating the whole table
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT w.id, w.balance, stats.total_income, stats.total_expense, stats.transaction_count
+FROM wallets w
+LEFT JOIN LATERAL (
+    SELECT
+        SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE 0 END) AS total_income,
+        SUM(CASE WHEN t.type = 'expense' THEN t.amount ELSE 0 END) AS total_expense,
+        COUNT(*) AS transaction_count
+    FROM transactions t
+    WHERE t.wallet_id = w.id
+) stats ON TRUE
+WHERE w.is_active = TRUE AND w.user_id = 4242;
+
+-- Active wallets of a user: already in created_at order
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM wallets WHERE user_id = 4242 AND is_active = TRUE ORDER BY created_at;
+
+-- Active expense categories visible to a user
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM categories
+WHERE (user_id IS NULL OR user_id = 4242) AND is_active = TRUE AND type = 'expense'
+ORDER BY name;
+
+-- Active bills of every user: read in order from the partial index, no sort
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT * FROM bills WHERE is_active = TRUE ORDER BY user_id, due_day;
+
+-- Without idx_transactions_type
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT COUNT(*), SUM(amount) FROM transactions WHERE type = 'income';
+
+RESET search_path;
+DROP SCHEMA bench CASCADE;
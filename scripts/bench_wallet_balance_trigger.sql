@@ -0,0 +1,219 @@
+-- ============================================
+-- Benchmark: wallet balance trigger, row-level vs statement-level
+-- Runs the same batches under the previous FOR EACH ROW trigger and the
+-- FOR EACH STATEMENT triggers of 09-wallet-balance-statement-trigger.sql,
+-- then checks that both left every wallet with the same balance
+--
+-- Runs in a scratch schema:
+--   docker-compose exec -T postgres psql -v ON_ERROR_STOP=1 -U postgres -d finance_db < scripts/bench_wallet_balance_trigger.sql
+-- ============================================
+
+\timing on
+SET client_min_messages = warning;
+
+DROP SCHEMA IF EXISTS bench CASCADE;
+CREATE SCHEMA bench;
+SET search_path = bench;
+
+CREATE TABLE wallets (
+    id SERIAL PRIMARY KEY,
+    balance DECIMAL(15, 2) DEFAULT 0
+);
+INSERT INTO wallets (balance) SELECT 0 FROM generate_series(1, 1000);
+
+CREATE TABLE transactions (
+    id SERIAL PRIMARY KEY,
+    wallet_id INTEGER NOT NULL REFERENCES wallets(id),
+    type VARCHAR(10) NOT NULL,
+    amount DECIMAL(15, 2) NOT NULL
+);
+
+-- Previous trigger function
+CREATE FUNCTION row_wallet_balance()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.type = 'income' THEN
+            UPDATE wallets SET balance = balance + NEW.amount WHERE id = NEW.wallet_id;
+        ELSE
+            UPDATE wallets SET balance = balance - NEW.amount WHERE id = NEW.wallet_id;
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        IF OLD.type = 'income' THEN
+            UPDATE wallets SET balance = balance - OLD.amount WHERE id = OLD.wallet_id;
+        ELSE
+            UPDATE wallets SET balance = balance + OLD.amount WHERE id = OLD.wallet_id;
+        END IF;
+    ELSIF TG_OP = 'UPDATE' THEN
+        IF OLD.type = 'income' THEN
+            UPDATE wallets SET balance = balance - OLD.amount WHERE id = OLD.wallet_id;
+        ELSE
+            UPDATE wallets SET balance = balance + OLD.amount WHERE id = OLD.wallet_id;
+        END IF;
+        IF NEW.type = 'income' THEN
+            UPDATE wallets SET balance = balance + NEW.amount WHERE id = NEW.wallet_id;
+        ELSE
+            UPDATE wallets SET balance = balance - NEW.amount WHERE id = NEW.wallet_id;
+        END IF;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Same body as update_wallet_balance() in database/09-wallet-balance-statement-trigger.sql
+-- (init.sql now appends to the wallet_balance_deltas ledger instead)
+CREATE FUNCTION statement_wallet_balance()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE wallets w
+        SET balance = w.balance + d.delta
+        FROM (
+            SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END) AS delta
+            FROM new_rows
+            GROUP BY wallet_id
+        ) d
+        WHERE w.id = d.wallet_id;
+    ELSIF TG_OP = 'DELETE' THEN
+        UPDATE wallets w
+        SET balance = w.balance + d.delta
+        FROM (
+            SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN -amount ELSE amount END) AS delta
+            FROM old_rows
+            GROUP BY wallet_id
+        ) d
+        WHERE w.id = d.wallet_id;
+    ELSE
+        UPDATE wallets w
+        SET balance = w.balance + d.delta
+        FROM (
+            SELECT wallet_id, SUM(delta) AS delta
+            FROM (
+                SELECT wallet_id, CASE WHEN type = 'income' THEN amount ELSE -amount END AS delta
+                FROM new_rows
+                UNION ALL
+                SELECT wallet_id, CASE WHEN type = 'income' THEN -amount ELSE amount END
+                FROM old_rows
+            ) changes
+            GROUP BY wallet_id
+            HAVING SUM(delta) <> 0
+        ) d
+        WHERE w.id = d.wallet_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TABLE balances_after (phase TEXT, wallet_id INTEGER, balance DECIMAL(15, 2));
+
+-- ============================================
+-- ROW-LEVEL
+-- ============================================
+
+CREATE TRIGGER trg_row_wallet_balance
+    AFTER INSERT OR UPDATE OR DELETE ON transactions
+    FOR EACH ROW EXECUTE FUNCTION row_wallet_balance();
+
+-- 100,000 rows into one wallet
+INSERT INTO transactions (wallet_id, type, amount)
+SELECT 1, CASE WHEN g % 7 = 0 THEN 'income' ELSE 'expense' END, 1000 + (g % 997) * 100
+FROM generate_series(1, 100000) AS g;
+
+-- 100,000 rows over 1,000 wallets
+INSERT INTO transactions (wallet_id, type, amount)
+SELECT 1 + g % 1000, CASE WHEN g % 7 = 0 THEN 'income' ELSE 'expense' END, 1000 + (g % 997) * 100
+FROM generate_series(1, 100000) AS g;
+
+-- 100,000 rows moved to another wallet, every 5th also switching type
+UPDATE transactions
+SET wallet_id = 2,
+    type = CASE WHEN id % 5 = 0 THEN (CASE WHEN type = 'income' THEN 'expense' ELSE 'income' END) ELSE type END
+WHERE id <= 100000;
+
+-- 100,000 amount edits across wallets
+UPDATE transactions SET amount = amount + 1 WHERE id > 100000;
+
+INSERT INTO balances_after SELECT 'row', id, balance FROM wallets;
+
+-- 200,000 rows deleted
+DELETE FROM transactions;
+
+-- 10,000 single-row inserts, the API's write path
+DO $$
+BEGIN
+    FOR i IN 1..10000 LOOP
+        INSERT INTO transactions (wallet_id, type, amount) VALUES (1 + i % 1000, 'expense', 50000);
+    END LOOP;
+END $$;
+
+DROP TRIGGER trg_row_wallet_balance ON transactions;
+TRUNCATE transactions RESTART IDENTITY;
+UPDATE wallets SET balance = 0;
+
+-- ============================================
+-- STATEMENT-LEVEL
+-- ============================================
+
+CREATE TRIGGER trg_wallet_balance_insert
+    AFTER INSERT ON transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION statement_wallet_balance();
+CREATE TRIGGER trg_wallet_balance_update
+    AFTER UPDATE ON transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION statement_wallet_balance();
+CREATE TRIGGER trg_wallet_balance_delete
+    AFTER DELETE ON transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION statement_wallet_balance();
+
+-- 100,000 rows into one wallet: one UPDATE instead of 100,000
+INSERT INTO transactions (wallet_id, type, amount)
+SELECT 1, CASE WHEN g % 7 = 0 THEN 'income' ELSE 'expense' END, 1000 + (g % 997) * 100
+FROM generate_series(1, 100000) AS g;
+
+-- 100,000 rows over 1,000 wallets: 1,000 UPDATEs
+INSERT INTO transactions (wallet_id, type, amount)
+SELECT 1 + g % 1000, CASE WHEN g % 7 = 0 THEN 'income' ELSE 'expense' END, 1000 + (g % 997) * 100
+FROM generate_series(1, 100000) AS g;
+
+UPDATE transactions
+SET wallet_id = 2,
+    type = CASE WHEN id % 5 = 0 THEN (CASE WHEN type = 'income' THEN 'expense' ELSE 'income' END) ELSE type END
+WHERE id <= 100000;
+
+UPDATE transactions SET amount = amount + 1 WHERE id > 100000;
+
+INSERT INTO balances_after SELECT 'statement', id, balance FROM wallets;
+
+DELETE FROM transactions;
+
+-- Single-row inserts pay for a one-row transition table instead
+DO $$
+BEGIN
+    FOR i IN 1..10000 LOOP
+        INSERT INTO transactions (wallet_id, type, amount) VALUES (1 + i % 1000, 'expense', 50000);
+    END LOOP;
+END $$;
+
+-- ============================================
+-- SAME BALANCES?
+-- ============================================
+
+-- Fails the script (non-zero psql exit with ON_ERROR_STOP) on any mismatch
+DO $$
+DECLARE
+    v_mismatched INTEGER;
+BEGIN
+    SELECT COUNT(*) INTO v_mismatched
+    FROM (SELECT * FROM balances_after WHERE phase = 'row') r
+    FULL JOIN (SELECT * FROM balances_after WHERE phase = 'statement') s USING (wallet_id)
+    WHERE r.balance IS DISTINCT FROM s.balance;
+    IF v_mismatched > 0 THEN
+        RAISE EXCEPTION '% wallet(s) differ between row-level and statement-level triggers', v_mismatched;
+    END IF;
+    RAISE WARNING 'row-level and statement-level balances match';
+END $$;
+
+RESET search_path;
+DROP SCHEMA bench CASCADE;
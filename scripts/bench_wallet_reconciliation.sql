@@ -0,0 +1,230 @@
+-- ============================================
+-- Benchmark: wallet balance reconciliation (database/11-wallet-reconciliation.sql)
+-- Times a full pass of reconcile_wallet_balances() in chunks of 1,000
+-- users against one set-based GROUP BY over the whole table, and checks
+-- that injected drift is found, repaired, and gone on the next pass
+--
+-- Runs in a scratch schema on a 5M-row synthetic transactions table:
+--   docker-compose exec -T postgres psql -U postgres -d finance_db < scripts/bench_wallet_reconciliation.sql
+-- ============================================
+
+\timing on
+SET client_min_messages = warning;
+
+DROP SCHEMA IF EXISTS bench CASCADE;
+CREATE SCHEMA bench;
+SET search_path = bench;
+
+-- 50,000 users with 2 wallets each, 50 transactions per wallet
+CREATE TABLE wallets (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    name VARCHAR(100) NOT NULL,
+    balance DECIMAL(15, 2) DEFAULT 0,
+    opening_balance DECIMAL(15, 2) NOT NULL,
+    CONSTRAINT unique_wallet_name_per_user UNIQUE(user_id, name)
+);
+INSERT INTO wallets (user_id, name, opening_balance)
+SELECT u, 'Wallet ' || w, (u * 7 + w) % 1000 * 1000
+FROM generate_series(1, 50000) AS u, generate_series(1, 2) AS w;
+
+CREATE TABLE transactions (
+    id BIGSERIAL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    wallet_id INTEGER NOT NULL,
+    type VARCHAR(10) NOT NULL,
+    amount DECIMAL(15, 2) NOT NULL
+);
+INSERT INTO transactions (user_id, wallet_id, type, amount)
+SELECT w.user_id, w.id, CASE WHEN g % 10 = 0 THEN 'income' ELSE 'expense' END, 1000 + (g * 37 % 997) * 100
+FROM wallets w, generate_series(1, 50) AS g;
+CREATE INDEX idx_transactions_wallet ON transactions(wallet_id) INCLUDE (type, amount);
+
+CREATE TABLE wallet_balance_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    wallet_id INTEGER NOT NULL,
+    delta DECIMAL(15, 2) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_wallet_balance_deltas_wallet ON wallet_balance_deltas(wallet_id) INCLUDE (delta);
+
+-- Correct balances, with 1,000 of every 10th wallet's balance still pending in the ledger
+UPDATE wallets w
+SET balance = w.opening_balance + s.net
+FROM (
+    SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END) AS net
+    FROM transactions
+    GROUP BY wallet_id
+) s
+WHERE s.wallet_id = w.id;
+INSERT INTO wallet_balance_deltas (wallet_id, delta)
+SELECT id, -1000 FROM wallets WHERE id % 10 = 0;
+UPDATE wallets SET balance = balance + 1000 WHERE id % 10 = 0;
+
+CREATE TABLE wallet_reconciliation_runs (
+    id SERIAL PRIMARY KEY,
+    repair BOOLEAN NOT NULL DEFAULT FALSE,
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    wallets_checked INTEGER NOT NULL DEFAULT 0,
+    drifted_wallets INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE wallet_balance_drift (
+    id BIGSERIAL PRIMARY KEY,
+    run_id INTEGER NOT NULL,
+    wallet_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    stored_balance DECIMAL(15, 2) NOT NULL,
+    expected_balance DECIMAL(15, 2) NOT NULL,
+    drift DECIMAL(15, 2) GENERATED ALWAYS AS (expected_balance - stored_balance) STORED,
+    repaired BOOLEAN NOT NULL DEFAULT FALSE,
+    detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Same body as reconcile_wallet_balances() in database/11-wallet-reconciliation.sql
+CREATE FUNCTION reconcile_wallet_balances(
+    p_run_id INTEGER,
+    p_user_from INTEGER,
+    p_user_to INTEGER,
+    p_repair BOOLEAN DEFAULT FALSE
+)
+RETURNS TABLE (checked_wallets INTEGER, drifted_wallets INTEGER) AS $$
+BEGIN
+    IF p_repair THEN
+        PERFORM pg_advisory_xact_lock(hashtext('reconcile_wallet_balances'));
+    END IF;
+
+    WITH checked AS (
+        SELECT
+            w.id AS wallet_id,
+            w.user_id AS owner_id,
+            COALESCE(w.balance, 0) + COALESCE(pending.delta, 0) AS stored,
+            w.opening_balance + COALESCE(stats.net, 0) AS expected
+        FROM wallets w
+        LEFT JOIN LATERAL (
+            SELECT SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE -t.amount END) AS net
+            FROM transactions t
+            WHERE t.wallet_id = w.id
+        ) stats ON TRUE
+        LEFT JOIN LATERAL (
+            SELECT SUM(d.delta) AS delta
+            FROM wallet_balance_deltas d
+            WHERE d.wallet_id = w.id
+        ) pending ON TRUE
+        WHERE w.user_id >= p_user_from AND w.user_id < p_user_to
+    ), drifted AS (
+        SELECT * FROM checked WHERE stored <> expected
+    ), repaired AS (
+        INSERT INTO wallet_balance_deltas (wallet_id, delta)
+        SELECT wallet_id, expected - stored
+        FROM drifted
+        WHERE p_repair
+    ), recorded AS (
+        INSERT INTO wallet_balance_drift (run_id, wallet_id, user_id, stored_balance, expected_balance, repaired)
+        SELECT p_run_id, wallet_id, owner_id, stored, expected, p_repair
+        FROM drifted
+        RETURNING 1
+    )
+    SELECT (SELECT COUNT(*) FROM checked), (SELECT COUNT(*) FROM recorded)
+    INTO checked_wallets, drifted_wallets;
+
+    UPDATE wallet_reconciliation_runs r
+    SET wallets_checked = r.wallets_checked + reconcile_wallet_balances.checked_wallets,
+        drifted_wallets = r.drifted_wallets + reconcile_wallet_balances.drifted_wallets
+    WHERE r.id = p_run_id;
+
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
+
+-- What the reconciliation job does: one transaction per chunk of users
+CREATE PROCEDURE full_pass(p_repair BOOLEAN) AS $$
+DECLARE
+    v_run_id INTEGER;
+    v_high INTEGER;
+    v_from INTEGER;
+BEGIN
+    INSERT INTO wallet_reconciliation_runs (repair) VALUES (p_repair) RETURNING id INTO v_run_id;
+    SELECT MIN(user_id), MAX(user_id) INTO v_from, v_high FROM wallets;
+    WHILE v_from <= v_high LOOP
+        PERFORM reconcile_wallet_balances(v_run_id, v_from, v_from + 1000, p_repair);
+        COMMIT;
+        v_from := v_from + 1000;
+    END LOOP;
+    UPDATE wallet_reconciliation_runs SET finished_at = clock_timestamp() WHERE id = v_run_id;
+END;
+$$ LANGUAGE plpgsql;
+
+VACUUM ANALYZE;
+
+-- ============================================
+-- ONE CHUNK
+-- ============================================
+
+-- Expect a nested loop over 2,000 wallets with index-only scans of
+-- idx_transactions_wallet (no Seq Scan on transactions)
+EXPLAIN (ANALYZE, BUFFERS)
+SELECT w.id,
+       COALESCE(w.balance, 0) + COALESCE(pending.delta, 0) AS stored,
+       w.opening_balance + COALESCE(stats.net, 0) AS expected
+FROM wallets w
+LEFT JOIN LATERAL (
+    SELECT SUM(CASE WHEN t.type = 'income' THEN t.amount ELSE -t.amount END) AS net
+    FROM transactions t
+    WHERE t.wallet_id = w.id
+) stats ON TRUE
+LEFT JOIN LATERAL (
+    SELECT SUM(d.delta) AS delta
+    FROM wallet_balance_deltas d
+    WHERE d.wallet_id = w.id
+) pending ON TRUE
+WHERE w.user_id >= 1 AND w.user_id < 1001;
+
+-- ============================================
+-- FULL PASS: ONE STATEMENT VS CHUNKS
+-- ============================================
+
+-- Whole table at once, for comparison: one long statement whose snapshot
+-- holds back vacuum while it runs
+SELECT COUNT(*) AS drifted_wallets
+FROM wallets w
+LEFT JOIN (
+    SELECT wallet_id, SUM(CASE WHEN type = 'income' THEN amount ELSE -amount END) AS net
+    FROM transactions
+    GROUP BY wallet_id
+) s ON s.wallet_id = w.id
+LEFT JOIN (
+    SELECT wallet_id, SUM(delta) AS delta
+    FROM wallet_balance_deltas
+    GROUP BY wallet_id
+) p ON p.wallet_id = w.id
+WHERE w.balance + COALESCE(p.delta, 0) <> w.opening_balance + COALESCE(s.net, 0);
+
+-- 50 chunks of 1,000 users; expect 0 drifted
+CALL full_pass(FALSE);
+SELECT id, wallets_checked, drifted_wallets, finished_at - started_at AS duration
+FROM wallet_reconciliation_runs ORDER BY id DESC LIMIT 1;
+
+-- ============================================
+-- DRIFT: FOUND, REPAIRED, GONE
+-- ============================================
+
+-- 100 wallets off by 1,234.56
+UPDATE wallets SET balance = balance + 1234.56 WHERE id % 1000 = 0;
+
+-- Expect 100 drifted, each with drift -1234.56
+CALL full_pass(TRUE);
+SELECT id, wallets_checked, drifted_wallets, finished_at - started_at AS duration
+FROM wallet_reconciliation_runs ORDER BY id DESC LIMIT 1;
+SELECT drift, COUNT(*) FROM wallet_balance_drift
+WHERE run_id = (SELECT MAX(id) FROM wallet_reconciliation_runs)
+GROUP BY drift;
+
+-- Expect 0 drifted after the repair
+CALL full_pass(FALSE);
+SELECT id, wallets_checked, drifted_wallets
+FROM wallet_reconciliation_runs ORDER BY id DESC LIMIT 1;
+
+RESET search_path;
+DROP SCHEMA bench CASCADE;
@@ -27,6 +27,16 @@ PG_USER = os.environ.get('PG_USER', 'superset_readonly')
 PG_PASSWORD = os.environ.get('PG_PASSWORD', 'superset_pass')
 PG_DATABASE = os.environ.get('PG_DATABASE', 'finance_db')
 
+# "materialized" points charts of the heavy Phase 3 views at their mv_* copies
+BI_VIEW_SOURCE = os.environ.get('BI_VIEW_SOURCE', 'live')
+MATERIALIZED_VIEWS = {
+    'v_kpi_summary': 'mv_kpi_summary',
+    'v_user_financial_health': 'mv_user_financial_health',
+    'v_expense_forecast': 'mv_expense_forecast',
+    'v_category_growth': 'mv_category_growth',
+    'v_monthly_cashflow': 'mv_monthly_cashflow',
+}
+
 class SupersetBootstrap:
     def __init__(self):
         self.session = requests.Session()
@@ -215,12 +225,22 @@ class SupersetBootstrap:
             'v_user_financial_health',
             'v_expense_forecast',
             'v_kpi_summary',
-            'v_transaction_comparison'
+            'v_transaction_comparison',
+            
+            # Refresh time of the materialized views
+            'v_bi_freshness'
         ]
         
         for view in views:
             self.create_dataset(view)
         
+        if BI_VIEW_SOURCE == 'materialized':
+            # Charts look datasets up by live view name
+            for view, materialized in MATERIALIZED_VIEWS.items():
+                self.create_dataset(materialized)
+                if self.datasets.get(materialized):
+                    self.datasets[view] = self.datasets[materialized]
+        
         print("✅ All datasets created!")
     
     def create_chart(self, chart_config):